@@ -17,17 +17,57 @@ WINDOW_HEIGHT = 800
 # is detected. After connect, the detected stream rate takes over.
 SAMPLE_RATE = 10
 
+# How LSLClient acquires samples.
+#   "blocking": a dedicated loop blocks in pull_chunk for up to
+#     LSL_PULL_TIMEOUT_S, writing straight into a preallocated numpy buffer.
+#     No empty polls, and chunk latency does not depend on the Qt event loop.
+#   "timer": legacy QTimer poll once per nominal sample period (timeout=0).
+# pull_chunk returns when LSL_PULL_MAX_SAMPLES arrive or the timeout expires,
+# so the timeout bounds the added latency at low rates.
+LSL_ACQUISITION_MODE = "blocking"
+LSL_PULL_TIMEOUT_S = 0.05
+LSL_PULL_MAX_SAMPLES = 64
+
 # --- Recording Configuration ---
 # RECORDINGS_ROOT overrides the default Documents/fNIRS Monitor/Recordings
 # path. None = use platform default (resolved via app_paths.default_recordings_dir).
 RECORDINGS_ROOT = None
 
+# What SessionRecorder writes per sample.
+#   "tsv": OxySoft-style raw_od.tsv + calculated.tsv (text).
+#   "binary": session.npy only, a fixed-width record per row appended in
+#     blocks. Far cheaper to write and several times smaller; the TSV files
+#     can be regenerated from it with scripts/export_session_tsv.py.
+#   "both": TSV files and session.npy.
+RECORDING_FORMAT = "tsv"
+
+# Recording writer thread. When its queue is full (disk stalled), "drop"
+# loses the rows (counted and logged) while "block" makes the processing
+# thread wait up to RECORDING_BLOCK_TIMEOUT_S for room before dropping. The
+# wait happens outside the worker lock, so GUI polls and control actions
+# are not held up by it.
+# RECORDING_FILE_BUFFER_BYTES is the per-file write buffer size.
+RECORDING_QUEUE_POLICY = "drop"
+RECORDING_BLOCK_TIMEOUT_S = 0.5
+RECORDING_FILE_BUFFER_BYTES = 1 << 20
+
 # --- Reconnect Behavior ---
 # How long to hold a paused recording open after a stream drop before giving
 # up. During this window the controller also retries find_streams once per
 # second so a returning device resumes the same files automatically.
 RECONNECT_TOLERANCE_S = 5.0
 
+# --- Diagnostics ---
+# How often the sample -> pull / processed / alert / repaint latency
+# percentiles are written to the log. 0 disables the periodic log line (the
+# diagnostics card in the UI keeps updating).
+LATENCY_LOG_INTERVAL_S = 60.0
+
+# Per-stage timing counters (processor stages, recorder, plot repaint),
+# queryable from the controller and logged as JSON on close. A couple of
+# perf_counter() calls per stage per chunk; cheap enough to leave on.
+PROFILING_ENABLED = True
+
 # --- Alerting Configuration ---
 ALERT_HISTORY_SECONDS = 10  # seconds (legacy ring buffer; Phase 4 detector ignores this)
 
@@ -93,8 +133,9 @@ EXTINCTION_COEFFICIENTS = {
 #   - std must exceed QUALITY_STD_LOWER (rejects flat-lined / disconnected channels)
 #   - coefficient of variation must be below QUALITY_CV_UPPER (rejects runaway channels)
 #   - heartbeat peak in 0.8-2.0 Hz must exceed noise (2.5-5.0 Hz) by
-#     QUALITY_HR_SNR_THRESHOLD (confirms skin coupling). FFT recomputed
-#     every QUALITY_HR_RECOMPUTE_S to keep the per-sample cost low.
+#     QUALITY_HR_SNR_THRESHOLD (confirms skin coupling). The band bins are a
+#     sliding DFT re-evaluated every sample; QUALITY_HR_RECOMPUTE_S sets how
+#     often they are recomputed exactly to cancel rounding drift.
 QUALITY_WINDOW_S = 5.0
 QUALITY_HR_RECOMPUTE_S = 1.0
 QUALITY_STD_LOWER = 0.005
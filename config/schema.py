@@ -163,6 +163,79 @@ def _validate_quality_hr_snr_threshold(value: Any) -> float:
     return value
 
 
+@_register("LSL_ACQUISITION_MODE")
+def _validate_lsl_acquisition_mode(value: Any) -> str:
+    value = str(value)
+    valid = ("blocking", "timer")
+    if value not in valid:
+        raise SettingsValidationError(
+            f"LSL_ACQUISITION_MODE must be one of {valid}, got {value!r}"
+        )
+    return value
+
+
+@_register("LSL_PULL_TIMEOUT_S")
+def _validate_lsl_pull_timeout_s(value: Any) -> float:
+    value = float(value)
+    if not (0.005 <= value <= 1.0):
+        raise SettingsValidationError(
+            f"LSL_PULL_TIMEOUT_S must be in [0.005, 1.0], got {value}"
+        )
+    return value
+
+
+@_register("LSL_PULL_MAX_SAMPLES")
+def _validate_lsl_pull_max_samples(value: Any) -> int:
+    value = int(value)
+    if not (1 <= value <= 4096):
+        raise SettingsValidationError(
+            f"LSL_PULL_MAX_SAMPLES must be in [1, 4096], got {value}"
+        )
+    return value
+
+
+@_register("RECORDING_FORMAT")
+def _validate_recording_format(value: Any) -> str:
+    value = str(value)
+    valid = ("tsv", "binary", "both")
+    if value not in valid:
+        raise SettingsValidationError(
+            f"RECORDING_FORMAT must be one of {valid}, got {value!r}"
+        )
+    return value
+
+
+@_register("RECORDING_QUEUE_POLICY")
+def _validate_recording_queue_policy(value: Any) -> str:
+    value = str(value)
+    valid = ("drop", "block")
+    if value not in valid:
+        raise SettingsValidationError(
+            f"RECORDING_QUEUE_POLICY must be one of {valid}, got {value!r}"
+        )
+    return value
+
+
+@_register("RECORDING_BLOCK_TIMEOUT_S")
+def _validate_recording_block_timeout_s(value: Any) -> float:
+    value = float(value)
+    if not (0.01 <= value <= 10.0):
+        raise SettingsValidationError(
+            f"RECORDING_BLOCK_TIMEOUT_S must be in [0.01, 10.0], got {value}"
+        )
+    return value
+
+
+@_register("RECORDING_FILE_BUFFER_BYTES")
+def _validate_recording_file_buffer_bytes(value: Any) -> int:
+    value = int(value)
+    if not (4096 <= value <= 64 * 1024 * 1024):
+        raise SettingsValidationError(
+            f"RECORDING_FILE_BUFFER_BYTES must be in [4096, 67108864], got {value}"
+        )
+    return value
+
+
 @_register("RECONNECT_TOLERANCE_S")
 def _validate_reconnect_tolerance_s(value: Any) -> float:
     value = float(value)
@@ -173,6 +246,25 @@ def _validate_reconnect_tolerance_s(value: Any) -> float:
     return value
 
 
+@_register("LATENCY_LOG_INTERVAL_S")
+def _validate_latency_log_interval_s(value: Any) -> float:
+    value = float(value)
+    if value != 0.0 and not (5.0 <= value <= 3600.0):
+        raise SettingsValidationError(
+            f"LATENCY_LOG_INTERVAL_S must be 0 or in [5.0, 3600.0], got {value}"
+        )
+    return value
+
+
+@_register("PROFILING_ENABLED")
+def _validate_profiling_enabled(value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise SettingsValidationError(
+            f"PROFILING_ENABLED must be true or false, got {value!r}"
+        )
+    return value
+
+
 @_register("SOUND_NOMINAL_SUPPRESS_S")
 def _validate_sound_nominal_suppress_s(value: Any) -> float:
     value = float(value)
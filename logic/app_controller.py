@@ -1,19 +1,18 @@
 import logging
 import time
 
-import numpy as np
 from PySide6.QtCore import QObject, QThread, QTimer, Signal
+from pylsl import local_clock
 
 import config
 
 
 logger = logging.getLogger(__name__)
 from logic.lsl_client import LSLClient
-from logic.data_processor import DataProcessor
+from logic.processing_worker import ProcessingWorker
 from utils.app_paths import default_recordings_dir
 from utils.sound_player import SoundPlayer
 from utils.enums import CognitiveState
-from utils.session_recorder import SessionRecorder
 from utils.session_naming import (
     split_name_and_index,
     get_next_index_for_prefix,
@@ -30,12 +29,15 @@ def _resolve_recordings_root() -> str:
 
 
 class AppController(QObject):
-    # Main controller: owns the LSL client thread, data processor, recorder,
-    # and alert/audio orchestration.
+    # Main controller: owns the LSL client thread and the processing thread,
+    # and does connection/recording lifecycle plus alert/audio orchestration
+    # on the GUI thread. The DataProcessor and SessionRecorder belong to the
+    # ProcessingWorker; mutate them only while holding its lock.
 
     streams_found = Signal(list)
     connection_status = Signal(bool)
-    processed_data_ready = Signal(dict)
+    # Throttled display blocks (see ProcessingWorker.display_snapshot).
+    display_snapshot_ready = Signal(object)
     alert_state_changed = Signal(object)
     # Emitted when a stream was found but failed the metadata contract.
     # Phase 6 will hook a modal dialog to this; for now the UI just logs.
@@ -51,24 +53,32 @@ class AppController(QObject):
     connect_requested = Signal(str)
     disconnect_requested = Signal()
     sample_rate_info_changed = Signal(object)
+    # Tells the worker the controller has finished handling a connect, so
+    # chunks it held since the LSL `connected` signal can be processed.
+    processing_release_requested = Signal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
 
         self.lsl_client = LSLClient()
-        self.data_processor = DataProcessor()
         self.sound_player = SoundPlayer()
         self.lsl_thread = QThread()
-
         self.lsl_client.moveToThread(self.lsl_thread)
+
+        # Processing runs on its own thread so a slow frame can never delay
+        # recording or alerts.
+        self.worker = ProcessingWorker(recordings_root=_resolve_recordings_root())
+        self.processing_thread = QThread()
+        self.worker.moveToThread(self.processing_thread)
+        self.data_processor = self.worker.data_processor
+        self.recorder = self.worker.recorder
+
         self.is_connected = False
         self.last_alert_state = CognitiveState.NOMINAL
         self.alert_rules = {}
 
         self.detected_stream_rate = None
 
-        self.recorder = SessionRecorder(recordings_root=_resolve_recordings_root())
-
         self.connected_stream_name = None
         self.connected_source_id = None
 
@@ -102,6 +112,17 @@ class AppController(QObject):
         self._reconnect_retry_timer.setInterval(1000)
         self._reconnect_retry_timer.timeout.connect(self._try_auto_reconnect)
 
+        # Periodic latency percentiles in the log (config.LATENCY_LOG_INTERVAL_S;
+        # 0 disables). Cumulative since the last fresh connect.
+        self.latency = self.worker.latency
+        self._latency_log_timer = QTimer(self)
+        self._latency_log_timer.timeout.connect(self.latency.log_summary)
+        self._apply_latency_log_interval()
+
+        # Per-stage pipeline timings (see StageProfiler); the GUI adds its
+        # repaint time through record_repaint_time.
+        self.profiler = self.worker.profiler
+
         # --- Connect controller request signals to client slots ---
         self.find_streams_requested.connect(self.lsl_client.find_streams)
         self.connect_requested.connect(self.lsl_client.connect_to_stream)
@@ -111,10 +132,17 @@ class AppController(QObject):
         self.lsl_client.streams_found.connect(self.streams_found)
         self.lsl_client.connected.connect(self._on_connected)
         self.lsl_client.disconnected.connect(self._on_disconnected)
-        self.lsl_client.new_data_ready.connect(self._on_new_data)
         self.lsl_client.sample_rate_detected.connect(self._on_sample_rate_detected)
         self.lsl_client.connection_rejected.connect(self._on_connection_rejected)
 
+        # --- Data path: LSL thread -> processing thread -> GUI (throttled) ---
+        self.lsl_client.connected.connect(self.worker.on_stream_connected)
+        self.lsl_client.new_data_ready.connect(self.worker.process_chunk)
+        self.processing_release_requested.connect(self.worker.release)
+        self.worker.display_snapshot.connect(self.display_snapshot_ready)
+        self.worker.alert_state_changed.connect(self._on_alert_state_changed)
+
+        self.processing_thread.start()
         self.lsl_thread.start()
 
     # ---------- Stream / rate plumbing ----------
@@ -124,7 +152,8 @@ class AppController(QObject):
 
     def _on_sample_rate_detected(self, rate):
         self.detected_stream_rate = float(rate) if rate and rate > 0 else None
-        self.data_processor.set_sample_rate(self.detected_stream_rate)
+        with self.worker.lock:
+            self.data_processor.set_sample_rate(self.detected_stream_rate)
         self._emit_sample_rate_info()
 
     def set_alert_rules(self, rules):
@@ -156,22 +185,29 @@ class AppController(QObject):
         # If we are inside the tolerance window for a previous recording and the
         # incoming stream is the same source, resume in-place instead of cutting
         # a new file.
-        if self.recorder.can_resume(stream_info):
+        with self.worker.lock:
+            resuming = self.recorder.can_resume(stream_info)
+            if resuming:
+                gap_ms = self._compute_gap_ms()
+                self.recorder.resume(gap_ms)
+            else:
+                # Fresh session: reset processor state.
+                self.data_processor.reset()
+                self.latency.reset()
+
+        if resuming:
             self._pause_timer.stop()
             self._reconnect_retry_timer.stop()
-            gap_ms = self._compute_gap_ms()
-            self.recorder.resume(gap_ms)
             self._disconnect_time_ms = None
             self.connection_status.emit(True)
             self.recording_state_changed.emit("resumed")
-            return
-
-        # Fresh session: reset processor state and possibly auto-start recording.
-        self.data_processor.reset()
-        self.connection_status.emit(True)
+        else:
+            self.connection_status.emit(True)
+            if self.auto_record_on_connect and self.auto_record_session_name:
+                self.start_recording(self.auto_record_session_name)
 
-        if self.auto_record_on_connect and self.auto_record_session_name:
-            self.start_recording(self.auto_record_session_name)
+        # Chunks that raced ahead of this handler can now be processed.
+        self.processing_release_requested.emit()
 
     def _on_disconnected(self):
         user_initiated = self._user_initiated_disconnect
@@ -193,8 +229,12 @@ class AppController(QObject):
             return
 
         # Watchdog / network drop. Hold the recording open for a tolerance window.
-        if was_connected and self.recorder.is_recording and not self.recorder.is_paused:
-            self.recorder.pause()
+        with self.worker.lock:
+            pausing = was_connected and self.recorder.is_recording and not self.recorder.is_paused
+            if pausing:
+                self.recorder.pause()
+        if pausing:
+            self.recorder.flush_pending()
             self.recording_state_changed.emit("paused")
             self._disconnect_time_ms = self._now_ms()
             self._pause_timer.start()
@@ -232,103 +272,67 @@ class AppController(QObject):
         logger.warning("Connection rejected: %s", reason)
         self.connection_error.emit(reason)
 
-    # ---------- Sample processing ----------
-
-    def _on_new_data(self, data):
-        if not self.is_connected:
-            return
-
-        samples = data.get("samples", [])
-        timestamps = data.get("timestamps", [])
-
-        for sample, timestamp in zip(samples, timestamps):
-            self._process_one_sample(sample, timestamp)
-
-    def _process_one_sample(self, sample, timestamp):
-        try:
-            vec = np.asarray(sample, dtype=float)
-        except Exception:
-            return
-
-        od32 = []
-        adc = 0
-        event = 0
-
-        if vec.size >= 32:
-            od32 = vec[:32].tolist()
-        if vec.size >= 33 and np.isfinite(vec[32]):
-            adc = int(vec[32])
-        if vec.size >= 34 and np.isfinite(vec[33]):
-            event = int(vec[33])
-
-        # NaN guard: a single non-finite OD value would propagate through MBLL
-        # and through the alert ring buffer. Drop the sample with a sentinel
-        # recording row and skip processing.
-        od_finite = (len(od32) == 32) and bool(np.isfinite(od32).all())
-        if not od_finite:
-            self._record_row(
-                od32 if len(od32) == 32 else None, None, None, adc, event,
-                dropped=True, timestamp=timestamp,
-            )
-            return
-
-        try:
-            processed = self.data_processor.process_sample_od(sample, self.alert_rules)
-        except Exception as ex:
-            logger.exception("Processing failed: %s", ex)
-            self._record_row(od32, None, None, adc, event, dropped=True, timestamp=timestamp)
-            return
-
-        if processed is None:
-            # Placeholder-only sample (typical at stream start). Record raw row,
-            # leave calc as sentinel zeros so files stay row-aligned.
-            self._record_row(od32, None, None, adc, event, dropped=False, timestamp=timestamp)
-            return
-
-        processed["timestamp"] = timestamp
-        self.processed_data_ready.emit(processed)
-
-        # Recorded values are the RAW post-MBLL Hb (unfiltered). The filter is
-        # a display/alert artifact; analysts can apply their own filter offline
-        # over the recorded raw values.
-        self._record_row(
-            od32,
-            processed.get("O2Hb_raw"),
-            processed.get("HHb_raw"),
-            adc,
-            event,
-            dropped=False,
-            timestamp=timestamp,
-        )
-
-        current_state = processed.get("alert_state", CognitiveState.NOMINAL)
-        if current_state != self.last_alert_state:
-            prev_state = self.last_alert_state
-            self.last_alert_state = current_state
-            self.alert_state_changed.emit(current_state)
-            if current_state == CognitiveState.LOAD:
-                self.sound_player.play("alert")
-            elif (
-                prev_state == CognitiveState.LOAD
-                and current_state == CognitiveState.NOMINAL
-            ):
-                now_ms = self._now_ms()
-                if now_ms - self._last_nominal_play_ms >= self._sound_nominal_suppress_ms:
-                    self.sound_player.play("nominal")
-                    self._last_nominal_play_ms = now_ms
-            # Other transitions (NOMINAL <-> WARMING_UP / CALIBRATING) stay silent.
-
-    def _record_row(self, od32, o2hb, hhb, adc, event, dropped, timestamp=None):
-        if not self.recorder.is_recording or self.recorder.is_paused:
-            return
-        self.recorder.write(
-            od32, o2hb, hhb, adc=adc, event=event, dropped=dropped, timestamp=timestamp,
-        )
+    # ---------- Alerts ----------
+
+    def _on_alert_state_changed(self, current_state) -> None:
+        # Worker reports transitions only; sounds must play on the GUI thread.
+        prev_state = self.last_alert_state
+        self.last_alert_state = current_state
+        self.alert_state_changed.emit(current_state)
+        if current_state == CognitiveState.LOAD:
+            self.sound_player.play("alert")
+        elif (
+            prev_state == CognitiveState.LOAD
+            and current_state == CognitiveState.NOMINAL
+        ):
+            now_ms = self._now_ms()
+            if now_ms - self._last_nominal_play_ms >= self._sound_nominal_suppress_ms:
+                self.sound_player.play("nominal")
+                self._last_nominal_play_ms = now_ms
+        # Other transitions (NOMINAL <-> WARMING_UP / CALIBRATING) stay silent.
+
+    # ---------- Latency ----------
+
+    def record_repaint_latency(self, sample_time) -> None:
+        # GUI calls this after a repaint that drew new data; sample_time is
+        # the newest drawn sample's local_clock() time (display_snapshot's
+        # "sample_time"), None when unknown.
+        if sample_time is not None:
+            self.latency.record("repaint", local_clock() - sample_time)
+
+    def get_latency_summary(self) -> dict:
+        # Per-stage p50/p95/p99/max in ms, see LatencyTracker.summary().
+        return self.latency.summary()
+
+    # ---------- Profiling ----------
+
+    def record_repaint_time(self, seconds: float) -> None:
+        # One record per frame that drew something, so its per-sample cost
+        # is per frame.
+        self.profiler.record("repaint", seconds)
+
+    def get_profile_summary(self) -> dict:
+        # Rolling mean/max per stage, see StageProfiler.summary().
+        return self.profiler.summary()
+
+    def dump_profile(self, path: str = None) -> str:
+        # Profile as JSON, also written to path when given.
+        return self.profiler.to_json(path)
+
+    def _apply_latency_log_interval(self) -> None:
+        interval_ms = int(float(config.LATENCY_LOG_INTERVAL_S) * 1000)
+        if interval_ms > 0:
+            self._latency_log_timer.start(interval_ms)
+        else:
+            self._latency_log_timer.stop()
 
     # ---------- Recording control ----------
 
     def close(self):
         logger.info("Closing...")
+        self._latency_log_timer.stop()
+        self.latency.log_summary()
+        logger.info("Stage profile: %s", self.profiler.to_json())
         # If the user closes the window mid-recording, treat that as a manual stop.
         self._user_initiated_disconnect = True
         self._pause_timer.stop()
@@ -339,6 +343,10 @@ class AppController(QObject):
         if not self.lsl_thread.wait(3000):
             logger.warning("LSL thread did not shut down gracefully; terminating.")
             self.lsl_thread.terminate()
+        self.processing_thread.quit()
+        if not self.processing_thread.wait(3000):
+            logger.warning("Processing thread did not shut down gracefully; terminating.")
+            self.processing_thread.terminate()
 
     def set_auto_record_on_connect(self, enabled: bool, session_name: str = None):
         self.auto_record_on_connect = bool(enabled)
@@ -359,13 +367,15 @@ class AppController(QObject):
             "EXTINCTION_COEFFICIENTS": getattr(config, "EXTINCTION_COEFFICIENTS", None),
             "CHANNEL_NAMES": getattr(config, "CHANNEL_NAMES", None),
         }
-        self.recorder.start(session_name, stream_info, rate, cfg_snapshot)
+        with self.worker.lock:
+            self.recorder.start(session_name, stream_info, rate, cfg_snapshot)
         if self.recorder.is_recording:
             self.recording_state_changed.emit("started")
 
     def stop_recording(self):
-        was_recording = self.recorder.is_recording
-        self.recorder.stop()
+        with self.worker.lock:
+            was_recording = self.recorder.is_recording
+            self.recorder.stop()
         if was_recording:
             self.recording_state_changed.emit("stopped")
 
@@ -390,13 +400,15 @@ class AppController(QObject):
         return format_name(prefix, next_idx)
 
     def save_recording_notes(self, notes_text: str):
-        self.recorder.write_notes(notes_text)
+        with self.worker.lock:
+            self.recorder.write_notes(notes_text)
 
     def recompute_baseline_from_window(self) -> bool:
         # Proxied by the future "Set Baseline" UI action (Phase 6). Tells the
         # DataProcessor to re-zero its baseline to the mean of the most-recent
         # window of OD samples.
-        return self.data_processor.recompute_baseline_from_window()
+        with self.worker.lock:
+            return self.data_processor.recompute_baseline_from_window()
 
     # ---------- Load detector ----------
 
@@ -405,19 +417,21 @@ class AppController(QObject):
         # are not currently streaming (no data to calibrate against).
         if not self.is_connected:
             return False
-        self.data_processor.load_detector.start_calibration()
+        with self.worker.lock:
+            self.data_processor.load_detector.start_calibration()
         return True
 
     def get_load_detector_status(self) -> dict:
         # Lightweight snapshot for the UI to poll: progress, calibrated flag,
         # baseline summary (None until the first calibration completes).
         det = self.data_processor.load_detector
-        return {
-            "is_calibrating": det.is_calibrating,
-            "is_calibrated": det.is_calibrated,
-            "progress": det.calibration_progress,
-            "baseline_summary": det.baseline_summary,
-        }
+        with self.worker.lock:
+            return {
+                "is_calibrating": det.is_calibrating,
+                "is_calibrated": det.is_calibrated,
+                "progress": det.calibration_progress,
+                "baseline_summary": det.baseline_summary,
+            }
 
     # ---------- Settings ----------
 
@@ -433,24 +447,27 @@ class AppController(QObject):
         self._sound_nominal_suppress_ms = int(
             float(config.SOUND_NOMINAL_SUPPRESS_S) * 1000
         )
-
-        # Filter coefficients (Phase 3) and load detector tuning (Phase 4)
-        # take effect on the next sample.
-        self.data_processor.rebuild_filter()
-        det = self.data_processor.load_detector
-        det.rest_window_s = float(config.LOAD_DETECTOR_REST_WINDOW_S)
-        det.active_window_s = float(config.LOAD_DETECTOR_ACTIVE_WINDOW_S)
-        det.k_sd = float(config.LOAD_DETECTOR_K_SD)
-        det.min_elevated_channels = int(config.LOAD_DETECTOR_MIN_ELEVATED_CHANNELS)
-        det.hhb_tol_um = float(config.LOAD_DETECTOR_HHB_TOL_UM)
-        # active_window_s change requires a resize of the rolling window.
-        det.set_sample_rate(det.sample_rate)
-
-        # MBLL coefficient changes need a fresh inverse-extinction matrix.
-        self.data_processor._init_mbll_constants()
-
-        # Recordings root: only updates the recorder for future recordings.
-        self.recorder.recordings_root = _resolve_recordings_root()
+        self._apply_latency_log_interval()
+        self.profiler.enabled = bool(config.PROFILING_ENABLED)
+
+        with self.worker.lock:
+            # Filter coefficients (Phase 3) and load detector tuning (Phase 4)
+            # take effect on the next sample.
+            self.data_processor.rebuild_filter()
+            det = self.data_processor.load_detector
+            det.rest_window_s = float(config.LOAD_DETECTOR_REST_WINDOW_S)
+            det.active_window_s = float(config.LOAD_DETECTOR_ACTIVE_WINDOW_S)
+            det.k_sd = float(config.LOAD_DETECTOR_K_SD)
+            det.min_elevated_channels = int(config.LOAD_DETECTOR_MIN_ELEVATED_CHANNELS)
+            det.hhb_tol_um = float(config.LOAD_DETECTOR_HHB_TOL_UM)
+            # active_window_s change requires a resize of the rolling window.
+            det.set_sample_rate(det.sample_rate)
+
+            # MBLL coefficient changes need a fresh inverse-extinction matrix.
+            self.data_processor._init_mbll_constants()
+
+            # Recordings root: only updates the recorder for future recordings.
+            self.recorder.recordings_root = _resolve_recordings_root()
 
     # ---------- Helpers ----------
 
@@ -0,0 +1,340 @@
+import datetime
+import json
+import math
+import platform
+import tempfile
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+import config
+from logic.data_processor import SAMPLE_OK, DataProcessor
+from logic.load_detector import ThresholdAsymmetryDetector
+from logic.signal_filter import BandpassFilter
+from logic.signal_quality import SignalQualityEvaluator
+from logic.synthetic import ACTIVE_OD_INDICES, synthetic_od
+from utils.session_recorder import SessionRecorder
+from utils.snirf_writer import write_snirf
+
+
+# Throughput and latency benchmarks for the per-sample hot paths, fed with
+# the deterministic synthetic OctaMon stream (logic/synthetic.py) at several
+# stream rates. Each case replays `seconds` of stream in the chunk sizes the
+# blocking acquisition loop would deliver at that rate, timing every call.
+# The report is plain JSON so runs can be compared against a saved baseline;
+# scripts/benchmark.py is the command-line front end.
+
+REPORT_VERSION = 1
+
+RATES_HZ = (10, 50, 250, 1000)
+
+# Case name -> runner(rate_hz, seconds, seed) -> partial result dict.
+CASES = {}
+
+# Plot frames per second for the repaint case (PlotWidget repaints at ~60 Hz).
+PLOT_FPS = 60
+
+
+def _case(name: str):
+    def deco(func):
+        CASES[name] = func
+        return func
+    return deco
+
+
+def chunk_size(rate_hz: float) -> int:
+    # Samples per LSL pull at this rate: whatever arrives within one pull
+    # timeout, capped at the pull size.
+    return int(min(config.LSL_PULL_MAX_SAMPLES, max(1, round(rate_hz * config.LSL_PULL_TIMEOUT_S))))
+
+
+def _stream(rate_hz: float, seconds: float, seed: int) -> np.ndarray:
+    # A couple of seconds of placeholder warm-up and sparse NaN rows, as a
+    # real OxySoft stream has.
+    n = max(1, int(round(rate_hz * seconds)))
+    return synthetic_od(n, rate_hz, seed=seed, warmup_samples=int(rate_hz), nan_rate=0.002)
+
+
+def _chunks(n: int, size: int):
+    return [slice(start, min(start + size, n)) for start in range(0, n, size)]
+
+
+def _timed(func: Callable, args_list: list) -> np.ndarray:
+    # Per-call wall time (s) of func(*args) over args_list.
+    times = np.empty(len(args_list))
+    perf_counter = time.perf_counter
+    for i, args in enumerate(args_list):
+        t0 = perf_counter()
+        func(*args)
+        times[i] = perf_counter() - t0
+    return times
+
+
+def _result(call_s: np.ndarray, samples: int, extra_s: float = 0.0) -> dict:
+    # Throughput over all calls (plus extra_s of untimed-per-call work such as
+    # a final flush) and per-call latency percentiles in microseconds.
+    total_s = float(call_s.sum()) + extra_s
+    return {
+        "samples": int(samples),
+        "calls": int(call_s.size),
+        "total_s": total_s,
+        "samples_per_s": samples / total_s if total_s > 0 else math.inf,
+        "mean_us_per_sample": total_s / samples * 1e6,
+        "p50_us_per_call": float(np.percentile(call_s, 50)) * 1e6,
+        "p99_us_per_call": float(np.percentile(call_s, 99)) * 1e6,
+        "max_us_per_call": float(call_s.max()) * 1e6,
+    }
+
+
+def _processor(rate_hz: float, seconds: float) -> DataProcessor:
+    # Calibrates over the first quarter of the run so the detector spends
+    # most of it monitoring.
+    dp = DataProcessor()
+    dp.set_sample_rate(rate_hz)
+    dp.load_detector.rest_window_s = max(1.0, seconds / 4)
+    dp.load_detector.start_calibration()
+    return dp
+
+
+def _hb(rate_hz: float, seconds: float, seed: int) -> dict:
+    # Pipeline output for the stream, as input to the downstream cases.
+    samples = _stream(rate_hz, seconds, seed)
+    out = _processor(rate_hz, seconds).process_chunk_od(samples)
+    out["samples"] = samples
+    return out
+
+
+@_case("data_processor")
+def _bench_data_processor(rate_hz, seconds, seed):
+    samples = _stream(rate_hz, seconds, seed)
+    dp = _processor(rate_hz, seconds)
+    parts = _chunks(samples.shape[0], chunk_size(rate_hz))
+    call_s = _timed(dp.process_chunk_od, [(samples[s],) for s in parts])
+    return _result(call_s, samples.shape[0])
+
+
+@_case("bandpass_filter")
+def _bench_bandpass_filter(rate_hz, seconds, seed):
+    out = _hb(rate_hz, seconds, seed)
+    ok = out["status"] == SAMPLE_OK
+    combined = np.hstack((out["O2Hb_raw"][ok], out["HHb_raw"][ok]))
+    filt = BandpassFilter(
+        num_channels=combined.shape[1],
+        sample_rate=rate_hz,
+        low_hz=float(config.FILTER_HIGHPASS_HZ),
+        high_hz=float(config.FILTER_LOWPASS_HZ),
+        order=int(config.FILTER_ORDER),
+    )
+    parts = _chunks(combined.shape[0], chunk_size(rate_hz))
+    call_s = _timed(filt.process_block, [(combined[s],) for s in parts])
+    return _result(call_s, combined.shape[0])
+
+
+@_case("signal_quality")
+def _bench_signal_quality(rate_hz, seconds, seed):
+    # Per sample, as DataProcessor drives it.
+    samples = _stream(rate_hz, seconds, seed)
+    finite = np.isfinite(samples[:, :32]).all(axis=1)
+    # 850 nm is the first of each active source pair (L1, L3, ...).
+    od_850 = samples[finite][:, list(ACTIVE_OD_INDICES[::2])]
+    evaluator = SignalQualityEvaluator(
+        num_channels=8,
+        sample_rate=rate_hz,
+        window_s=float(config.QUALITY_WINDOW_S),
+        hr_recompute_s=float(config.QUALITY_HR_RECOMPUTE_S),
+        std_threshold=float(config.QUALITY_STD_LOWER),
+        cv_threshold=float(config.QUALITY_CV_UPPER),
+        hr_snr_threshold=float(config.QUALITY_HR_SNR_THRESHOLD),
+    )
+    call_s = _timed(evaluator.update_codes, [(row,) for row in od_850])
+    return _result(call_s, od_850.shape[0])
+
+
+@_case("load_detector")
+def _bench_load_detector(rate_hz, seconds, seed):
+    # Per sample: calibration for the first quarter, then monitoring.
+    out = _hb(rate_hz, seconds, seed)
+    ok = np.flatnonzero(out["status"] == SAMPLE_OK)
+    detector = ThresholdAsymmetryDetector(
+        sample_rate=rate_hz,
+        rest_window_s=max(1.0, seconds / 4),
+        active_window_s=float(config.LOAD_DETECTOR_ACTIVE_WINDOW_S),
+        k_sd=float(config.LOAD_DETECTOR_K_SD),
+        min_elevated_channels=int(config.LOAD_DETECTOR_MIN_ELEVATED_CHANNELS),
+        hhb_tol_um=float(config.LOAD_DETECTOR_HHB_TOL_UM),
+    )
+    detector.start_calibration()
+    args = [(out["O2Hb"][i], out["HHb"][i], out["quality"][i]) for i in ok]
+    call_s = _timed(detector.update, args)
+    return _result(call_s, ok.size)
+
+
+@_case("recorder")
+def _bench_recorder(rate_hz, seconds, seed):
+    # SessionRecorder.write_chunk per chunk on the processing side; stop()
+    # waits for the RecordingWriter thread to drain, so it is added to the
+    # throughput (not the per-call latency).
+    out = _hb(rate_hz, seconds, seed)
+    samples = out["samples"]
+    ok = out["status"] == SAMPLE_OK
+    dropped = ~np.isfinite(samples[:, :32]).all(axis=1)
+    timestamps = np.arange(samples.shape[0]) / rate_hz
+    args = [
+        (
+            samples[s, :32], out["O2Hb_raw"][s], out["HHb_raw"][s],
+            {
+                "adc": samples[s, 32].astype(np.int64),
+                "event": samples[s, 33].astype(np.int64),
+                "dropped": dropped[s],
+                "has_hb": ok[s],
+                "timestamps": timestamps[s],
+            },
+        )
+        for s in _chunks(samples.shape[0], chunk_size(rate_hz))
+    ]
+    with tempfile.TemporaryDirectory(prefix="fnirs_bench_") as root:
+        rec = SessionRecorder(recordings_root=root)
+        rec.start("Bench_01", {"name": "bench", "type": "NIRS", "source_id": "bench"}, rate_hz, {})
+
+        def write(od, o2hb, hhb, columns):
+            rec.write_chunk(od, o2hb, hhb, **columns)
+
+        call_s = _timed(write, args)
+        t0 = time.perf_counter()
+        rec.stop()
+        stop_s = time.perf_counter() - t0
+        lost = rec.dropped_count
+    result = _result(call_s, samples.shape[0], stop_s)
+    result["stop_ms"] = stop_s * 1000.0
+    result["dropped"] = int(lost)
+    return result
+
+
+@_case("write_snirf")
+def _bench_write_snirf(rate_hz, seconds, seed):
+    # One-shot SNIRF export of the whole run's real rows.
+    out = _hb(rate_hz, seconds, seed)
+    ok = out["status"] == SAMPLE_OK
+    timestamps = np.flatnonzero(ok) / rate_hz
+    metadata = {"sample_rate_hz": rate_hz, "dpf": config.DPF,
+                "interoptode_distance_cm": config.INTEROPTODE_DISTANCE}
+    with tempfile.TemporaryDirectory(prefix="fnirs_bench_") as root:
+        path = f"{root}/bench.snirf"
+        call_s = _timed(write_snirf, [(path, out["O2Hb_raw"][ok], out["HHb_raw"][ok],
+                                       timestamps, rate_hz, metadata)])
+    return _result(call_s, int(ok.sum()))
+
+
+@_case("plot_repaint")
+def _bench_plot_repaint(rate_hz, seconds, seed):
+    # One call per PLOT_FPS frame: push the samples that arrived since the
+    # previous frame, then repaint_curves. Needs a QApplication (created
+    # here if missing; run headless with QT_QPA_PLATFORM=offscreen).
+    from PySide6.QtWidgets import QApplication
+    from views.widgets.plot_widget import PlotWidget
+
+    app = QApplication.instance() or QApplication([])
+    out = _hb(rate_hz, seconds, seed)
+    shown = np.flatnonzero(out["status"] == SAMPLE_OK)
+    o2hb, hhb = out["O2Hb"][shown], out["HHb"][shown]
+
+    widget = PlotWidget()
+    widget.resize(1200, 700)
+    widget.show()
+    app.processEvents()
+    widget.set_time_window(10, int(rate_hz))
+
+    def frame(part):
+        widget.push_block(o2hb[part], hhb[part])
+        widget.repaint_curves()
+
+    per_frame = max(1, int(round(rate_hz / PLOT_FPS)))
+    call_s = _timed(frame, [(s,) for s in _chunks(shown.size, per_frame)])
+    widget.close()
+    return _result(call_s, shown.size)
+
+
+def run_benchmarks(
+    cases: Optional[list] = None,
+    rates_hz=RATES_HZ,
+    seconds: float = 60.0,
+    seed: int = 0,
+    progress: Optional[Callable[[str], None]] = None,
+) -> dict:
+    # Runs every (case, rate) pair and returns the report dict. A case that
+    # raises is reported with its error instead of numbers.
+    results = []
+    for name in cases or list(CASES):
+        runner = CASES[name]
+        for rate in rates_hz:
+            entry = {"case": name, "rate_hz": float(rate), "chunk": chunk_size(rate)}
+            try:
+                entry.update(runner(float(rate), float(seconds), seed))
+                entry["realtime_factor"] = entry["samples_per_s"] / float(rate)
+            except Exception as ex:
+                entry["error"] = f"{type(ex).__name__}: {ex}"
+            results.append(entry)
+            if progress is not None:
+                progress(format_result(entry))
+    return {
+        "version": REPORT_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "seconds": float(seconds),
+        "seed": int(seed),
+        "results": results,
+    }
+
+
+def format_result(entry: dict) -> str:
+    head = f"{entry['case']:<16} {entry['rate_hz']:>6.0f} Hz"
+    if "error" in entry:
+        return f"{head}  ERROR {entry['error']}"
+    return (
+        f"{head}  {entry['samples_per_s']:>12,.0f} samples/s  "
+        f"{entry['mean_us_per_sample']:>9.1f} us/sample  "
+        f"p99 {entry['p99_us_per_call']:>9.1f} us/call  x{entry['realtime_factor']:,.0f} realtime"
+    )
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    # Regressions of report against baseline: every (case, rate) whose
+    # samples_per_s fell by more than `tolerance` (a fraction), or that
+    # errored where the baseline did not. Pairs missing from either side are
+    # ignored.
+    reference = {
+        (r["case"], r["rate_hz"]): r for r in baseline.get("results", ()) if "error" not in r
+    }
+    regressions = []
+    for entry in report.get("results", ()):
+        ref = reference.get((entry["case"], entry["rate_hz"]))
+        if ref is None:
+            continue
+        current = entry.get("samples_per_s")
+        change = None if current is None else current / ref["samples_per_s"] - 1.0
+        if change is None or change < -tolerance:
+            regressions.append({
+                "case": entry["case"],
+                "rate_hz": entry["rate_hz"],
+                "baseline_samples_per_s": ref["samples_per_s"],
+                "samples_per_s": current,
+                "change": change,
+                "error": entry.get("error"),
+            })
+    return regressions
+
+
+def save_report(report: dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -1,4 +1,5 @@
 import logging
+import time
 from collections import deque
 from typing import Optional
 
@@ -7,7 +8,8 @@ import numpy as np
 import config
 from logic.signal_filter import BandpassFilter
 from logic.load_detector import LoadDetector, ThresholdAsymmetryDetector
-from logic.signal_quality import SignalQualityEvaluator
+from logic.profiling import StageProfiler
+from logic.signal_quality import QUALITY_RED, SignalQualityEvaluator, quality_names
 from utils.enums import CognitiveState
 
 
@@ -19,6 +21,12 @@ logger = logging.getLogger(__name__)
 _N_PHYSICAL = 8
 _N_FILTERED = _N_PHYSICAL * 2
 
+# Per-sample status codes returned by process_chunk_od in its "status" array.
+SAMPLE_OK = 0           # MBLL + filter + quality + detector all ran
+SAMPLE_PLACEHOLDER = 1  # OxySoft placeholder-only sample; nothing processed
+SAMPLE_WARMING_UP = 2   # window baseline still accumulating
+SAMPLE_INVALID = 3      # non-finite OD; skipped without touching any state
+
 
 class DataProcessor:
     # Owns MBLL math, baseline state, signal conditioning, and the alert
@@ -88,6 +96,11 @@ class DataProcessor:
             hr_snr_threshold=float(getattr(config, "QUALITY_HR_SNR_THRESHOLD", 3.0)),
         )
 
+        # Per-stage timings of process_chunk_od (mapping, baseline, mbll,
+        # filter, quality, detector). The processing worker shares it for
+        # its own stages.
+        self.profiler = StageProfiler(enabled=getattr(config, "PROFILING_ENABLED", True))
+
     # ---------- Lifecycle ----------
 
     def reset(self):
@@ -183,20 +196,26 @@ class DataProcessor:
             (rx2(15), rx2(16)),
         ]
 
+        # Flat gather index for whole-array mapping: [Ch0_850, Ch0_760, ...].
+        self._map_idx = np.array(
+            [i for pair in self.od_indices for i in pair], dtype=np.intp
+        )
+
     def _map_od_to_8ch(self, od_vec):
+        # Works on a single (32,) vector or an (N, 32) block.
         if self.od_indices is None:
             self._init_od_indices()
-        out = np.empty(16, dtype=float)
-        j = 0
-        for i850, i760 in self.od_indices:
-            out[j] = od_vec[i850]
-            out[j + 1] = od_vec[i760]
-            j += 2
-        return out
+        return np.asarray(od_vec, dtype=float)[..., self._map_idx]
 
     # ---------- MBLL ----------
 
     def _init_mbll_constants(self):
+        # Folds wavelength order, inv(extinction), 1/(DPF*L) and the
+        # mM -> uM scale into one (16, 16) projection, so MBLL for a sample
+        # or a whole chunk is a single product against (OD - baseline) in
+        # the mapped layout. Rows are [O2Hb ch0..ch7, HHb ch0..ch7]; columns
+        # are [Ch0_850, Ch0_760, Ch1_850, ...]. Call again whenever DPF,
+        # distance or the extinction coefficients change.
         e_wl1 = config.EXTINCTION_COEFFICIENTS["760nm"]
         e_wl2 = config.EXTINCTION_COEFFICIENTS["850nm"]
         ext = np.array(
@@ -207,20 +226,31 @@ class DataProcessor:
             dtype=float,
         )
         self.inverse_extinction_matrix = np.linalg.inv(ext)
+        inv = self.inverse_extinction_matrix           # cols [760, 850]
+        scale = 1000.0 / (config.DPF * config.INTEROPTODE_DISTANCE)  # mM -> uM
+
+        projection = np.zeros((_N_FILTERED, _N_FILTERED), dtype=float)
+        for ch in range(_N_PHYSICAL):
+            for species in (0, 1):                     # 0 = O2Hb, 1 = HHb
+                row = species * _N_PHYSICAL + ch
+                projection[row, 2 * ch + 1] = inv[species, 0] * scale
+                projection[row, 2 * ch] = inv[species, 1] * scale
+        self._mbll_projection = projection
 
     def calculate_hemoglobin(self, delta_od):
         # Converts deltaOD (per channel, 2 wavelengths) into deltaHb (uM).
-        # Mapping convention: delta_od is laid out as [Ch0_850, Ch0_760, Ch1_850, ...].
+        # Mapping convention: delta_od is laid out as [Ch0_850, Ch0_760, Ch1_850, ...],
+        # a single (16,) vector or an (N, 16) block.
         # OD is unitless (log10 of intensity ratio). MBLL: deltaC = inv(eps) * deltaOD / (DPF * L).
-        delta_od = np.asarray(delta_od, dtype=float)
-        n = delta_od.size // 2
-        reshaped = delta_od.reshape(n, 2)              # cols [850, 760]
-        od_760_850 = reshaped[:, [1, 0]].T             # rows [760, 850]
-        delta_c = (self.inverse_extinction_matrix @ od_760_850) / (
-            config.DPF * config.INTEROPTODE_DISTANCE
-        )
-        delta_c = delta_c * 1000.0  # mM -> uM
-        return {"O2Hb": delta_c[0, :], "HHb": delta_c[1, :]}
+        hb = self._mbll(np.asarray(delta_od, dtype=float))
+        return {"O2Hb": hb[..., :_N_PHYSICAL], "HHb": hb[..., _N_PHYSICAL:]}
+
+    def _mbll(self, delta_od: np.ndarray) -> np.ndarray:
+        # [O2Hb x8 | HHb x8] for mapped deltaOD; the one MBLL code path.
+        # einsum rather than BLAS matmul: it computes every output row the
+        # same way regardless of N, so a chunk gives exactly the same bits as
+        # the same rows processed one at a time.
+        return np.einsum("...j,ij->...i", delta_od, self._mbll_projection)
 
     # ---------- Filter ----------
 
@@ -271,100 +301,181 @@ class DataProcessor:
     def process_sample_od(self, lsl_sample, alert_rules):
         # Returns a dict with both filtered (O2Hb/HHb, used by UI + alerts)
         # and raw post-MBLL values (O2Hb_raw/HHb_raw, recorded to disk).
-        # Returns None if the sample is purely OxySoft's placeholder code.
-        vec = np.asarray(lsl_sample, dtype=float)
-
-        adc_value = None
-        if vec.size == 32:
-            od_vec = vec
-        elif vec.size == 33:
-            od_vec = vec[:32]
-            adc_value = vec[32]
-        elif vec.size >= 34:
-            od_vec = vec[:32]
-            adc_value = vec[32]
-        else:
-            raise ValueError(f"Expected at least 32 OD values. Got {vec.size}")
-
-        # Placeholder-only sample (typical at stream start; OxySoft emits
-        # 4.81625 = log10(2^16-1) on every channel before real data flows).
-        if np.allclose(od_vec, config.PLACEHOLDER_HI, atol=config.PLACEHOLDER_EPS):
+        # Returns None if the sample is purely OxySoft's placeholder code (or
+        # carries non-finite OD). alert_rules (threshold/duration) is from the
+        # legacy UI spinboxes; the load detector ignores it.
+        # Thin wrapper over process_chunk_od so the two paths cannot drift.
+        vec = np.asarray(lsl_sample, dtype=float).reshape(1, -1)
+        out = self.process_chunk_od(vec)
+
+        status = out["status"][0]
+        if status in (SAMPLE_PLACEHOLDER, SAMPLE_INVALID):
             return None
+        if status == SAMPLE_WARMING_UP:
+            return self._warming_up_result()
+
+        return {
+            "O2Hb": out["O2Hb"][0].tolist(),
+            "HHb": out["HHb"][0].tolist(),
+            "O2Hb_raw": out["O2Hb_raw"][0].tolist(),
+            "HHb_raw": out["HHb_raw"][0].tolist(),
+            "quality": quality_names(out["quality"][0]),
+            "alert_state": out["alert_state"][0],
+        }
+
+    def process_chunk_od(self, samples, timestamps=None) -> dict:
+        # Processes a whole LSL chunk at once. samples: (N, 32..34), oldest
+        # first; timestamps: optional (N,), echoed back. Channel mapping,
+        # baseline subtraction, MBLL and filtering run as whole-array
+        # operations; quality and the load detector are inherently sequential
+        # and still advance one row at a time. Output is bit-identical to
+        # feeding the same rows through process_sample_od one by one.
+        #
+        # Returns columnar results, one row per input sample:
+        #   status       (N,) uint8, SAMPLE_* code
+        #   O2Hb, HHb    (N, 8) filtered; zeros where status != SAMPLE_OK
+        #   O2Hb_raw,
+        #   HHb_raw      (N, 8) unfiltered post-MBLL; NaN where status != SAMPLE_OK
+        #   quality      (N, 8) uint8 QUALITY_* codes; red where status != SAMPLE_OK
+        #   alert_state  (N,) object, CognitiveState or None
+        #   timestamps   (N,) float, or None if none were passed
+        samples = np.asarray(samples, dtype=float)
+        if samples.ndim != 2 or samples.shape[1] < 32:
+            width = samples.shape[-1] if samples.ndim else samples.size
+            raise ValueError(f"Expected at least 32 OD values. Got {width}")
+
+        n = samples.shape[0]
+        od = samples[:, :32]
+
+        status = np.full(n, SAMPLE_OK, dtype=np.uint8)
+        o2hb_filt = np.zeros((n, _N_PHYSICAL), dtype=float)
+        hhb_filt = np.zeros((n, _N_PHYSICAL), dtype=float)
+        o2hb_raw = np.full((n, _N_PHYSICAL), np.nan, dtype=float)
+        hhb_raw = np.full((n, _N_PHYSICAL), np.nan, dtype=float)
+        quality = np.full((n, _N_PHYSICAL), QUALITY_RED, dtype=np.uint8)
+        alert_state = np.full(n, None, dtype=object)
+        out = {
+            "status": status,
+            "O2Hb": o2hb_filt,
+            "HHb": hhb_filt,
+            "O2Hb_raw": o2hb_raw,
+            "HHb_raw": hhb_raw,
+            "quality": quality,
+            "alert_state": alert_state,
+            "timestamps": None if timestamps is None else np.asarray(timestamps, dtype=float),
+        }
+        if n == 0:
+            return out
+
+        profiler = self.profiler
+        t0 = time.perf_counter()
+
+        # Non-finite OD would propagate through MBLL and poison the filter
+        # state; such rows are skipped outright.
+        finite = np.isfinite(od).all(axis=1)
+        status[~finite] = SAMPLE_INVALID
+
+        # Placeholder-only samples (typical at stream start; OxySoft emits
+        # 4.81625 = log10(2^16-1) on every channel before real data flows).
+        placeholder = np.isclose(
+            od, config.PLACEHOLDER_HI, atol=config.PLACEHOLDER_EPS
+        ).all(axis=1)
+        status[finite & placeholder] = SAMPLE_PLACEHOLDER
+
+        valid_rows = np.flatnonzero(status == SAMPLE_OK)
+        if valid_rows.size == 0:
+            profiler.record("mapping", time.perf_counter() - t0, n)
+            return out
 
-        mapped_od = self._map_od_to_8ch(od_vec)
-        self._ensure_buffers(mapped_od.size)
+        mapped = self._map_od_to_8ch(od[valid_rows])       # (M, 16)
+        self._ensure_buffers(mapped.shape[1])
+        t1 = time.perf_counter()
+        profiler.record("mapping", t1 - t0, n)
 
         # Roll the OD history for the manual "Set Baseline" action.
-        self._od_history.append(mapped_od.copy())
+        self._od_history.extend(mapped)
 
-        # Baseline establishment.
+        # Baseline establishment. Rows that arrive before the baseline exists
+        # either become it (single_sample) or feed the window accumulator.
+        first = 0
         if self.baseline_od is None:
             if self.baseline_mode == "window":
-                warmup_state = self._accumulate_window_baseline(mapped_od)
-                if warmup_state is not None:
-                    return warmup_state
-                # Baseline just established this sample; fall through and emit
-                # a real (delta=0) row so plots start moving immediately.
+                while first < mapped.shape[0] and self.baseline_od is None:
+                    self._accumulate_window_baseline(mapped[first])
+                    if self.baseline_od is None:
+                        status[valid_rows[first]] = SAMPLE_WARMING_UP
+                        alert_state[valid_rows[first]] = CognitiveState.WARMING_UP
+                        first += 1
+                # The row that completes the window falls through and emits a
+                # real (delta=0) row so plots start moving immediately.
             else:
                 # single_sample mode: first valid sample is the baseline.
-                self.baseline_od = mapped_od.copy()
-
-        delta_od = mapped_od - self.baseline_od
-
-        # MBLL.
-        raw_hb = self.calculate_hemoglobin(delta_od)
-        o2hb_raw = np.asarray(raw_hb["O2Hb"], dtype=float)
-        hhb_raw = np.asarray(raw_hb["HHb"], dtype=float)
-
-        # Filter (single pass over 16 stacked channels: 8 O2 + 8 HHb).
+                self.baseline_od = mapped[0].copy()
+
+        rows = valid_rows[first:]
+        t0 = time.perf_counter()
+        profiler.record("baseline", t0 - t1, valid_rows.size)
+        if rows.size == 0:
+            return out
+        mapped = mapped[first:]
+
+        # MBLL: one projection of (OD - baseline) straight to
+        # [O2Hb x8 | HHb x8], which is also the filter's channel layout.
+        combined = self._mbll(mapped - self.baseline_od)
+        o2hb_raw[rows] = combined[:, :_N_PHYSICAL]
+        hhb_raw[rows] = combined[:, _N_PHYSICAL:]
+        t1 = time.perf_counter()
+        profiler.record("mbll", t1 - t0, rows.size)
+
+        # Filter (one pass over 16 stacked channels: 8 O2 + 8 HHb).
         if self.filter is not None:
-            combined = np.concatenate([o2hb_raw, hhb_raw])
-            combined_filt = self.filter.process(combined)
-            o2hb_filt = combined_filt[:8]
-            hhb_filt = combined_filt[8:]
-        else:
-            o2hb_filt = o2hb_raw
-            hhb_filt = hhb_raw
+            combined = self.filter.process_block(combined)
+        o2hb_filt[rows] = combined[:, :_N_PHYSICAL]
+        hhb_filt[rows] = combined[:, _N_PHYSICAL:]
+        t0 = time.perf_counter()
+        profiler.record("filter", t0 - t1, rows.size)
 
         # Per-channel signal quality from the 850 nm OD trace (even-indexed
-        # positions in the mapped vector). Phase 5 evaluator replaces the
-        # ADC-only fallback that used to live here.
-        od_850 = mapped_od[::2]
-        quality = self.signal_quality.update(od_850)
+        # positions in the mapped vector), then the cognitive-load detector
+        # on filtered values + current quality. Both carry per-sample state.
+        # The two interleave per row, so their times are summed per chunk.
+        od_850 = mapped[:, ::2]
+        quality_s = detector_s = 0.0
+        for k, row in enumerate(rows):
+            q = self.signal_quality.update_codes(od_850[k])
+            quality[row] = q
+            t1 = time.perf_counter()
+            alert_state[row] = self.load_detector.update(o2hb_filt[row], hhb_filt[row], q)
+            t2 = time.perf_counter()
+            quality_s += t1 - t0
+            detector_s += t2 - t1
+            t0 = t2
+        profiler.record("quality", quality_s, rows.size)
+        profiler.record("detector", detector_s, rows.size)
 
-        # The cognitive-load detector consumes filtered values and current
-        # quality. alert_rules (threshold/duration) is from the legacy UI
-        # spinboxes; the new detector ignores it. Phase 6 will replace those
-        # spinboxes with calibration + k_sd controls.
-        alert_state = self.load_detector.update(o2hb_filt, hhb_filt, quality)
+        return out
 
+    @staticmethod
+    def _warming_up_result() -> dict:
         return {
-            "O2Hb": o2hb_filt.tolist(),
-            "HHb": hhb_filt.tolist(),
-            "O2Hb_raw": o2hb_raw.tolist(),
-            "HHb_raw": hhb_raw.tolist(),
-            "quality": quality,
-            "alert_state": alert_state,
+            "O2Hb": [0.0] * 8,
+            "HHb": [0.0] * 8,
+            "O2Hb_raw": None,
+            "HHb_raw": None,
+            "quality": ["red"] * config.EXPECTED_PHYSICAL_CHANNELS,
+            "alert_state": CognitiveState.WARMING_UP,
         }
 
-    def _accumulate_window_baseline(self, mapped_od: np.ndarray):
+    def _accumulate_window_baseline(self, mapped_od: np.ndarray) -> None:
         # Called while in "window" mode and before baseline is established.
         # Buffers samples until we have enough, then sets the baseline as the
-        # mean. Returns a WARMING_UP processed dict while still accumulating,
-        # or None once the baseline has been established.
+        # mean and clears the buffer. Callers check baseline_od afterwards.
         if self._baseline_buffer is None:
             self._baseline_buffer = []
         self._baseline_buffer.append(mapped_od.copy())
 
         if len(self._baseline_buffer) < self.baseline_window_samples:
-            return {
-                "O2Hb": [0.0] * 8,
-                "HHb": [0.0] * 8,
-                "O2Hb_raw": None,
-                "HHb_raw": None,
-                "quality": ["red"] * config.EXPECTED_PHYSICAL_CHANNELS,
-                "alert_state": CognitiveState.WARMING_UP,
-            }
+            return
 
         # Buffer full: establish baseline and clear the buffer.
         stacked = np.stack(self._baseline_buffer, axis=0)
@@ -372,4 +483,3 @@ class DataProcessor:
         self._baseline_buffer = None
         if self.filter is not None:
             self.filter.reset()
-        return None
@@ -0,0 +1,197 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+import config
+from config.schema import validate
+from logic.data_processor import SAMPLE_OK
+from logic.load_detector import ThresholdAsymmetryDetector
+from logic.replay import ALERT_STATES, load_replay_input, replay
+from utils.enums import CognitiveState
+
+
+# Parameter sweep for the load detector over recorded sessions.
+#
+# Sessions are replayed through the pipeline once (prepare_sessions); the
+# detector's inputs -- filtered O2Hb / HHb and quality codes of the rows it
+# actually sees -- are concatenated and placed in shared memory, which every
+# worker process maps read-only. Each worker then evaluates whole detector
+# configurations (ThresholdAsymmetryDetector.evaluate_offline) against all
+# sessions, so the sweep scales with the number of processes and nothing
+# but a config dict and a metrics dict crosses a process boundary per task.
+
+# Swept settings and the ThresholdAsymmetryDetector argument each sets.
+SWEEP_KEYS = {
+    "LOAD_DETECTOR_REST_WINDOW_S": "rest_window_s",
+    "LOAD_DETECTOR_ACTIVE_WINDOW_S": "active_window_s",
+    "LOAD_DETECTOR_K_SD": "k_sd",
+    "LOAD_DETECTOR_MIN_ELEVATED_CHANNELS": "min_elevated_channels",
+    "LOAD_DETECTOR_HHB_TOL_UM": "hhb_tol_um",
+}
+
+_LOAD = ALERT_STATES.index(CognitiveState.LOAD)
+_CALIBRATING = ALERT_STATES.index(CognitiveState.CALIBRATING)
+_CODES = {state: i for i, state in enumerate(ALERT_STATES)}
+
+# Arrays shared with the workers: name -> (dtype, row width).
+_SHARED = {
+    "o2hb": (np.float64, 8),
+    "hhb": (np.float64, 8),
+    "quality": (np.uint8, 8),
+}
+
+
+def parameter_grid(values: dict) -> list:
+    # {"LOAD_DETECTOR_K_SD": [1.0, 2.0], ...} -> list of config dicts, one
+    # per combination, each checked by the settings validators.
+    unknown = set(values) - set(SWEEP_KEYS)
+    if unknown:
+        raise ValueError(f"not a sweepable setting: {', '.join(sorted(unknown))}")
+    keys = list(values)
+    return [validate(dict(zip(keys, combo))) for combo in itertools.product(*values.values())]
+
+
+def prepare_sessions(
+    paths: list,
+    calibrate_at_s: float = 0.0,
+    settings: Optional[dict] = None,
+) -> dict:
+    # Replays each recording (session folder or text export) once and keeps
+    # the rows the detector would be fed. Returns {"o2hb", "hhb",
+    # "quality"} concatenated over sessions, plus per-session "sessions":
+    # [{"path", "start", "stop", "sample_rate", "calibrate_row"}].
+    parts = {name: [] for name in _SHARED}
+    sessions = []
+    start = 0
+    for path in paths:
+        od, timestamps, rate = load_replay_input(path)
+        result = replay(od, rate, timestamps, calibrate_at_s=None, settings=settings)
+        ok = result["status"] == SAMPLE_OK
+        parts["o2hb"].append(result["o2hb"][ok])
+        parts["hhb"].append(result["hhb"][ok])
+        parts["quality"].append(result["quality"][ok])
+        n = int(np.count_nonzero(ok))
+        # The calibration starts at the first detector row at or after
+        # calibrate_at_s, as it would have in the live app.
+        calibrate_row = int(np.count_nonzero(ok[: int(round(calibrate_at_s * rate))]))
+        sessions.append({
+            "path": path, "start": start, "stop": start + n,
+            "sample_rate": rate, "calibrate_row": calibrate_row,
+        })
+        start += n
+    data = {name: np.concatenate(arrays) if arrays else np.zeros((0, 8), dtype=_SHARED[name][0])
+            for name, arrays in parts.items()}
+    data["sessions"] = sessions
+    return data
+
+
+def sweep(data: dict, grid: list, jobs: int = 1) -> list:
+    # Evaluates every config of grid (see parameter_grid) on the prepared
+    # sessions with `jobs` worker processes. Returns one dict per config, in
+    # grid order: the config plus the metrics of _metrics().
+    segments = {}
+    try:
+        for name, (dtype, width) in _SHARED.items():
+            array = np.ascontiguousarray(data[name], dtype=dtype)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, dtype=dtype, buffer=shm.buf)[...] = array
+            segments[name] = (shm, array.shape[0])
+        layout = {name: (shm.name, rows) for name, (shm, rows) in segments.items()}
+        if jobs <= 1:
+            _attach(layout, data["sessions"])
+            try:
+                return [_evaluate(cfg) for cfg in grid]
+            finally:
+                _detach()
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_attach,
+                                 initargs=(layout, data["sessions"])) as pool:
+            chunk = max(1, len(grid) // (jobs * 4))
+            return list(pool.map(_evaluate, grid, chunksize=chunk))
+    finally:
+        for shm, _ in segments.values():
+            shm.close()
+            shm.unlink()
+
+
+def run_detector(cfg: dict, o2hb, hhb, quality, sample_rate: float, calibrate_row: int) -> np.ndarray:
+    # Runs one session through a fresh detector built from cfg (config
+    # keys; missing ones come from config), with calibration starting at
+    # calibrate_row. Returns the (N,) alert codes (index into ALERT_STATES).
+    kwargs = {arg: cfg.get(key, getattr(config, key)) for key, arg in SWEEP_KEYS.items()}
+    detector = ThresholdAsymmetryDetector(sample_rate=sample_rate, **kwargs)
+    states = detector.evaluate_offline(o2hb, hhb, quality, calibrate_at=calibrate_row)
+    codes = np.empty(states.shape[0], dtype=np.uint8)
+    for state, code in _CODES.items():
+        codes[states == state] = code
+    return codes
+
+
+# ---------- Worker side ----------
+
+_worker = {}
+
+
+def _attach(layout: dict, sessions: list) -> None:
+    # Pool initializer: maps the shared arrays (read-only views).
+    for name, (shm_name, rows) in layout.items():
+        dtype, width = _SHARED[name]
+        shm = shared_memory.SharedMemory(name=shm_name)
+        view = np.ndarray((rows, width), dtype=dtype, buffer=shm.buf)
+        view.flags.writeable = False
+        _worker[name] = (shm, view)
+    _worker["sessions"] = sessions
+
+
+def _detach() -> None:
+    for name in _SHARED:
+        entry = _worker.pop(name, None)
+        if entry is not None:
+            shm, view = entry
+            del view
+            shm.close()
+    _worker.pop("sessions", None)
+
+
+def _evaluate(cfg: dict) -> dict:
+    states = []
+    rates = []
+    for s in _worker["sessions"]:
+        rows = slice(s["start"], s["stop"])
+        states.append(run_detector(
+            cfg, _worker["o2hb"][1][rows], _worker["hhb"][1][rows], _worker["quality"][1][rows],
+            s["sample_rate"], s["calibrate_row"],
+        ))
+        rates.append(s["sample_rate"])
+    return {**cfg, **_metrics(states, rates)}
+
+
+def _metrics(states: list, rates: list) -> dict:
+    # Over all sessions: monitoring time (after calibration), alerts per
+    # monitored minute, mean alert dwell time, fraction of monitoring time
+    # in LOAD, and the median time from the start of monitoring to a
+    # session's first alert (over sessions that alerted).
+    monitored_s = alert_s = 0.0
+    episodes = 0
+    first_alert = []
+    for codes, rate in zip(states, rates):
+        calibrating = np.flatnonzero(codes == _CALIBRATING)
+        if calibrating.size == 0:
+            continue  # never calibrated: the detector cannot alert
+        monitoring = codes[calibrating[-1] + 1:]
+        load = monitoring == _LOAD
+        monitored_s += monitoring.size / rate
+        alert_s += int(np.count_nonzero(load)) / rate
+        episodes += int(np.count_nonzero(load[1:] & ~load[:-1])) + int(load[:1].sum())
+        if load.any():
+            first_alert.append(int(np.argmax(load)) / rate)
+    return {
+        "monitored_s": monitored_s,
+        "alerts_per_min": episodes / (monitored_s / 60.0) if monitored_s else 0.0,
+        "mean_dwell_s": alert_s / episodes if episodes else 0.0,
+        "load_fraction": alert_s / monitored_s if monitored_s else 0.0,
+        "time_to_first_alert_s": float(np.median(first_alert)) if first_alert else float("nan"),
+        "sessions_alerted": len(first_alert),
+    }
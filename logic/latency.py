@@ -0,0 +1,103 @@
+import logging
+import threading
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+# Pipeline points a sample is timed at, all measured from the sample's own
+# LSL timestamp mapped onto the local clock:
+#   pull       acquisition loop got it from liblsl
+#   processed  MBLL / filter / quality / detector done for its chunk
+#   alert      alert_state_changed emitted for a transition it caused
+#   repaint    first plot repaint that drew it
+LATENCY_STAGES = ("pull", "processed", "alert", "repaint")
+
+
+class LatencyHistogram:
+    # Fixed log-spaced histogram of latencies in seconds. Recording is one
+    # searchsorted and an increment, so it can sit on the per-chunk path;
+    # percentiles are read off the cumulative counts and are accurate to one
+    # bin (about 12% at 20 bins per decade). Values beyond the last edge land
+    # in an overflow bin; negative values (clock offset noise) in the first.
+
+    # 0.1 ms .. 100 s.
+    EDGES_S = np.geomspace(1e-4, 100.0, 6 * 20 + 1)
+
+    def __init__(self):
+        self.counts = np.zeros(len(self.EDGES_S) + 1, dtype=np.int64)
+        self.max_s = 0.0
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum())
+
+    def record(self, seconds: float) -> None:
+        self.counts[np.searchsorted(self.EDGES_S, seconds)] += 1
+        if seconds > self.max_s:
+            self.max_s = float(seconds)
+
+    def percentile(self, q: float):
+        # Upper edge of the bin holding the q-th percentile (the recorded
+        # maximum for the overflow bin); None when empty.
+        total = self.counts.sum()
+        if total == 0:
+            return None
+        idx = int(np.searchsorted(np.cumsum(self.counts), q / 100.0 * total))
+        if idx >= len(self.EDGES_S):
+            return self.max_s
+        return min(float(self.EDGES_S[idx]), self.max_s)
+
+    def reset(self) -> None:
+        self.counts[:] = 0
+        self.max_s = 0.0
+
+
+class LatencyTracker:
+    # One LatencyHistogram per stage. Written from the processing thread
+    # (pull, processed, alert) and the GUI thread (repaint), read from the
+    # GUI thread, so every access holds a small lock.
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, stages=LATENCY_STAGES):
+        self._lock = threading.Lock()
+        self._histograms = {stage: LatencyHistogram() for stage in stages}
+
+    def record(self, stage: str, seconds) -> None:
+        # None (clock offset not known yet) is silently skipped.
+        if seconds is None:
+            return
+        with self._lock:
+            self._histograms[stage].record(seconds)
+
+    def summary(self) -> dict:
+        # {stage: {"n", "p50_ms", "p95_ms", "p99_ms", "max_ms"}}; the ms
+        # values are None for a stage with no samples.
+        out = {}
+        with self._lock:
+            for stage, hist in self._histograms.items():
+                n = hist.n
+                row = {"n": n}
+                for q in self.PERCENTILES:
+                    value = hist.percentile(q)
+                    row[f"p{q}_ms"] = None if value is None else value * 1000.0
+                row["max_ms"] = hist.max_s * 1000.0 if n else None
+                out[stage] = row
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            for hist in self._histograms.values():
+                hist.reset()
+
+    def log_summary(self) -> None:
+        for stage, row in self.summary().items():
+            if not row["n"]:
+                continue
+            logger.info(
+                "Latency %-9s n=%-7d p50=%.1f ms p95=%.1f ms p99=%.1f ms max=%.1f ms",
+                stage, row["n"], row["p50_ms"], row["p95_ms"], row["p99_ms"], row["max_ms"],
+            )
@@ -1,8 +1,8 @@
-from collections import deque
 from typing import Optional
 
 import numpy as np
 
+from logic.signal_quality import QUALITY_GREEN
 from utils.enums import CognitiveState
 
 
@@ -10,6 +10,98 @@ from utils.enums import CognitiveState
 # Channels 0..3 are left-hemisphere PFC (L1..L4); 4..7 are right (R1..R4).
 LEFT_INDICES = (0, 1, 2, 3)
 RIGHT_INDICES = (4, 5, 6, 7)
+_LEFT = np.array(LEFT_INDICES)
+_RIGHT = np.array(RIGHT_INDICES)
+_N_CHANNELS = 8
+
+# evaluate_offline's state codes.
+_OFFLINE_STATES = (CognitiveState.NOMINAL, CognitiveState.LOAD, CognitiveState.CALIBRATING)
+_OFF_NOMINAL, _OFF_LOAD, _OFF_CALIBRATING = range(3)
+
+
+class _RunningWindow:
+    # Fixed-capacity circular window of (width,) vectors with a running sum,
+    # so push() and mean() cost O(width) however long the window is. The sum
+    # is re-derived from the buffer once per `maxlen` pushes, which bounds
+    # the float drift of repeated add/subtract at amortized O(width).
+
+    def __init__(self, maxlen: int, width: int):
+        self._buf = np.zeros((max(1, int(maxlen)), width), dtype=float)
+        self._sum = np.zeros(width, dtype=float)
+        self._pos = 0
+        self._count = 0
+        self._since_resum = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def maxlen(self) -> int:
+        # Same name as deque's so callers can treat it like the bounded deque
+        # it replaces.
+        return self._buf.shape[0]
+
+    def clear(self) -> None:
+        self._sum[:] = 0.0
+        self._pos = 0
+        self._count = 0
+        self._since_resum = 0
+
+    def push(self, vec: np.ndarray) -> None:
+        if self._count == self.maxlen:
+            self._sum -= self._buf[self._pos]
+        else:
+            self._count += 1
+        self._buf[self._pos] = vec
+        self._sum += vec
+        self._pos = (self._pos + 1) % self.maxlen
+
+        self._since_resum += 1
+        if self._since_resum >= self.maxlen:
+            self._sum = self._buf[: self._count].sum(axis=0)
+            self._since_resum = 0
+
+    def mean(self) -> np.ndarray:
+        return self._sum / self._count
+
+    def values(self) -> np.ndarray:
+        # Contents oldest first, shape (len, width).
+        if self._count < self.maxlen:
+            return self._buf[: self._count].copy()
+        return np.roll(self._buf, -self._pos, axis=0)
+
+    def resized(self, maxlen: int) -> "_RunningWindow":
+        # New window keeping the most recent min(len, maxlen) entries.
+        out = _RunningWindow(maxlen, self._buf.shape[1])
+        for vec in self.values()[-out.maxlen:]:
+            out.push(vec)
+        return out
+
+
+class _Welford:
+    # Streaming mean / sample variance of (width,) vectors (Welford's
+    # algorithm). Fixed memory and O(width) per push, however many samples
+    # go in; numerically stable where a naive sum of squares is not.
+
+    def __init__(self, width: int):
+        self.count = 0
+        self._mean = np.zeros(width, dtype=float)
+        self._m2 = np.zeros(width, dtype=float)
+
+    def push(self, vec) -> None:
+        self.count += 1
+        delta = vec - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (vec - self._mean)
+
+    def mean(self) -> np.ndarray:
+        return self._mean.copy()
+
+    def std(self) -> np.ndarray:
+        # ddof=1 (sample SD); zero until there are two samples.
+        if self.count < 2:
+            return np.zeros_like(self._m2)
+        return np.sqrt(self._m2 / (self.count - 1))
 
 
 class LoadDetector:
@@ -55,6 +147,36 @@ class LoadDetector:
         raise NotImplementedError
 
 
+def _sample_std(values: np.ndarray) -> np.ndarray:
+    # Column-wise ddof=1 SD; zero with fewer than two rows (as _Welford).
+    if values.shape[0] < 2:
+        return np.zeros(values.shape[1])
+    return values.std(axis=0, ddof=1)
+
+
+def _window_sums(values: np.ndarray, w: int) -> np.ndarray:
+    # Sums of every full window of w consecutive rows: (N, width) ->
+    # (N - w + 1, width), row k summing values[k:k + w]. Each sum is a
+    # suffix sum of one w-row block plus a prefix sum of the next, so the
+    # partial sums stay window-sized (like _RunningWindow's) rather than
+    # growing with the session as a plain cumsum difference would.
+    n, width = values.shape
+    blocks = -(-n // w)
+    padded = np.zeros((blocks * w, width))
+    padded[:n] = values
+    padded = padded.reshape(blocks, w, width)
+    prefix = np.cumsum(padded, axis=1)
+    suffix = (prefix[:, -1:] - prefix + padded).reshape(-1, width)
+    prefix = prefix.reshape(-1, width)
+
+    m = n - w + 1
+    # A window that starts mid-block runs into the next block; one that
+    # starts on a block boundary is exactly that block.
+    sums = suffix[:m] + prefix[w - 1:n]
+    sums[::w] = suffix[:m:w]
+    return sums
+
+
 class ThresholdAsymmetryDetector(LoadDetector):
     # Phase A algorithm (per remediation plan):
     # - Acquire per-subject baseline: subject sits quietly for `rest_window_s`.
@@ -88,10 +210,10 @@ class ThresholdAsymmetryDetector(LoadDetector):
         self.min_elevated_channels = int(min_elevated_channels)
         self.hhb_tol_um = float(hhb_tol_um)
 
-        # Calibration state.
+        # Calibration state: streaming stats, so memory stays fixed and
+        # finalizing is O(channels) however long the rest window is.
         self._calibrating: bool = False
-        self._cal_o2: list = []
-        self._cal_hhb: list = []
+        self._clear_calibration_stats()
 
         # Baseline summary (set after calibration finishes).
         self._baseline_mean: Optional[np.ndarray] = None  # shape (8,)
@@ -100,10 +222,11 @@ class ThresholdAsymmetryDetector(LoadDetector):
         self._baseline_asymmetry_mean: float = 0.0
         self._baseline_asymmetry_std: float = 0.0
 
-        # Active sliding windows for current state evaluation.
+        # Active sliding windows for current state evaluation. Running sums
+        # keep each update O(channels) regardless of window length.
         self._active_n = max(1, int(self.active_window_s * self.sample_rate))
-        self._active_o2: deque = deque(maxlen=self._active_n)
-        self._active_hhb: deque = deque(maxlen=self._active_n)
+        self._active_o2 = _RunningWindow(self._active_n, _N_CHANNELS)
+        self._active_hhb = _RunningWindow(self._active_n, _N_CHANNELS)
 
     # ---------- Interface ----------
 
@@ -123,7 +246,7 @@ class ThresholdAsymmetryDetector(LoadDetector):
         # returns to 0 only after reset() / a fresh start_calibration() call.
         if self._calibrating:
             needed = max(1, int(self.rest_window_s * self.sample_rate))
-            return min(1.0, len(self._cal_o2) / needed)
+            return min(1.0, self._cal_o2.count / needed)
         if self.is_calibrated:
             return 1.0
         return 0.0
@@ -147,8 +270,7 @@ class ThresholdAsymmetryDetector(LoadDetector):
         # cleared so the UI's progress indicator drops to 0 immediately and
         # the detector is honestly "uncalibrated" while recalibration runs.
         self._calibrating = True
-        self._cal_o2 = []
-        self._cal_hhb = []
+        self._clear_calibration_stats()
         self._baseline_mean = None
         self._baseline_std = None
         self._baseline_hhb_mean = None
@@ -159,8 +281,7 @@ class ThresholdAsymmetryDetector(LoadDetector):
 
     def reset(self) -> None:
         self._calibrating = False
-        self._cal_o2 = []
-        self._cal_hhb = []
+        self._clear_calibration_stats()
         self._baseline_mean = None
         self._baseline_std = None
         self._baseline_hhb_mean = None
@@ -172,12 +293,10 @@ class ThresholdAsymmetryDetector(LoadDetector):
     def set_sample_rate(self, hz: float) -> None:
         self.sample_rate = float(hz)
         new_n = max(1, int(self.active_window_s * self.sample_rate))
-        # Preserve whatever has accumulated so far; truncate/pad maxlen.
-        old_o2 = list(self._active_o2)
-        old_hhb = list(self._active_hhb)
+        # Preserve whatever has accumulated so far; keep the newest new_n.
         self._active_n = new_n
-        self._active_o2 = deque(old_o2, maxlen=new_n)
-        self._active_hhb = deque(old_hhb, maxlen=new_n)
+        self._active_o2 = self._active_o2.resized(new_n)
+        self._active_hhb = self._active_hhb.resized(new_n)
 
     def update(
         self,
@@ -190,10 +309,11 @@ class ThresholdAsymmetryDetector(LoadDetector):
 
         # Calibration accumulation runs to the exclusion of active evaluation.
         if self._calibrating:
-            self._cal_o2.append(o2hb)
-            self._cal_hhb.append(hhb)
+            self._cal_o2.push(o2hb)
+            self._cal_hhb.push(hhb)
+            self._cal_asym.push(np.mean(o2hb[_RIGHT]) - np.mean(o2hb[_LEFT]))
             needed = max(1, int(self.rest_window_s * self.sample_rate))
-            if len(self._cal_o2) >= needed:
+            if self._cal_o2.count >= needed:
                 self._finalize_calibration()
             return CognitiveState.CALIBRATING
 
@@ -202,15 +322,15 @@ class ThresholdAsymmetryDetector(LoadDetector):
             return CognitiveState.NOMINAL
 
         # Roll active window.
-        self._active_o2.append(o2hb)
-        self._active_hhb.append(hhb)
+        self._active_o2.push(o2hb)
+        self._active_hhb.push(hhb)
 
         # Need a full active window before evaluating.
         if len(self._active_o2) < self._active_n:
             return CognitiveState.NOMINAL
 
-        curr_o2 = np.mean(np.stack(self._active_o2), axis=0)
-        curr_hhb = np.mean(np.stack(self._active_hhb), axis=0)
+        curr_o2 = self._active_o2.mean()
+        curr_hhb = self._active_hhb.mean()
 
         good = self._quality_mask(quality)
 
@@ -221,13 +341,10 @@ class ThresholdAsymmetryDetector(LoadDetector):
             (curr_o2 > elevation_threshold) & hhb_ok & good
         )
 
-        right_elevated = int(np.sum(per_channel_elevated[list(RIGHT_INDICES)]))
+        right_elevated = int(np.sum(per_channel_elevated[_RIGHT]))
 
         # Asymmetry: right PFC minus left PFC mean O2Hb over the active window.
-        curr_asym = float(
-            np.mean(curr_o2[list(RIGHT_INDICES)])
-            - np.mean(curr_o2[list(LEFT_INDICES)])
-        )
+        curr_asym = float(np.mean(curr_o2[_RIGHT]) - np.mean(curr_o2[_LEFT]))
         asym_threshold = (
             self._baseline_asymmetry_mean + self.k_sd * self._baseline_asymmetry_std
         )
@@ -237,31 +354,95 @@ class ThresholdAsymmetryDetector(LoadDetector):
             return CognitiveState.LOAD
         return CognitiveState.NOMINAL
 
+    def evaluate_offline(
+        self,
+        o2hb: np.ndarray,
+        hhb: np.ndarray,
+        quality: Optional[np.ndarray] = None,
+        calibrate_at: Optional[int] = 0,
+    ) -> np.ndarray:
+        # Whole-session equivalent of calling update() row by row on a fresh
+        # detector with these settings, with start_calibration() called
+        # before row `calibrate_at` (None: never). o2hb / hhb (N, 8),
+        # quality (N, 8) QUALITY_* codes or None (all good). Returns the
+        # (N,) object array of CognitiveState update() would have returned.
+        # This detector's own streaming state is not touched.
+        #
+        # Calibration statistics are batch mean / SD and active-window means
+        # come from block-anchored running sums, so they differ from the
+        # streaming values only by float rounding: a state can differ only
+        # where a value sits within rounding error of its threshold.
+        codes = self._offline_codes(
+            np.asarray(o2hb, dtype=float), np.asarray(hhb, dtype=float), quality, calibrate_at,
+        )
+        return np.array(_OFFLINE_STATES, dtype=object)[codes]
+
     # ---------- Internal ----------
 
+    def _offline_codes(self, o2hb, hhb, quality, calibrate_at) -> np.ndarray:
+        # evaluate_offline as indices into _OFFLINE_STATES.
+        n = o2hb.shape[0]
+        codes = np.full(n, _OFF_NOMINAL, dtype=np.uint8)
+        if calibrate_at is None or calibrate_at >= n:
+            return codes
+
+        # Calibration rows; the row that completes the window still
+        # reports CALIBRATING.
+        needed = max(1, int(self.rest_window_s * self.sample_rate))
+        cal_stop = min(n, calibrate_at + needed)
+        codes[calibrate_at:cal_stop] = _OFF_CALIBRATING
+        if cal_stop - calibrate_at < needed:
+            return codes
+
+        cal_o2 = o2hb[calibrate_at:cal_stop]
+        cal_asym = cal_o2[:, _RIGHT].mean(axis=1) - cal_o2[:, _LEFT].mean(axis=1)
+        baseline_mean = cal_o2.mean(axis=0)
+        baseline_std = np.maximum(_sample_std(cal_o2), 1e-3)
+        baseline_hhb_mean = hhb[calibrate_at:cal_stop].mean(axis=0)
+        asym_mean = float(cal_asym.mean())
+        asym_std = float(np.maximum(_sample_std(cal_asym[:, np.newaxis])[0], 1e-3))
+
+        # Monitoring: the active windows restart empty after calibration and
+        # nothing is evaluated until they are full.
+        active_n = self._active_n
+        first = cal_stop + active_n - 1
+        if first >= n:
+            return codes
+        curr_o2 = _window_sums(o2hb[cal_stop:], active_n) / active_n
+        curr_hhb = _window_sums(hhb[cal_stop:], active_n) / active_n
+
+        if quality is None:
+            good = np.ones((n - first, _N_CHANNELS), dtype=bool)
+        else:
+            good = np.asarray(quality)[first:, :_N_CHANNELS] == QUALITY_GREEN
+        elevated = (
+            (curr_o2 > baseline_mean + self.k_sd * baseline_std)
+            & (curr_hhb <= baseline_hhb_mean + self.hhb_tol_um)
+            & good
+        )
+        right_elevated = elevated[:, _RIGHT].sum(axis=1)
+        curr_asym = curr_o2[:, _RIGHT].mean(axis=1) - curr_o2[:, _LEFT].mean(axis=1)
+        load = (right_elevated >= self.min_elevated_channels) | (
+            curr_asym > asym_mean + self.k_sd * asym_std
+        )
+        codes[first:][load] = _OFF_LOAD
+        return codes
+
     def _finalize_calibration(self) -> None:
-        stacked_o2 = np.stack(self._cal_o2, axis=0)        # (N, 8)
-        stacked_hhb = np.stack(self._cal_hhb, axis=0)      # (N, 8)
-        self._baseline_mean = np.mean(stacked_o2, axis=0)
+        self._baseline_mean = self._cal_o2.mean()
         # ddof=1 (sample SD). For a 60s @ 50Hz window we have 3000 samples,
         # the population/sample distinction is numerically negligible, but
         # ddof=1 matches what most stats packages do.
-        self._baseline_std = np.std(stacked_o2, axis=0, ddof=1)
         # Floor SD to avoid divide-by-near-zero or vanishing thresholds when
         # a channel happens to be perfectly steady in the rest window.
-        self._baseline_std = np.maximum(self._baseline_std, 1e-3)
-        self._baseline_hhb_mean = np.mean(stacked_hhb, axis=0)
+        self._baseline_std = np.maximum(self._cal_o2.std(), 1e-3)
+        self._baseline_hhb_mean = self._cal_hhb.mean()
 
-        asym_series = (
-            np.mean(stacked_o2[:, list(RIGHT_INDICES)], axis=1)
-            - np.mean(stacked_o2[:, list(LEFT_INDICES)], axis=1)
-        )
-        self._baseline_asymmetry_mean = float(np.mean(asym_series))
-        self._baseline_asymmetry_std = float(np.maximum(np.std(asym_series, ddof=1), 1e-3))
+        self._baseline_asymmetry_mean = float(self._cal_asym.mean()[0])
+        self._baseline_asymmetry_std = float(np.maximum(self._cal_asym.std()[0], 1e-3))
 
         self._calibrating = False
-        self._cal_o2 = []
-        self._cal_hhb = []
+        self._clear_calibration_stats()
 
         # Active windows accumulated during calibration are stale relative to
         # the just-frozen baseline; drop them so the first decision is made
@@ -269,14 +450,22 @@ class ThresholdAsymmetryDetector(LoadDetector):
         self._active_o2.clear()
         self._active_hhb.clear()
 
+    def _clear_calibration_stats(self) -> None:
+        self._cal_o2 = _Welford(_N_CHANNELS)
+        self._cal_hhb = _Welford(_N_CHANNELS)
+        self._cal_asym = _Welford(1)
+
     @staticmethod
-    def _quality_mask(quality: list) -> np.ndarray:
-        # Translate the per-channel quality strings to a green=True mask.
-        # If quality info is missing, fall through with all-True (trust all
-        # channels) rather than refuse to ever fire.
-        if not quality:
+    def _quality_mask(quality) -> np.ndarray:
+        # Translate per-channel quality (QUALITY_* codes or "green"/... strings)
+        # to a green=True mask. If quality info is missing, fall through with
+        # all-True (trust all channels) rather than refuse to ever fire.
+        if quality is None or len(quality) == 0:
             return np.ones(8, dtype=bool)
-        flags = [str(q).lower() == "green" for q in quality[:8]]
+        if isinstance(quality, np.ndarray) and quality.dtype.kind == "u":
+            flags = list(quality[:8] == QUALITY_GREEN)
+        else:
+            flags = [str(q).lower() == "green" for q in quality[:8]]
         if len(flags) < 8:
             flags.extend([True] * (8 - len(flags)))
         return np.array(flags, dtype=bool)
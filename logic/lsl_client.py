@@ -1,10 +1,13 @@
 import logging
+import threading
 from typing import Optional
 
+import numpy as np
 from PySide6.QtCore import QObject, Signal, QTimer
 import pylsl
 
 import config
+from logic.sample_chunk import ChunkRing, SampleChunk
 
 
 logger = logging.getLogger(__name__)
@@ -12,15 +15,23 @@ logger = logging.getLogger(__name__)
 
 class LSLClient(QObject):
     # LSL transport. Lives on a dedicated QThread (created by the controller).
-    # On each timer tick, pulls all available samples from the inlet via
-    # pull_chunk and emits them as a single chunk. Lossless by construction
-    # as long as the queue downstream (controller -> recorder) keeps up.
+    # Two acquisition modes (config.LSL_ACQUISITION_MODE):
+    #   - "blocking": an acquisition thread blocks in pull_chunk with a real
+    #     timeout, writing into a preallocated numpy buffer. The watchdog runs
+    #     in that loop off sample timestamps.
+    #   - "timer": a QTimer polls pull_chunk(timeout=0) once per nominal
+    #     sample period, with a QTimer watchdog.
+    # Either way each pull is emitted as a single chunk. Lossless by
+    # construction as long as the queue downstream (worker -> recorder)
+    # keeps up.
 
     streams_found = Signal(list)
     connected = Signal(str)
     disconnected = Signal()
-    # Payload: {'samples': [[...], [...]], 'timestamps': [t1, t2]}.
-    new_data_ready = Signal(dict)
+    # Payload: a SampleChunk with contiguous (n, C) samples and (n,)
+    # timestamps. In blocking mode these are views into a ChunkRing slot;
+    # the receiver must call chunk.release() when done with them.
+    new_data_ready = Signal(object)
     sample_rate_detected = Signal(object)
     # Fired when a stream was found but its metadata did not pass our contract
     # check (channel count, type, etc). Payload is a short human-readable reason.
@@ -29,11 +40,33 @@ class LSLClient(QObject):
 
     # Maximum samples to pull per timer tick. A 50 Hz stream with a 20 ms tick
     # produces ~1 sample/tick; 64 is generous headroom for transient backlog.
+    # The blocking loop uses config.LSL_PULL_MAX_SAMPLES instead.
     PULL_CHUNK_MAX = 64
 
     # Watchdog: if no samples arrive in this many ms, treat the stream as dead.
     WATCHDOG_MS = 5000
 
+    # Preallocated pull buffers in flight between acquisition and processing.
+    # At 64 samples/slot this covers seconds of backlog at OctaMon rates.
+    RING_SLOTS = 32
+
+    # Clock offset to the outlet drifts slowly; re-query it this often.
+    TIME_CORRECTION_INTERVAL_S = 5.0
+
+    # Channel formats the blocking loop can pull into a numpy buffer.
+    # Anything else (strings, int8/int64) falls back to list pulls.
+    _NUMPY_FORMATS = {
+        pylsl.cf_float32: np.float32,
+        pylsl.cf_double64: np.float64,
+        pylsl.cf_int32: np.int32,
+        pylsl.cf_int16: np.int16,
+    }
+
+    # Raised from the acquisition thread; queued onto this object's thread.
+    # Carries the thread's generation so a stall queued by an earlier
+    # connection cannot tear down the current one.
+    _acquisition_stalled = Signal(int)
+
     # Metadata contract: what we require an OxySoft Direct-Channel stream to
     # look like before we accept the connection.
     # 32 = OD only, 33 = OD + ADC, 34 = OD + ADC + Event.
@@ -53,6 +86,15 @@ class LSLClient(QObject):
         self.watchdog_timer.setSingleShot(True)
         self.watchdog_timer.timeout.connect(self._on_watchdog_timeout)
 
+        self._acq_thread: Optional[threading.Thread] = None
+        self._acq_stop = threading.Event()
+        self._acq_generation = 0
+        self._acquisition_stalled.connect(self._on_acquisition_stalled)
+
+        # Outlet -> local clock offset (seconds) and when it was last queried.
+        self._time_correction: Optional[float] = None
+        self._time_correction_at = 0.0
+
     @staticmethod
     def _tick_interval_ms(rate_hz) -> int:
         # Tick once per nominal sample period. Faster ticks pull empty chunks
@@ -112,6 +154,13 @@ class LSLClient(QObject):
         self.connected.emit(streams[0].name())
         self.sample_rate_detected.emit(rate)
 
+        self._time_correction = None
+        self._time_correction_at = 0.0
+
+        if config.LSL_ACQUISITION_MODE == "blocking":
+            self._start_acquisition_thread()
+            return
+
         # Sync pull cadence to detected stream rate immediately.
         if rate:
             self.processing_timer.setInterval(self._tick_interval_ms(rate))
@@ -123,6 +172,7 @@ class LSLClient(QObject):
         # Idempotent: safe to call from watchdog and from explicit user action.
         self.processing_timer.stop()
         self.watchdog_timer.stop()
+        self._stop_acquisition_thread()
         if self._close_inlet_safely():
             logger.info("Stream closed.")
         self.disconnected.emit()
@@ -202,8 +252,129 @@ class LSLClient(QObject):
         for i, (label, wl, t) in enumerate(labels[:8]):
             logger.info("  ch[%d]: label=%r wavelength=%r type=%r", i, label, wl, t)
 
+    # ---------- Blocking acquisition ----------
+
+    def _start_acquisition_thread(self) -> None:
+        self._acq_stop = threading.Event()
+        self._acq_generation += 1
+        self._acq_thread = threading.Thread(
+            target=self._acquisition_loop,
+            args=(self.inlet, self._acq_stop, self._acq_generation),
+            name="lsl-acquisition",
+            daemon=True,
+        )
+        self._acq_thread.start()
+
+    def _stop_acquisition_thread(self) -> None:
+        thread = self._acq_thread
+        self._acq_thread = None
+        if thread is None:
+            return
+        self._acq_stop.set()
+        # The loop notices the stop flag after at most one pull timeout (plus
+        # a time-correction query); the inlet is closed only after it exits.
+        thread.join(timeout=float(config.LSL_PULL_TIMEOUT_S) + 2.0)
+        if thread.is_alive():
+            logger.warning("Acquisition thread did not stop in time.")
+
+    def _acquisition_loop(self, inlet, stop: threading.Event, generation: int) -> None:
+        timeout = float(config.LSL_PULL_TIMEOUT_S)
+        max_samples = int(config.LSL_PULL_MAX_SAMPLES)
+        watchdog_s = self.WATCHDOG_MS / 1000.0
+
+        try:
+            info = inlet.info()
+            n_channels = info.channel_count()
+            dtype = self._NUMPY_FORMATS.get(info.channel_format())
+        except Exception as ex:
+            logger.exception("Reading stream info failed: %s", ex)
+            dtype = None
+        # liblsl writes each pull straight into a ring slot; the slot travels
+        # downstream as-is and comes back when the worker releases it.
+        ring = ChunkRing(self.RING_SLOTS, max_samples, n_channels, dtype) if dtype else None
+        slot = None
+
+        # Local-clock time of the newest sample (connect time until one arrives).
+        last_sample_time = pylsl.local_clock()
+
+        while not stop.is_set():
+            try:
+                if ring is not None:
+                    if slot is None:
+                        slot, samples_buf, ts_buf = ring.acquire()
+                    _, timestamps = inlet.pull_chunk(
+                        timeout=timeout, max_samples=max_samples, dest_obj=samples_buf
+                    )
+                    n = len(timestamps)
+                else:
+                    samples, timestamps = inlet.pull_chunk(
+                        timeout=timeout, max_samples=max_samples
+                    )
+                    n = len(timestamps)
+            except Exception as ex:
+                # Inlet died under us (or is recovering). Back off for one
+                # timeout; the watchdog below decides when to give up.
+                logger.warning("pull_chunk failed: %s", ex)
+                stop.wait(timeout)
+                n = 0
+
+            now = pylsl.local_clock()
+            if n == 0:
+                # Keep the acquired slot for the next pull.
+                if now - last_sample_time > watchdog_s and not stop.is_set():
+                    logger.warning("No samples for %.1f s.", now - last_sample_time)
+                    self._acquisition_stalled.emit(generation)
+                    return
+                continue
+
+            if self._time_correction is not None:
+                sample_time = float(timestamps[-1]) + self._time_correction
+            else:
+                # Outlet clock not mapped yet; arrival time is the best proxy.
+                sample_time = now
+            last_sample_time = max(last_sample_time, sample_time)
+            if stop.is_set():
+                return
+
+            latency_s = self._latency(timestamps, now)
+            if ring is not None:
+                ts_buf[:n] = timestamps
+                chunk = ring.publish(slot, samples_buf, ts_buf, n, now, latency_s)
+                slot = None
+            else:
+                chunk = self._standalone_chunk(samples, timestamps, now, latency_s)
+            self.new_data_ready.emit(chunk)
+            # After the emit so a slow first query never delays data.
+            self._refresh_time_correction(inlet, now)
+
     # ---------- Internal ----------
 
+    def _refresh_time_correction(self, inlet, now: float) -> None:
+        if now - self._time_correction_at < self.TIME_CORRECTION_INTERVAL_S:
+            return
+        self._time_correction_at = now
+        try:
+            self._time_correction = float(inlet.time_correction(timeout=1.0))
+        except Exception as ex:
+            # Keep the previous estimate; latency stays unknown until one lands.
+            logger.debug("time_correction failed: %s", ex)
+
+    def _latency(self, timestamps, pull_time: float) -> Optional[float]:
+        if self._time_correction is None:
+            return None
+        return pull_time - (float(timestamps[-1]) + self._time_correction)
+
+    @staticmethod
+    def _standalone_chunk(samples, timestamps, pull_time, latency_s) -> SampleChunk:
+        # List pulls (timer mode, non-numeric formats): one conversion here,
+        # so the consumer only ever sees arrays.
+        return SampleChunk(
+            np.asarray(samples, dtype=float),
+            np.asarray(timestamps, dtype=float),
+            pull_time=pull_time,
+            latency_s=latency_s,
+        )
+
     def _pull_chunk(self) -> None:
         if self.inlet is None:
             return
@@ -223,7 +394,10 @@ class LSLClient(QObject):
 
         # Successful read resets the watchdog.
         self.watchdog_timer.start()
-        self.new_data_ready.emit({"samples": samples, "timestamps": timestamps})
+        now = pylsl.local_clock()
+        self._refresh_time_correction(self.inlet, now)
+        latency_s = self._latency(timestamps, now)
+        self.new_data_ready.emit(self._standalone_chunk(samples, timestamps, now, latency_s))
 
     def _get_nominal_sample_rate(self):
         if self.inlet is None:
@@ -238,6 +412,16 @@ class LSLClient(QObject):
             return None
         return float(rate)
 
+    def _on_acquisition_stalled(self, generation: int) -> None:
+        if generation != self._acq_generation:
+            # Queued by the thread of an earlier connection; that inlet is
+            # already gone and the current one is healthy as far as we know.
+            return
+        self._on_watchdog_timeout()
+
     def _on_watchdog_timeout(self) -> None:
+        if self.inlet is None:
+            # Stale stall report queued before an explicit disconnect.
+            return
         logger.warning("Watchdog fired; stream considered dead.")
         self.disconnect()
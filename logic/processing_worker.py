@@ -0,0 +1,233 @@
+import logging
+import threading
+import time
+
+import numpy as np
+from pylsl import local_clock
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from logic.data_processor import (
+    DataProcessor,
+    SAMPLE_INVALID,
+    SAMPLE_OK,
+    SAMPLE_PLACEHOLDER,
+)
+from logic.latency import LatencyTracker
+from utils.enums import CognitiveState
+from utils.session_recorder import SessionRecorder
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessingWorker(QObject):
+    # Processing pipeline. Lives on a dedicated QThread (created by the
+    # controller) and owns the DataProcessor and SessionRecorder, so MBLL,
+    # filtering, quality, load detection and recorder formatting never wait
+    # on a GUI repaint or a modal dialog. LSL chunks arrive here directly
+    # from the LSLClient thread; the GUI only sees throttled display
+    # snapshots and alert-state transitions.
+    #
+    # Threading contract: anything that mutates the processor or recorder
+    # from another thread (start/stop recording, reset, settings reload,
+    # calibration) must hold `lock`. process_chunk holds it for the whole
+    # chunk, so a control action always lands between two chunks. Handing
+    # record blocks to the writer thread happens after the lock is released:
+    # under the "block" queue policy that can wait on a stalled disk, and a
+    # GUI poll of the detector must not wait with it.
+
+    # Coalesced processed samples for the plot + quality UI: one block with
+    # every sample shown since the previous emit, oldest first. Payload dict:
+    #   O2Hb, HHb    (n, 8) filtered concentrations
+    #   timestamp    (n,) LSL timestamps
+    #   quality      (8,) QUALITY_* uint8 codes of the newest sample
+    #   alert_state  CognitiveState (or None) of the newest sample
+    #   sample_time  local_clock() time of the newest sample, or None while
+    #                the outlet clock offset is unknown
+    # Emitted at most once per DISPLAY_INTERVAL_MS, whatever the stream rate.
+    display_snapshot = Signal(object)
+    # Fired only on a change of CognitiveState; the controller plays sounds.
+    alert_state_changed = Signal(object)
+
+    # ~60 Hz ceiling on GUI deliveries regardless of stream rate.
+    DISPLAY_INTERVAL_MS = 16
+
+    def __init__(self, recordings_root: str):
+        super().__init__()
+        self.data_processor = DataProcessor()
+        self.recorder = SessionRecorder(recordings_root=recordings_root)
+        # Record blocks filled under `lock` go to the writer after it is
+        # released (see process_chunk).
+        self.recorder.defer_hand_off = True
+        self.lock = threading.RLock()
+
+        self.last_alert_state = CognitiveState.NOMINAL
+
+        # Sample -> pull / processed / alert latencies recorded here; the GUI
+        # adds repaint. Thread-safe, so it is read without `lock`.
+        self.latency = LatencyTracker()
+        # Per-stage timings: the processor's own stages plus "recorder" here
+        # and "repaint" from the GUI. Thread-safe like `latency`.
+        self.profiler = self.data_processor.profiler
+
+        # Chunks that arrive between the LSL `connected` signal and the
+        # controller finishing its connect handling (reset vs resume, auto
+        # record) are held here so none is processed against stale state.
+        # None = not holding.
+        self._held = None
+
+        # (O2Hb, HHb, timestamp) blocks since the last emit, plus the newest
+        # sample's quality codes and alert state.
+        self._pending_display = []
+        self._pending_quality = None
+        self._pending_alert = None
+        self._pending_sample_time = None
+        self._last_display_emit = 0.0
+        # Parented so it follows the worker onto its thread.
+        self._display_timer = QTimer(self)
+        self._display_timer.setSingleShot(True)
+        self._display_timer.timeout.connect(self._flush_display)
+
+    # ---------- Slots (queued from the LSL and GUI threads) ----------
+
+    @Slot(str)
+    def on_stream_connected(self, _stream_name: str) -> None:
+        # Ordered before the stream's first chunk because both come from the
+        # LSL thread. Hold data until release() says the controller is done.
+        self._held = []
+
+    @Slot()
+    def release(self) -> None:
+        held, self._held = self._held, None
+        for chunk in held or ():
+            self.process_chunk(chunk)
+
+    @Slot(object)
+    def process_chunk(self, chunk) -> None:
+        # chunk: SampleChunk from the LSL client. Its arrays may live in the
+        # client's ring buffer, so release it as soon as we are done reading.
+        if self._held is not None:
+            self._held.append(chunk)
+            return
+
+        try:
+            samples = np.asarray(chunk.samples, dtype=float)
+            if samples.ndim != 2 or samples.shape[0] == 0:
+                return
+            offset = chunk.clock_offset
+            self.latency.record("pull", chunk.latency_s)
+            with self.lock:
+                self._process_chunk(samples, chunk.timestamps, offset)
+            self.recorder.flush_pending()
+            chunk.processed_time = local_clock()
+            if offset is not None:
+                newest = float(chunk.timestamps[-1]) + offset
+                self.latency.record("processed", chunk.processed_time - newest)
+        finally:
+            chunk.release()
+        self._schedule_display()
+
+    # ---------- Pipeline ----------
+
+    def _process_chunk(self, samples: np.ndarray, timestamps, clock_offset=None) -> None:
+        # One vectorized DataProcessor pass per LSL chunk, one block write to
+        # the recorder; the displayable rows are queued for the next display
+        # block and alert transitions are picked out of them. clock_offset
+        # maps timestamps to local_clock() for latency accounting (None =
+        # not known, nothing is timed).
+        width = samples.shape[1]
+
+        od = samples[:, :32] if width >= 32 else None
+        adc = self._int_column(samples, 32)
+        event = self._int_column(samples, 33)
+
+        try:
+            out = self.data_processor.process_chunk_od(samples, timestamps)
+        except Exception as ex:
+            logger.exception("Processing failed: %s", ex)
+            self._record_chunk(od, None, None, adc, event, True, False, timestamps)
+            return
+
+        # NaN guard: a single non-finite OD value would propagate through
+        # MBLL and the filter, so the processor skipped those samples; they
+        # are recorded as sentinel rows so files stay row-aligned.
+        # Placeholder-only samples (typical at stream start) keep their raw
+        # row with sentinel-zero calc values, as do warming-up samples.
+        # Recorded values are the RAW post-MBLL Hb (unfiltered). The filter is
+        # a display/alert artifact; analysts can apply their own filter offline
+        # over the recorded raw values.
+        status = out["status"]
+        self._record_chunk(
+            od, out["O2Hb_raw"], out["HHb_raw"], adc, event,
+            status == SAMPLE_INVALID, status == SAMPLE_OK, timestamps,
+        )
+
+        shown = np.flatnonzero((status != SAMPLE_INVALID) & (status != SAMPLE_PLACEHOLDER))
+        if shown.size == 0:
+            return
+        timestamps = np.asarray(timestamps, dtype=float)
+        self._pending_display.append((out["O2Hb"][shown], out["HHb"][shown], timestamps[shown]))
+        self._pending_quality = out["quality"][shown[-1]]
+        self._pending_alert = out["alert_state"][shown[-1]]
+        self._pending_sample_time = (
+            None if clock_offset is None else float(timestamps[shown[-1]]) + clock_offset
+        )
+
+        for i in shown:
+            current_state = out["alert_state"][i] or CognitiveState.NOMINAL
+            if current_state != self.last_alert_state:
+                self.last_alert_state = current_state
+                self.alert_state_changed.emit(current_state)
+                if clock_offset is not None:
+                    self.latency.record(
+                        "alert", local_clock() - (float(timestamps[i]) + clock_offset)
+                    )
+
+    def _record_chunk(self, od, o2hb, hhb, adc, event, dropped, has_hb, timestamps):
+        if not self.recorder.is_recording or self.recorder.is_paused:
+            return
+        t0 = time.perf_counter()
+        self.recorder.write_chunk(
+            od, o2hb, hhb, adc=adc, event=event, dropped=dropped, has_hb=has_hb,
+            timestamps=timestamps,
+        )
+        self.profiler.record("recorder", time.perf_counter() - t0, len(timestamps))
+
+    @staticmethod
+    def _int_column(samples: np.ndarray, col: int) -> np.ndarray:
+        # ADC / Event columns as ints, 0 where absent or non-finite.
+        values = np.zeros(samples.shape[0], dtype=np.int64)
+        if samples.shape[1] > col:
+            column = samples[:, col]
+            finite = np.isfinite(column)
+            values[finite] = column[finite].astype(np.int64)
+        return values
+
+    # ---------- Display throttling ----------
+
+    def _schedule_display(self) -> None:
+        if not self._pending_display or self._display_timer.isActive():
+            return
+        elapsed_ms = (time.monotonic() - self._last_display_emit) * 1000.0
+        if elapsed_ms >= self.DISPLAY_INTERVAL_MS:
+            self._flush_display()
+        else:
+            self._display_timer.start(max(1, int(self.DISPLAY_INTERVAL_MS - elapsed_ms)))
+
+    def _flush_display(self) -> None:
+        if not self._pending_display:
+            return
+        blocks, self._pending_display = self._pending_display, []
+        o2hb, hhb, timestamps = (
+            columns[0] if len(blocks) == 1 else np.concatenate(columns)
+            for columns in zip(*blocks)
+        )
+        self._last_display_emit = time.monotonic()
+        self.display_snapshot.emit({
+            "O2Hb": o2hb,
+            "HHb": hhb,
+            "timestamp": timestamps,
+            "quality": self._pending_quality,
+            "alert_state": self._pending_alert,
+            "sample_time": self._pending_sample_time,
+        })
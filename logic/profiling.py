@@ -0,0 +1,74 @@
+import collections
+import json
+import threading
+from typing import Optional
+
+
+class StageProfiler:
+    # Always-on timing counters for pipeline stages. Callers time a stage
+    # with time.perf_counter() and hand the duration (and how many samples
+    # it covered) to record(); the last WINDOW records per stage give a
+    # rolling mean/max, plus lifetime call and sample totals. A record is a
+    # lock and two deque appends, so the hot paths record once per stage
+    # per chunk rather than per sample.
+    #
+    # Shared between the processing thread (DataProcessor stages, recorder)
+    # and the GUI thread (plot repaint).
+
+    WINDOW = 256
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = bool(enabled)
+        self._lock = threading.Lock()
+        # stage -> [durations deque, sample-count deque, calls, samples]
+        self._stages = {}
+
+    def record(self, stage: str, seconds: float, samples: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = [
+                    collections.deque(maxlen=self.WINDOW),
+                    collections.deque(maxlen=self.WINDOW),
+                    0,
+                    0,
+                ]
+            entry[0].append(seconds)
+            entry[1].append(samples)
+            entry[2] += 1
+            entry[3] += samples
+
+    def summary(self) -> dict:
+        # {stage: {"calls", "samples", "mean_ms", "max_ms", "per_sample_us"}}
+        # with mean/max per call and the per-sample cost over the rolling
+        # window; calls/samples are lifetime totals. Stages appear in the
+        # order they were first recorded.
+        out = {}
+        with self._lock:
+            for stage, (durations, counts, calls, samples) in self._stages.items():
+                total_s = sum(durations)
+                window_samples = sum(counts)
+                out[stage] = {
+                    "calls": calls,
+                    "samples": samples,
+                    "mean_ms": total_s / len(durations) * 1000.0,
+                    "max_ms": max(durations) * 1000.0,
+                    "per_sample_us": (
+                        total_s / window_samples * 1e6 if window_samples else None
+                    ),
+                }
+        return out
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        # summary() as JSON; also written to path when given.
+        text = json.dumps(self.summary(), indent=2)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
@@ -0,0 +1,189 @@
+import contextlib
+import os
+import re
+from typing import Optional
+
+import numpy as np
+
+import config
+from logic.data_processor import DataProcessor, SAMPLE_OK
+from utils.enums import CognitiveState
+from utils.session_loader import load_session, read_oxysoft_table
+from utils.session_store import FLAG_MARKER
+
+
+# Headless replay of a recorded OD stream through the live pipeline
+# (DataProcessor: MBLL, bandpass filter, signal quality, load detector), as
+# fast as the CPU allows and without Qt. Used to re-analyse recordings with
+# different settings; scripts/replay_session.py is the command-line front end.
+
+# alert codes in replay results: index into ALERT_STATES, or ALERT_NONE for
+# rows the pipeline skipped (NaN, placeholder).
+ALERT_STATES = tuple(CognitiveState)
+ALERT_NONE = 255
+
+# Rows per process_chunk_od call.
+CHUNK_ROWS = 1024
+
+_HEADER_SCAN_BYTES = 16384
+_RATE_LINE = re.compile(r"^[^\n:]*(?:data|sample) rate[^\n:]*:\s*([0-9]+(?:\.[0-9]*)?)", re.I | re.M)
+
+
+def load_replay_input(path: str, sample_rate: Optional[float] = None) -> tuple:
+    # (od (N, 32), timestamps (N,), sample_rate) from a recording folder or
+    # an OxySoft-style text export (OxySoft RAW export or a raw_od.tsv).
+    # Dropped rows come back as NaN OD, event-marker rows are left out.
+    if os.path.isdir(path):
+        session = load_session(path)
+        od = np.array(session["od"], dtype=np.float64)
+        od[session["dropped"]] = np.nan
+        timestamps = np.array(session["timestamp"], dtype=np.float64)
+        if session["markers"]:
+            keep = (session["records"]["flags"] & FLAG_MARKER) == 0
+            od, timestamps = od[keep], timestamps[keep]
+        rate = sample_rate or session["metadata"].get("sample_rate_hz") or config.SAMPLE_RATE
+    else:
+        values, _ = read_oxysoft_table(path)
+        if values.shape[1] < 33:
+            raise ValueError(f"{path}: expected a sample column and 32 OD columns, got {values.shape[1]} columns")
+        od = values[:, 1:33]
+        timestamps = np.full(od.shape[0], np.nan)
+        rate = sample_rate or _header_rate(path) or config.SAMPLE_RATE
+    rate = float(rate)
+    missing = np.isnan(timestamps)
+    if missing.any():
+        timestamps[missing] = np.flatnonzero(missing) / rate
+    return od, timestamps, rate
+
+
+def replay(
+    od: np.ndarray,
+    sample_rate: float,
+    timestamps: Optional[np.ndarray] = None,
+    calibrate_at_s: Optional[float] = 0.0,
+    settings: Optional[dict] = None,
+) -> dict:
+    # Runs od (N, 32) through a fresh DataProcessor. calibrate_at_s starts
+    # the load detector's calibration at that many seconds into the replay
+    # (None: never calibrate, so the detector stays NOMINAL); settings
+    # overrides config keys for this replay only.
+    #
+    # Returns columnar results, one row per input sample:
+    #   sample_rate (scalar array), timestamps (N,), status (N,) SAMPLE_* codes,
+    #   o2hb / hhb (N, 8) filtered, o2hb_raw / hhb_raw (N, 8) unfiltered,
+    #   quality (N, 8) QUALITY_* codes, alert (N,) uint8 (see ALERT_STATES)
+    # plus the timelines: alert_changes / quality_changes, the rows where the
+    # alert state / any channel's quality differs from the previous row.
+    with settings_applied(settings or {}):
+        return _replay(np.asarray(od, dtype=np.float64), float(sample_rate), timestamps, calibrate_at_s)
+
+
+def _replay(od, sample_rate, timestamps, calibrate_at_s) -> dict:
+    n = od.shape[0]
+    if timestamps is None:
+        timestamps = np.arange(n) / sample_rate
+    dp = DataProcessor()
+    dp.set_sample_rate(sample_rate)
+
+    calibrate_row = None
+    if calibrate_at_s is not None:
+        calibrate_row = min(n, max(0, int(round(calibrate_at_s * sample_rate))))
+
+    result = {
+        "sample_rate": np.float64(sample_rate),
+        "timestamps": np.asarray(timestamps, dtype=np.float64),
+        "status": np.empty(n, dtype=np.uint8),
+        "o2hb": np.empty((n, 8)),
+        "hhb": np.empty((n, 8)),
+        "o2hb_raw": np.empty((n, 8)),
+        "hhb_raw": np.empty((n, 8)),
+        "quality": np.empty((n, 8), dtype=np.uint8),
+        "alert": np.empty(n, dtype=np.uint8),
+    }
+    codes = {state: i for i, state in enumerate(ALERT_STATES)}
+    codes[None] = ALERT_NONE
+
+    # Chunk boundaries, with one at the calibration start.
+    bounds = {0, n, *range(0, n, CHUNK_ROWS)}
+    if calibrate_row is not None:
+        bounds.add(calibrate_row)
+    bounds = sorted(bounds)
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        if start == calibrate_row:
+            dp.load_detector.start_calibration()
+        out = dp.process_chunk_od(od[start:stop])
+        result["status"][start:stop] = out["status"]
+        result["o2hb"][start:stop] = out["O2Hb"]
+        result["hhb"][start:stop] = out["HHb"]
+        result["o2hb_raw"][start:stop] = out["O2Hb_raw"]
+        result["hhb_raw"][start:stop] = out["HHb_raw"]
+        result["quality"][start:stop] = out["quality"]
+        result["alert"][start:stop] = [codes[state] for state in out["alert_state"]]
+    if calibrate_row == n:
+        dp.load_detector.start_calibration()
+
+    result["alert_changes"] = _change_rows(result["alert"])
+    result["quality_changes"] = _change_rows(result["quality"])
+    result["baseline_summary"] = dp.load_detector.baseline_summary
+    return result
+
+
+def save_replay(path: str, result: dict) -> None:
+    # Writes a replay result as an .npz archive (np.load(path) reads it back);
+    # alert_states maps the alert codes to CognitiveState values.
+    arrays = {k: v for k, v in result.items() if isinstance(v, (np.ndarray, np.generic))}
+    arrays["alert_states"] = np.array([state.value for state in ALERT_STATES])
+    np.savez(path, **arrays)
+
+
+def summarize(result: dict) -> dict:
+    # Per-replay counts: samples, processed samples, alert transitions, and
+    # seconds spent in each alert state.
+    n = result["status"].shape[0]
+    counts = np.bincount(result["alert"], minlength=len(ALERT_STATES))
+    seconds = {
+        state.value: float(counts[code] / result["sample_rate"])
+        for code, state in enumerate(ALERT_STATES)
+    }
+    return {
+        "samples": int(n),
+        "processed": int(np.count_nonzero(result["status"] == SAMPLE_OK)),
+        "alert_transitions": int(result["alert_changes"].size),
+        "seconds_in_state": seconds,
+    }
+
+
+@contextlib.contextmanager
+def settings_applied(overrides: dict):
+    # Temporarily sets config keys (e.g. a validated settings.json) and
+    # restores the previous values on exit.
+    saved = {key: getattr(config, key) for key in overrides if hasattr(config, key)}
+    try:
+        for key, value in overrides.items():
+            setattr(config, key, value)
+        yield
+    finally:
+        for key in overrides:
+            if key in saved:
+                setattr(config, key, saved[key])
+            else:
+                delattr(config, key)
+
+
+def _header_rate(path: str) -> Optional[float]:
+    # Sample rate from a text export's header ("Data rate (Hz):" in ours,
+    # a "... sample rate ...:" line in OxySoft's), or None.
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        head = f.read(_HEADER_SCAN_BYTES)
+    match = _RATE_LINE.search(head)
+    return float(match.group(1)) if match else None
+
+
+def _change_rows(values: np.ndarray) -> np.ndarray:
+    # Rows whose value differs from the previous row's (row 0 excluded).
+    if values.shape[0] < 2:
+        return np.zeros(0, dtype=np.int64)
+    changed = values[1:] != values[:-1]
+    if changed.ndim > 1:
+        changed = changed.any(axis=1)
+    return np.flatnonzero(changed) + 1
@@ -0,0 +1,129 @@
+import collections
+import logging
+from typing import Callable, Optional
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class SampleChunk:
+    # One LSL pull as contiguous arrays: samples (n, C) in the stream's dtype
+    # and timestamps (n,) float64. Crosses the LSL -> processing thread
+    # boundary as a single object, so the cost of a hand-off does not depend
+    # on how many samples or channels it carries.
+    #
+    # When the arrays are views into a ChunkRing slot the consumer MUST call
+    # release() once it no longer needs them; the slot is then reused for a
+    # later pull. release() is idempotent and a no-op for standalone chunks.
+
+    __slots__ = (
+        "samples", "timestamps", "pull_time", "latency_s", "processed_time", "_release",
+    )
+
+    def __init__(
+        self,
+        samples: np.ndarray,
+        timestamps: np.ndarray,
+        pull_time: Optional[float] = None,
+        latency_s: Optional[float] = None,
+        release: Optional[Callable[[], None]] = None,
+    ):
+        self.samples = samples
+        self.timestamps = timestamps
+        # local_clock() when the pull returned.
+        self.pull_time = pull_time
+        # pull_time minus the newest sample time in local clock; None until
+        # the outlet's clock offset is known.
+        self.latency_s = latency_s
+        # local_clock() when the processing worker finished with the chunk.
+        self.processed_time: Optional[float] = None
+        self._release = release
+
+    def __len__(self) -> int:
+        return self.timestamps.shape[0]
+
+    @property
+    def clock_offset(self) -> Optional[float]:
+        # Outlet -> local clock offset implied by the stamps: add it to an
+        # entry of timestamps to get that sample's local_clock() time.
+        if self.pull_time is None or self.latency_s is None or len(self) == 0:
+            return None
+        return self.pull_time - self.latency_s - float(self.timestamps[-1])
+
+    def release(self) -> None:
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+
+class ChunkRing:
+    # Fixed pool of preallocated (max_samples, n_channels) buffers that the
+    # acquisition loop pulls into directly (pylsl dest_obj). A filled slot
+    # goes downstream inside a SampleChunk and returns to the pool on
+    # release(). If every slot is still held (consumer stalled or holding
+    # chunks across a connect), acquire() hands out a one-off buffer instead
+    # of blocking: acquisition must never wait on processing.
+
+    def __init__(self, slots: int, max_samples: int, n_channels: int, dtype=np.float64):
+        if slots < 1 or max_samples < 1 or n_channels < 1:
+            raise ValueError(
+                f"slots, max_samples and n_channels must be >= 1, "
+                f"got {slots}, {max_samples}, {n_channels}"
+            )
+        self.max_samples = int(max_samples)
+        self.n_channels = int(n_channels)
+        self.dtype = np.dtype(dtype)
+        # Slot-major so every slot is one C-contiguous block.
+        self._samples = np.zeros((slots, max_samples, n_channels), dtype=self.dtype)
+        self._timestamps = np.zeros((slots, max_samples), dtype=np.float64)
+        # LIFO free list, so a consumer that keeps up cycles through one hot
+        # slot. deque append/pop are atomic, which is all the producer and
+        # consumer threads need.
+        self._free = collections.deque(range(slots))
+        # Number of acquires that found the pool empty.
+        self.overflows = 0
+
+    @property
+    def slots(self) -> int:
+        return self._samples.shape[0]
+
+    def acquire(self) -> tuple:
+        # Returns (slot, samples_buf, timestamps_buf). slot is None for a
+        # one-off buffer allocated because the pool was exhausted.
+        try:
+            slot = self._free.pop()
+        except IndexError:
+            self.overflows += 1
+            if self.overflows == 1 or self.overflows % 100 == 0:
+                logger.warning(
+                    "Chunk ring exhausted (%d slots held); allocating (%d so far).",
+                    self.slots, self.overflows,
+                )
+            return (
+                None,
+                np.zeros((self.max_samples, self.n_channels), dtype=self.dtype),
+                np.zeros(self.max_samples, dtype=np.float64),
+            )
+        return slot, self._samples[slot], self._timestamps[slot]
+
+    def publish(
+        self,
+        slot: Optional[int],
+        samples_buf: np.ndarray,
+        timestamps_buf: np.ndarray,
+        n: int,
+        pull_time: Optional[float] = None,
+        latency_s: Optional[float] = None,
+    ) -> SampleChunk:
+        # Wraps the first n rows of an acquired buffer. Ownership of the slot
+        # passes to the returned chunk.
+        release = None if slot is None else (lambda: self._free.append(slot))
+        return SampleChunk(
+            samples_buf[:n],
+            timestamps_buf[:n],
+            pull_time=pull_time,
+            latency_s=latency_s,
+            release=release,
+        )
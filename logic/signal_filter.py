@@ -11,8 +11,8 @@ logger = logging.getLogger(__name__)
 class BandpassFilter:
     # Per-channel causal Butterworth bandpass for live streaming. One filter
     # bank covers N channels; each channel keeps its own SOS state so the
-    # streams stay independent. Calling process() once per arriving sample
-    # advances every channel by one sample.
+    # streams stay independent. process_block() advances every channel over a
+    # whole chunk in a single sosfilt call; process() is the one-sample case.
     #
     # When the sample rate is too low for the requested high cutoff (less than
     # 2.5x the cutoff), the cutoff is clamped to 0.4 * Nyquist and a warning is
@@ -36,7 +36,8 @@ class BandpassFilter:
 
         self._sample_rate: Optional[float] = None
         self._sos: Optional[np.ndarray] = None
-        # Per-channel SOS filter state: shape (num_channels, n_sections, 2).
+        # SOS filter state for all channels: shape (n_sections, num_channels, 2),
+        # the zi layout sosfilt expects for a (num_channels, n) input.
         self._zi: Optional[np.ndarray] = None
         # Set of (low, high) effectively in use after Nyquist clamping.
         self._effective_band = (0.0, 0.0)
@@ -74,7 +75,7 @@ class BandpassFilter:
             self._zi = None
             return
         n_sections = self._sos.shape[0]
-        self._zi = np.zeros((self.num_channels, n_sections, 2), dtype=float)
+        self._zi = np.zeros((n_sections, self.num_channels, 2), dtype=float)
 
     def process(self, samples: np.ndarray) -> np.ndarray:
         # samples: shape (num_channels,). Returns filtered samples, same shape.
@@ -83,15 +84,24 @@ class BandpassFilter:
             raise ValueError(
                 f"expected shape ({self.num_channels},), got {samples.shape}"
             )
-        if self._sos is None or self._zi is None:
+        return self.process_block(samples[np.newaxis, :])[0]
+
+    def process_block(self, samples: np.ndarray) -> np.ndarray:
+        # samples: shape (n_samples, num_channels), oldest first. Advances
+        # every channel by n_samples and returns the filtered block. One
+        # sosfilt call covers all channels and samples; the result is
+        # bit-identical to filtering one sample at a time, since sosfilt runs
+        # the same per-sample recurrence either way.
+        samples = np.asarray(samples, dtype=float)
+        if samples.ndim != 2 or samples.shape[1] != self.num_channels:
+            raise ValueError(
+                f"expected shape (n, {self.num_channels}), got {samples.shape}"
+            )
+        if self._sos is None or self._zi is None or samples.shape[0] == 0:
             return samples.copy()
 
-        out = np.empty(self.num_channels, dtype=float)
-        for i in range(self.num_channels):
-            x = samples[i : i + 1]  # 1-element view, avoids re-allocation
-            y, self._zi[i] = sosfilt(self._sos, x, zi=self._zi[i])
-            out[i] = y[0]
-        return out
+        out, self._zi = sosfilt(self._sos, samples.T, axis=-1, zi=self._zi)
+        return out.T
 
     def _rebuild(self) -> None:
         fs = self._sample_rate
@@ -121,5 +131,5 @@ class BandpassFilter:
         self._sos = sos
         # Zero-state initial conditions: see reset() docstring for rationale.
         n_sections = sos.shape[0]
-        self._zi = np.zeros((self.num_channels, n_sections, 2), dtype=float)
+        self._zi = np.zeros((n_sections, self.num_channels, 2), dtype=float)
         self._effective_band = (low, high)
@@ -3,6 +3,18 @@ from typing import List
 import numpy as np
 
 
+# Compact per-channel quality codes. The pipeline carries these as uint8
+# arrays; quality_names() turns them into the strings the UI styles on.
+QUALITY_RED = 0
+QUALITY_YELLOW = 1
+QUALITY_GREEN = 2
+QUALITY_NAMES = ("red", "yellow", "green")
+
+
+def quality_names(codes) -> List[str]:
+    return [QUALITY_NAMES[int(c)] for c in codes]
+
+
 class SignalQualityEvaluator:
     # Per-channel signal quality from a rolling window of single-wavelength OD.
     # Three independent criteria are evaluated; the channel's status is the
@@ -18,11 +30,21 @@ class SignalQualityEvaluator:
     #    crawling away from its operating point.
     #
     # 3) heartbeat present in 0.8-2.0 Hz band
-    #    A well-coupled optode picks up cardiac pulsation. An FFT peak in the
+    #    A well-coupled optode picks up cardiac pulsation. A DFT peak in the
     #    HR band that exceeds the noise floor (median spectrum in 2.5-5.0 Hz)
-    #    by at least hr_snr_threshold confirms skin contact. The FFT is
-    #    expensive, so it's recomputed only every hr_recompute_s seconds and
-    #    the result is cached between recomputations.
+    #    by at least hr_snr_threshold confirms skin contact. The HR-band bins
+    #    are kept as a sliding DFT updated every sample, so coupling loss
+    #    shows up within one sample period. Every hr_recompute_s seconds they
+    #    are recomputed exactly from the window (stops rounding drift from
+    #    the recursive update), together with the noise floor, which is
+    #    cached until the next recompute. Per sample that leaves one
+    #    squared-magnitude max against threshold^2 * floor.
+    #
+    # std and mean come from running sums of (od - shift) and its square, so
+    # an update costs O(channels) whatever the window length. shift tracks
+    # the window mean (keeps the sum of squares well conditioned) and both
+    # sums are recomputed exactly once per window to stop drift. Until the
+    # first window is full only the buffer is written.
 
     def __init__(
         self,
@@ -55,51 +77,67 @@ class SignalQualityEvaluator:
         self._allocate_buffers()
 
     def update(self, od_per_channel: np.ndarray) -> List[str]:
+        # Same as update_codes, as the per-channel state strings.
+        return quality_names(self.update_codes(od_per_channel))
+
+    def update_codes(self, od_per_channel: np.ndarray) -> np.ndarray:
         # od_per_channel: shape (num_channels,) - single-wavelength OD per channel.
         # Advances the rolling buffer, recomputes HR if due, returns the
-        # per-channel state list.
+        # per-channel QUALITY_* codes as a fresh (num_channels,) uint8 array.
         od_per_channel = np.asarray(od_per_channel, dtype=float)
         if od_per_channel.shape != (self.num_channels,):
             raise ValueError(
                 f"expected shape ({self.num_channels},), got {od_per_channel.shape}"
             )
 
+        if self._filled:
+            # change = x_in - x_out drives both the running sums and the
+            # sliding DFT.
+            x = od_per_channel - self._shift
+            outgoing = self._od_buffer[:, self._ptr] - self._shift
+            change = x - outgoing
+            self._sum += change
+            self._sum_sq += change * (x + outgoing)
+            if self._bins.size:
+                # Sliding DFT: X_k <- (X_k + x_in - x_out) * e^{+j2pi k/N}.
+                np.add(self._dft, change[:, np.newaxis], out=self._dft)
+                np.multiply(self._dft, self._twiddle, out=self._dft)
+
         self._od_buffer[:, self._ptr] = od_per_channel
         self._ptr = (self._ptr + 1) % self._window_samples
         if self._ptr == 0:
-            self._filled = True
+            if not self._filled:
+                # First full window: sums and spectrum start from an exact
+                # pass over it; until then only the buffer is filled.
+                self._filled = True
+                self._samples_since_hr = self._recompute_interval_samples
+            self._resum()
 
         if not self._filled:
-            return ["red"] * self.num_channels
-
-        std_vec = np.std(self._od_buffer, axis=1)
-        mean_vec = np.mean(self._od_buffer, axis=1)
-        # Avoid divide-by-zero when a channel sits at exactly 0; treat as
-        # CV=infinity in that case so the CV criterion fails (channel is red).
-        denom = np.where(np.abs(mean_vec) > 1e-9, np.abs(mean_vec), np.nan)
-        with np.errstate(invalid="ignore", divide="ignore"):
-            cv_vec = std_vec / denom
-
-        std_ok = std_vec > self.std_threshold
-        cv_ok = np.isfinite(cv_vec) & (cv_vec < self.cv_threshold)
+            return np.full(self.num_channels, QUALITY_RED, dtype=np.uint8)
 
-        # Recompute heartbeat presence periodically; cache otherwise.
         self._samples_since_hr += 1
         if self._samples_since_hr >= self._recompute_interval_samples:
             self._samples_since_hr = 0
-            self._heartbeat_good = self._compute_heartbeat()
+            self._resync_dft()
+
+        # Both criteria on the variance, so no sqrt or division per sample:
+        # std > t  <=>  var > t^2, and std / |mean| < c  <=>  var < c^2 mean^2.
+        # A channel sitting at exactly 0 counts as CV=infinity (fails).
+        n = self._window_samples
+        shifted_mean = self._sum / n
+        var = self._sum_sq / n - shifted_mean * shifted_mean
+        mean = self._shift + shifted_mean
+        mean_sq = mean * mean
 
-        scores = std_ok.astype(int) + cv_ok.astype(int) + self._heartbeat_good.astype(int)
+        std_ok = var > self.std_threshold * self.std_threshold
+        cv_ok = (mean_sq > 1e-18) & (var < self.cv_threshold * self.cv_threshold * mean_sq)
 
-        states: List[str] = []
-        for s in scores:
-            if s >= 3:
-                states.append("green")
-            elif s == 2:
-                states.append("yellow")
-            else:
-                states.append("red")
-        return states
+        self._heartbeat_good = self._compute_heartbeat()
+
+        # 3/3 = green, 2/3 = yellow, <=1 = red.
+        scores = std_ok.astype(np.uint8) + cv_ok + self._heartbeat_good
+        return np.maximum(scores, 1) - 1
 
     # ---------- Internal ----------
 
@@ -113,28 +151,60 @@ class SignalQualityEvaluator:
         self._heartbeat_good = np.zeros(self.num_channels, dtype=bool)
         self._samples_since_hr = 0
 
-    def _compute_heartbeat(self) -> np.ndarray:
-        fs = self.sample_rate
-        n = self._window_samples
-
-        # Detrend per-channel so the DC bin doesn't dominate.
-        signal = self._od_buffer - np.mean(self._od_buffer, axis=1, keepdims=True)
-
-        spec = np.abs(np.fft.rfft(signal, axis=1))
-        freqs = np.fft.rfftfreq(n, d=1.0 / fs)
+        self._shift = np.zeros(self.num_channels, dtype=float)
+        self._sum = np.zeros(self.num_channels, dtype=float)
+        self._sum_sq = np.zeros(self.num_channels, dtype=float)
 
-        hr_mask = (freqs >= 0.8) & (freqs <= 2.0)
-        noise_mask = (freqs >= 2.5) & (freqs <= 5.0)
+        # Sliding-DFT state for the HR band bins only; the noise band is
+        # only needed at resync. Bin selection is the same as an rfft over
+        # the window would give.
+        n = self._window_samples
+        freqs = np.fft.rfftfreq(n, d=1.0 / self.sample_rate)
+        hr_bins = np.flatnonzero((freqs >= 0.8) & (freqs <= 2.0))
+        noise_bins = np.flatnonzero((freqs >= 2.5) & (freqs <= 5.0))
+        if hr_bins.size == 0 or noise_bins.size == 0:
+            # Window too short / sample rate too low to resolve the HR band.
+            hr_bins = noise_bins = np.zeros(0, dtype=np.intp)
+        self._bins = hr_bins
+        self._twiddle = np.exp(2j * np.pi * self._bins / n)
+        # Exact-DFT basis for the resync, (N, K_hr + K_noise); oldest sample
+        # first.
+        self._dft_basis = np.exp(
+            -2j * np.pi * np.outer(np.arange(n), np.concatenate([hr_bins, noise_bins])) / n
+        )
+        self._dft = np.zeros((self.num_channels, self._bins.size), dtype=complex)
+        # threshold^2 * median(|X|^2) over the noise band, per channel, as of
+        # the last resync. inf = no floor yet, so the criterion fails.
+        self._hr_power_limit = np.full(self.num_channels, np.inf)
+
+    def _resum(self) -> None:
+        # Exact recompute over the full window, re-centred on its mean.
+        self._shift = np.mean(self._od_buffer, axis=1)
+        centred = self._od_buffer - self._shift[:, np.newaxis]
+        self._sum = np.sum(centred, axis=1)
+        self._sum_sq = np.sum(centred * centred, axis=1)
+
+    def _resync_dft(self) -> None:
+        # Exact DFT of the current window (oldest first) for the HR bins, and
+        # the noise floor from the noise bins.
+        if self._bins.size:
+            window = np.roll(self._od_buffer, -self._ptr, axis=1)
+            spectrum = window @ self._dft_basis
+            k = self._bins.size
+            self._dft = spectrum[:, :k]
+            noise = spectrum[:, k:]
+            floor = np.median(noise.real * noise.real + noise.imag * noise.imag, axis=1)
+            self._hr_power_limit = np.where(
+                floor > 0, self.hr_snr_threshold * self.hr_snr_threshold * floor, np.inf
+            )
 
+    def _compute_heartbeat(self) -> np.ndarray:
         good = np.zeros(self.num_channels, dtype=bool)
-        if not np.any(hr_mask) or not np.any(noise_mask):
-            # Window too short / sample rate too low to resolve the HR band.
+        if self._bins.size == 0:
             return good
 
-        peak_per_ch = np.max(spec[:, hr_mask], axis=1)
-        noise_per_ch = np.median(spec[:, noise_mask], axis=1)
-
-        with np.errstate(invalid="ignore", divide="ignore"):
-            snr = peak_per_ch / np.where(noise_per_ch > 0, noise_per_ch, np.nan)
-        good = np.isfinite(snr) & (snr > self.hr_snr_threshold)
-        return good
+        # Non-DC bins, so no detrend needed: a constant offset contributes
+        # nothing to them. peak / floor > threshold, squared (no sqrt).
+        power = self._dft.real * self._dft.real
+        power += self._dft.imag * self._dft.imag
+        return power.max(axis=1) > self._hr_power_limit
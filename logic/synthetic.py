@@ -0,0 +1,103 @@
+import numpy as np
+
+import config
+
+
+# Deterministic synthetic OctaMon OD stream in the OxySoft Direct-Channel
+# layout: 32 OD columns (16 active light-source positions, placeholders
+# elsewhere), then ADC and Event. Used by the benchmarks and the local test
+# outlet; it looks enough like a real recording to drive every stage of the
+# pipeline (heartbeat for signal quality, slow oscillations for the filter and
+# detector), not to validate the physiology.
+
+# Active OD positions: L1..L8 on Rx1 and L9..L16 on Rx2 (see
+# DataProcessor._init_od_indices).
+ACTIVE_OD_INDICES = tuple(range(0, 8)) + tuple(range(24, 32))
+
+HEARTBEAT_HZ = 1.2
+MAYER_HZ = 0.1
+# Period of the "event" column's marker pulses.
+EVENT_PERIOD_S = 30.0
+
+
+class SyntheticOctaMon:
+    # Stateful generator: read(n) returns the next n rows, so a stream read
+    # in any chunking is the same stream. Same seed, same rows.
+    #
+    # Per active channel: offset + heartbeat (1.2 Hz, slowly wandering) +
+    # Mayer wave (0.1 Hz) + slow drift + white noise. The first
+    # warmup_samples rows are OxySoft's all-placeholder warm-up; after that
+    # each row has probability nan_rate of one non-finite OD value.
+
+    def __init__(
+        self,
+        sample_rate: float,
+        seed: int = 0,
+        channels: int = 34,
+        warmup_samples: int = 0,
+        nan_rate: float = 0.0,
+    ):
+        if channels not in (32, 33, 34):
+            raise ValueError(f"channels must be 32, 33 or 34, got {channels}")
+        if sample_rate <= 0:
+            raise ValueError(f"sample_rate must be > 0, got {sample_rate}")
+        self.sample_rate = float(sample_rate)
+        self.channels = int(channels)
+        self.warmup_samples = int(warmup_samples)
+        self.nan_rate = float(nan_rate)
+        self.position = 0
+        # Independent generators for noise, NaN rows and NaN channels: each
+        # draws sequentially, so splitting a read does not change the stream.
+        rng = np.random.default_rng(seed)
+        self._noise_rng, self._nan_rng, self._nan_channel_rng = rng.spawn(3)
+        k = np.arange(len(ACTIVE_OD_INDICES))
+        self._offset = 1.0 + 0.01 * k
+        self._phase = rng.uniform(0.0, 2 * np.pi, k.size)
+        self._drift = rng.normal(0.0, 0.01, k.size)  # OD per minute
+
+    def read(self, n: int) -> np.ndarray:
+        n = int(n)
+        start = self.position
+        self.position += n
+        t = (start + np.arange(n))[:, np.newaxis] / self.sample_rate
+
+        # Heart rate wanders +-0.1 Hz over a minute; integrate for the phase.
+        beat = 2 * np.pi * (HEARTBEAT_HZ * t - 0.1 * 60.0 / (2 * np.pi) * np.cos(2 * np.pi * t / 60.0))
+        active = (
+            self._offset
+            + 0.02 * np.sin(beat + self._phase)
+            + 0.01 * np.sin(2 * np.pi * MAYER_HZ * t + self._phase / 2)
+            + self._drift * t / 60.0
+            + 0.03 * np.sin(2 * np.pi * 0.005 * t)
+            + self._noise_rng.normal(0.0, 0.002, (n, len(ACTIVE_OD_INDICES)))
+        )
+
+        out = np.full((n, self.channels), config.PLACEHOLDER_HI, dtype=np.float64)
+        out[:, ACTIVE_OD_INDICES] = active
+
+        warm = max(0, min(n, self.warmup_samples - start))
+        if warm:
+            out[:warm, :32] = config.PLACEHOLDER_HI
+        if self.nan_rate > 0:
+            rows = np.flatnonzero(self._nan_rng.random(n) < self.nan_rate)
+            rows = rows[rows >= warm]
+            out[rows, self._nan_channel_rng.choice(ACTIVE_OD_INDICES, rows.size)] = np.nan
+
+        if self.channels > 32:
+            out[:, 32] = 7.0
+        if self.channels > 33:
+            period = max(1, int(round(EVENT_PERIOD_S * self.sample_rate)))
+            out[:, 33] = ((start + np.arange(n)) % period == period - 1).astype(float)
+        return out
+
+
+def synthetic_od(
+    n: int,
+    sample_rate: float,
+    seed: int = 0,
+    channels: int = 34,
+    warmup_samples: int = 0,
+    nan_rate: float = 0.0,
+) -> np.ndarray:
+    # One-shot form of SyntheticOctaMon: the first n rows of its stream.
+    return SyntheticOctaMon(sample_rate, seed, channels, warmup_samples, nan_rate).read(n)
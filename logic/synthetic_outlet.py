@@ -0,0 +1,210 @@
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+import pylsl
+
+import config
+from logic.synthetic import ACTIVE_OD_INDICES, SyntheticOctaMon
+
+
+logger = logging.getLogger(__name__)
+
+
+# OxySoft-compatible LSL outlet on localhost, fed by SyntheticOctaMon. Load
+# tests point LSLClient (or the whole app) at it to exercise the real
+# acquisition path at rates far beyond the OctaMon's 10-50 Hz, with the
+# delivery faults a real network outlet has: bursty pushes, gaps in the
+# stream and an outlet that goes away and comes back.
+
+# OD columns 0..15 are Rx1 L1..L16 and 16..31 Rx2 L1..L16, in OxySoft's
+# Direct-Channel order. Odd light sources are 850 nm, even 760 nm (see
+# DataProcessor._init_od_indices).
+def od_channel_label(index: int) -> str:
+    return f"Rx{1 + index // 16}-L{index % 16 + 1}"
+
+
+def od_channel_wavelength(index: int) -> int:
+    return 850 if index % 2 == 0 else 760
+
+
+class SyntheticOutlet:
+    # Pushes the synthetic stream on a background thread, paced by
+    # local_clock(): sample k carries timestamp t0 + k / sample_rate and goes
+    # out once that time has passed, so the stream rate holds whatever the
+    # push cadence. Samples inside a gap() or a restart()'s downtime are
+    # generated and dropped, so timestamps jump across the hole exactly as
+    # they would for a device that stalls.
+    #
+    #   with SyntheticOutlet(sample_rate=1000, burst_s=0.25) as outlet:
+    #       ...connect to outlet.source_id...
+    #       outlet.gap(2.0)
+    #       outlet.restart(downtime_s=1.0)
+    #
+    # `sent` counts samples actually pushed (all restarts included).
+
+    # Push cadence when not bursting. liblsl batches anyway; this only
+    # bounds how stale the newest pushed sample can be.
+    PUSH_INTERVAL_S = 0.005
+
+    def __init__(
+        self,
+        sample_rate: float = 50.0,
+        channels: int = 34,
+        name: str = "OxySoft Synthetic",
+        source_id: str = "fnirs-synthetic",
+        seed: int = 0,
+        warmup_s: float = 0.0,
+        nan_rate: float = 0.0,
+        descriptors: bool = True,
+        burst_s: float = 0.0,
+        stream_type: Optional[str] = None,
+    ):
+        if burst_s < 0:
+            raise ValueError(f"burst_s must be >= 0, got {burst_s}")
+        self.sample_rate = float(sample_rate)
+        self.name = name
+        self.source_id = source_id
+        self.descriptors = bool(descriptors)
+        self.burst_s = float(burst_s)
+        self.stream_type = stream_type or config.STREAM_TYPE
+        self._source = SyntheticOctaMon(
+            sample_rate, seed=seed, channels=channels,
+            warmup_samples=int(round(warmup_s * sample_rate)), nan_rate=nan_rate,
+        )
+        self.channels = self._source.channels
+
+        self.sent = 0
+        self.restarts = 0
+        self._outlet: Optional[pylsl.StreamOutlet] = None
+        self._lock = threading.Lock()
+        self._sent_changed = threading.Condition(self._lock)
+        # local_clock() times: drop samples stamped before _gap_until; take
+        # the outlet down at _restart_at and bring it back after the downtime.
+        self._gap_until = 0.0
+        self._restart_at: Optional[float] = None
+        self._restart_downtime = 0.0
+        self._restart_source_id: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ---------- Lifecycle ----------
+
+    def start(self) -> "SyntheticOutlet":
+        if self._thread is not None:
+            return self
+        self._outlet = self._make_outlet()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._push_loop, name="synthetic-outlet", daemon=True)
+        self._thread.start()
+        logger.info(
+            "Synthetic outlet %r (%s) up: %d channels at %.0f Hz.",
+            self.name, self.source_id, self.channels, self.sample_rate,
+        )
+        return self
+
+    def stop(self) -> None:
+        thread = self._thread
+        self._thread = None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout=2.0)
+        self._outlet = None
+
+    def __enter__(self) -> "SyntheticOutlet":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ---------- Faults ----------
+
+    def gap(self, seconds: float) -> None:
+        # Drop the next `seconds` of samples; the outlet stays up.
+        with self._lock:
+            self._gap_until = max(self._gap_until, pylsl.local_clock() + float(seconds))
+
+    def restart(self, downtime_s: float = 0.0, source_id: Optional[str] = None) -> None:
+        # Destroy the outlet now and publish a fresh one after downtime_s,
+        # under a new source_id if given. Returns immediately; the push
+        # thread does the work. Inlets on the old outlet see the stream
+        # stop (and recover by themselves if the source_id is unchanged).
+        with self._lock:
+            self._restart_at = pylsl.local_clock()
+            self._restart_downtime = float(downtime_s)
+            self._restart_source_id = source_id
+
+    def wait_sent(self, n: int, timeout: float = 10.0) -> bool:
+        # Block until at least n samples have been pushed.
+        with self._sent_changed:
+            return self._sent_changed.wait_for(lambda: self.sent >= n, timeout)
+
+    # ---------- Push thread ----------
+
+    def _push_loop(self) -> None:
+        t0 = pylsl.local_clock()
+        pushed_until = 0  # index of the next sample to generate
+        last_push = t0
+        down_until: Optional[float] = None
+        wait_s = min(self.PUSH_INTERVAL_S, self.burst_s) if self.burst_s else self.PUSH_INTERVAL_S
+
+        while not self._stop.wait(wait_s):
+            now = pylsl.local_clock()
+            with self._lock:
+                if self._restart_at is not None:
+                    self._outlet = None
+                    if self._restart_source_id:
+                        self.source_id = self._restart_source_id
+                    down_until = self._restart_at + self._restart_downtime
+                    self._restart_at = None
+                    logger.info("Synthetic outlet down for %.1f s.", down_until - now)
+                gap_until = self._gap_until
+            if down_until is not None and now >= down_until:
+                self._outlet = self._make_outlet()
+                self.restarts += 1
+                down_until = None
+                logger.info("Synthetic outlet back up as %s.", self.source_id)
+            if self.burst_s and now - last_push < self.burst_s:
+                continue
+
+            due = int((now - t0) * self.sample_rate) + 1
+            n = due - pushed_until
+            if n <= 0:
+                continue
+            rows = self._source.read(n)
+            timestamps = t0 + (pushed_until + np.arange(n)) / self.sample_rate
+            pushed_until = due
+            last_push = now
+
+            keep = timestamps >= gap_until
+            if down_until is not None or self._outlet is None:
+                keep[:] = False
+            if keep.any():
+                self._outlet.push_chunk(rows[keep], timestamps[keep].tolist())
+            with self._sent_changed:
+                self.sent += int(keep.sum())
+                self._sent_changed.notify_all()
+
+    def _make_outlet(self) -> pylsl.StreamOutlet:
+        info = pylsl.StreamInfo(
+            self.name, self.stream_type, self.channels, self.sample_rate,
+            pylsl.cf_double64, self.source_id,
+        )
+        if self.descriptors:
+            self._describe_channels(info)
+        return pylsl.StreamOutlet(info)
+
+    def _describe_channels(self, info: pylsl.StreamInfo) -> None:
+        # Same schema LSLClient._log_channel_descriptors reads.
+        channels = info.desc().append_child("channels")
+        for i in range(32):
+            ch = channels.append_child("channel")
+            ch.append_child_value("label", od_channel_label(i))
+            ch.append_child_value("wavelength", str(od_channel_wavelength(i)))
+            ch.append_child_value("type", "OD" if i in ACTIVE_OD_INDICES else "OD (unused)")
+        for label in ("ADC", "Event")[: self.channels - 32]:
+            ch = channels.append_child("channel")
+            ch.append_child_value("label", label)
+            ch.append_child_value("type", label)
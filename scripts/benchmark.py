@@ -0,0 +1,62 @@
+"""
+Benchmarks the per-sample hot paths (DataProcessor, BandpassFilter,
+SignalQualityEvaluator, ThresholdAsymmetryDetector, SessionRecorder +
+RecordingWriter, write_snirf, PlotWidget repaint) on a synthetic OctaMon
+stream and optionally compares the result against a saved baseline.
+
+    python scripts/benchmark.py [--cases NAME...] [--rates 10 50 250 1000]
+        [--seconds S] [--seed N] [--json FILE] [--baseline FILE] [--tolerance 0.2]
+
+Exits with status 1 when --baseline is given and any case got slower by more
+than --tolerance (a fraction of its baseline samples/s).
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Allow `import config` etc. when run as a script.
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# The plot case needs a QApplication but never shows anything.
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from logic.benchmark import CASES, RATES_HZ, compare, load_report, run_benchmarks, save_report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), help="cases to run (default: all)")
+    parser.add_argument("--rates", type=float, nargs="+", default=list(RATES_HZ), help="stream rates in Hz")
+    parser.add_argument("--seconds", type=float, default=60.0, help="seconds of stream per case and rate (default 60)")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic stream seed")
+    parser.add_argument("--json", default=None, help="write the report here")
+    parser.add_argument("--baseline", default=None, help="report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed samples/s drop vs the baseline (default 0.2)")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.cases, args.rates, args.seconds, args.seed, progress=print)
+    if args.json:
+        save_report(report, args.json)
+        print(f"Report written to {args.json}")
+
+    failed = [r for r in report["results"] if "error" in r]
+    if args.baseline:
+        regressions = compare(report, load_report(args.baseline), args.tolerance)
+        for r in regressions:
+            if r["error"]:
+                print(f"REGRESSION {r['case']} @ {r['rate_hz']:.0f} Hz: {r['error']}")
+            else:
+                print(f"REGRESSION {r['case']} @ {r['rate_hz']:.0f} Hz: "
+                      f"{r['samples_per_s']:,.0f} samples/s vs {r['baseline_samples_per_s']:,.0f} "
+                      f"({r['change']:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,7 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 import config
 from logic.data_processor import DataProcessor
+from utils.session_loader import read_oxysoft_table
 
 
 DEFAULT_REFERENCE_DIR = Path(r"C:\Users\BARBIC\Desktop\Work\fNIRS\oxysoft 3.2.72")
@@ -23,31 +24,8 @@ NOTRAW_FILE = "1127_2025_ExperimentNOTRAW.txt"
 
 
 def parse_oxysoft_table(path: Path, n_samples: int) -> np.ndarray:
-    rows = []
-    with open(path, "r", encoding="utf-8") as f:
-        seen_col_idx = False
-        for raw_line in f:
-            stripped = raw_line.strip()
-            if not stripped:
-                continue
-            cells = stripped.split()
-            if not seen_col_idx:
-                try:
-                    nums = [int(c) for c in cells]
-                except ValueError:
-                    continue
-                if nums and nums == list(range(1, len(nums) + 1)):
-                    seen_col_idx = True
-                continue
-            try:
-                values = [float(c) for c in cells]
-            except ValueError:
-                continue
-            rows.append(values)
-            if len(rows) >= n_samples + 1:
-                break
-    arr = np.array(rows, dtype=float)
-    return arr[:, 1:]  # drop sample column
+    values, _ = read_oxysoft_table(str(path), max_rows=n_samples + 1)
+    return values[:, 1:]  # drop sample column
 
 
 def replay_with_coefficients(raw_array: np.ndarray, ext_coefs: dict, dpf: float, distance: float) -> np.ndarray:
@@ -0,0 +1,37 @@
+"""
+Regenerates the OxySoft-style raw_od.tsv and calculated.tsv for a recording
+made with RECORDING_FORMAT = "binary" (or "both") from its session.npy store.
+
+    python scripts/export_session_tsv.py <session folder> [--out DIR] [--overwrite]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Allow `import config` etc. when run as a script.
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.session_recorder import export_tsv
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("session_folder", help="recording folder holding metadata.json and session.npy")
+    parser.add_argument("--out", default=None, help="output folder (default: the session folder)")
+    parser.add_argument("--overwrite", action="store_true", help="replace existing TSV files")
+    args = parser.parse_args()
+
+    try:
+        raw_path, calc_path = export_tsv(args.session_folder, args.out, overwrite=args.overwrite)
+    except FileExistsError as ex:
+        print(f"{ex} already exists; pass --overwrite to replace it.", file=sys.stderr)
+        return 1
+    print(raw_path)
+    print(calc_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Replays recorded sessions through the processing pipeline (MBLL, filter,
+signal quality, load detector) headlessly and as fast as the CPU allows,
+writing the processed Hb, quality and alert timelines to an .npz per input.
+
+    python scripts/replay_session.py <session folder | export .txt>... [--settings FILE]
+        [--out DIR] [--rate HZ] [--calibrate-at S | --no-calibrate] [--jobs N]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Allow `import config` etc. when run as a script.
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import user_settings
+from logic.replay import load_replay_input, replay, save_replay, summarize
+
+
+def _output_path(source: str, out_dir) -> str:
+    source = os.path.normpath(source)
+    name = os.path.basename(source) if os.path.isdir(source) else os.path.splitext(os.path.basename(source))[0]
+    if out_dir:
+        return os.path.join(out_dir, f"{name}.replay.npz")
+    if os.path.isdir(source):
+        return os.path.join(source, "replay.npz")
+    return os.path.splitext(source)[0] + ".replay.npz"
+
+
+def _replay_one(source: str, out_path: str, settings: dict, rate, calibrate_at) -> tuple:
+    od, timestamps, sample_rate = load_replay_input(source, rate)
+    t0 = time.perf_counter()
+    result = replay(od, sample_rate, timestamps, calibrate_at_s=calibrate_at, settings=settings)
+    elapsed = time.perf_counter() - t0
+    save_replay(out_path, result)
+    return summarize(result), elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="recording folders or OxySoft-style text exports")
+    parser.add_argument("--settings", default=None, help="settings.json to replay with (default: built-in defaults + your settings)")
+    parser.add_argument("--out", default=None, help="output folder (default: next to each input)")
+    parser.add_argument("--rate", type=float, default=None, help="sample rate in Hz (default: from metadata.json, else config)")
+    parser.add_argument("--calibrate-at", type=float, default=0.0, help="seconds into the replay to start detector calibration (default 0)")
+    parser.add_argument("--no-calibrate", action="store_true", help="never calibrate; the detector stays nominal")
+    parser.add_argument("--jobs", type=int, default=1, help="inputs replayed in parallel (default 1)")
+    args = parser.parse_args()
+
+    settings = user_settings.load(Path(args.settings)) if args.settings else {}
+    calibrate_at = None if args.no_calibrate else args.calibrate_at
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+
+    jobs = [(src, _output_path(src, args.out), settings, args.rate, calibrate_at) for src in args.inputs]
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = [pool.submit(_replay_one, *job) for job in jobs]
+        for job, future in zip(jobs, futures):
+            try:
+                summary, elapsed = future.result()
+            except Exception as ex:
+                print(f"{job[0]}: failed ({ex})", file=sys.stderr)
+                failed += 1
+                continue
+            rate = summary["samples"] / elapsed if elapsed > 0 else float("inf")
+            states = ", ".join(f"{k} {v:.1f} s" for k, v in summary["seconds_in_state"].items() if v)
+            print(f"{job[1]}: {summary['samples']} samples in {elapsed:.2f} s ({rate:.0f}/s); "
+                  f"{summary['alert_transitions']} alert transitions; {states}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Sweeps load-detector settings over recorded sessions and reports, per
+configuration, alerts per minute, mean alert dwell time, the fraction of
+monitoring time in load, and time to first alert.
+
+    python scripts/sweep_detector.py <session folder | export .txt>... --k-sd 1 1.5 2
+        [--active-window-s ...] [--min-elevated-channels ...] [--hhb-tol-um ...]
+        [--rest-window-s ...] [--calibrate-at S] [--settings FILE] [--jobs N] [--csv FILE]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from pathlib import Path
+
+# Allow `import config` etc. when run as a script.
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import user_settings
+from logic.detector_sweep import parameter_grid, prepare_sessions, sweep
+
+
+# Command-line option -> swept setting.
+OPTIONS = {
+    "rest_window_s": "LOAD_DETECTOR_REST_WINDOW_S",
+    "active_window_s": "LOAD_DETECTOR_ACTIVE_WINDOW_S",
+    "k_sd": "LOAD_DETECTOR_K_SD",
+    "min_elevated_channels": "LOAD_DETECTOR_MIN_ELEVATED_CHANNELS",
+    "hhb_tol_um": "LOAD_DETECTOR_HHB_TOL_UM",
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="recording folders or OxySoft-style text exports")
+    parser.add_argument("--rest-window-s", type=float, nargs="+", help="calibration window lengths (s)")
+    parser.add_argument("--active-window-s", type=float, nargs="+", help="active window lengths (s)")
+    parser.add_argument("--k-sd", type=float, nargs="+", help="elevation thresholds (baseline SDs)")
+    parser.add_argument("--min-elevated-channels", type=int, nargs="+", help="right-hemisphere channel counts")
+    parser.add_argument("--hhb-tol-um", type=float, nargs="+", help="HHb gate tolerances (uM)")
+    parser.add_argument("--calibrate-at", type=float, default=0.0, help="seconds into each session to start calibration (default 0)")
+    parser.add_argument("--settings", default=None, help="settings.json for the processing pipeline and unswept detector settings")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes (default: all cores)")
+    parser.add_argument("--csv", default=None, help="write the results table here instead of stdout")
+    args = parser.parse_args()
+
+    values = {key: getattr(args, opt) for opt, key in OPTIONS.items() if getattr(args, opt)}
+    if not values:
+        parser.error("give at least one setting to sweep")
+    settings = user_settings.load(Path(args.settings)) if args.settings else {}
+    grid = [{**settings, **cfg} for cfg in parameter_grid(values)]
+
+    t0 = time.perf_counter()
+    data = prepare_sessions(args.inputs, calibrate_at_s=args.calibrate_at, settings=settings)
+    t1 = time.perf_counter()
+    results = sweep(data, grid, jobs=args.jobs)
+    t2 = time.perf_counter()
+    print(f"{len(args.inputs)} sessions ({data['o2hb'].shape[0]} samples) prepared in {t1 - t0:.1f} s; "
+          f"{len(grid)} configurations in {t2 - t1:.1f} s with {args.jobs} processes.", file=sys.stderr)
+
+    columns = list(values) + ["alerts_per_min", "mean_dwell_s", "load_fraction",
+                              "time_to_first_alert_s", "sessions_alerted", "monitored_s"]
+    out = open(args.csv, "w", newline="", encoding="utf-8") if args.csv else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Publishes a synthetic OxySoft-compatible NIRS stream on localhost, for load
+testing the app (or LSLClient alone) without a device and at rates far above
+the OctaMon's. Optionally injects delivery faults on a schedule.
+
+    python scripts/synthetic_outlet.py [--rate 50] [--channels 34]
+        [--source-id ID] [--seed N] [--warmup-s S] [--nan-rate P]
+        [--no-descriptors] [--burst-s S] [--gap-every S --gap-s S]
+        [--restart-every S --downtime-s S [--new-source-id]] [--duration S]
+
+Runs until Ctrl+C (or --duration), printing the samples sent every 5 s.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Allow `import config` etc. when run as a script.
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from logic.synthetic_outlet import SyntheticOutlet
+
+
+REPORT_INTERVAL_S = 5.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=50.0, help="nominal rate in Hz (default 50)")
+    parser.add_argument("--channels", type=int, choices=(32, 33, 34), default=34, help="32 OD [+ ADC [+ Event]]")
+    parser.add_argument("--name", default="OxySoft Synthetic", help="stream name")
+    parser.add_argument("--source-id", default="fnirs-synthetic", help="stream source_id")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic stream seed")
+    parser.add_argument("--warmup-s", type=float, default=2.0, help="seconds of placeholder warm-up (default 2)")
+    parser.add_argument("--nan-rate", type=float, default=0.0, help="fraction of rows with one NaN OD value")
+    parser.add_argument("--no-descriptors", action="store_true", help="publish no per-channel metadata")
+    parser.add_argument("--burst-s", type=float, default=0.0, help="push in bursts this far apart (default: smooth)")
+    parser.add_argument("--gap-every", type=float, default=0.0, help="drop samples every this many seconds")
+    parser.add_argument("--gap-s", type=float, default=1.0, help="length of each gap (default 1)")
+    parser.add_argument("--restart-every", type=float, default=0.0, help="restart the outlet every this many seconds")
+    parser.add_argument("--downtime-s", type=float, default=2.0, help="outlet downtime per restart (default 2)")
+    parser.add_argument("--new-source-id", action="store_true", help="publish each restart under a new source_id")
+    parser.add_argument("--duration", type=float, default=0.0, help="stop after this many seconds (default: never)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    outlet = SyntheticOutlet(
+        args.rate, channels=args.channels, name=args.name, source_id=args.source_id,
+        seed=args.seed, warmup_s=args.warmup_s, nan_rate=args.nan_rate,
+        descriptors=not args.no_descriptors, burst_s=args.burst_s,
+    )
+
+    started = time.monotonic()
+    next_report = started + REPORT_INTERVAL_S
+    next_gap = started + args.gap_every if args.gap_every > 0 else None
+    next_restart = started + args.restart_every if args.restart_every > 0 else None
+    with outlet:
+        try:
+            while not args.duration or time.monotonic() - started < args.duration:
+                time.sleep(0.1)
+                now = time.monotonic()
+                if next_gap is not None and now >= next_gap:
+                    print(f"Gap of {args.gap_s:.1f} s.")
+                    outlet.gap(args.gap_s)
+                    next_gap += args.gap_every
+                if next_restart is not None and now >= next_restart:
+                    source_id = f"{args.source_id}-{outlet.restarts + 1}" if args.new_source_id else None
+                    print(f"Restarting outlet ({args.downtime_s:.1f} s down).")
+                    outlet.restart(args.downtime_s, source_id)
+                    next_restart += args.restart_every
+                if now >= next_report:
+                    print(f"{outlet.sent:,} samples sent as {outlet.source_id}.")
+                    next_report += REPORT_INTERVAL_S
+        except KeyboardInterrupt:
+            pass
+    print(f"Stopped after {outlet.sent:,} samples.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+# Helpers shared by several test modules. Plain functions rather than
+# fixtures: the tests call them with their own sizes and seeds.
+
+import numpy as np
+
+import config
+from logic.synthetic import ACTIVE_OD_INDICES
+
+
+SAMPLE_RATE = 50.0
+
+
+def od_stream(n: int, seed: int = 3) -> np.ndarray:
+    # (n, 34) rows: 32 OD with a heartbeat-ish wobble on the active channels,
+    # placeholders elsewhere, then ADC + Event. Kept simpler than
+    # logic.synthetic's stream; the detector tests are tuned to this one.
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / SAMPLE_RATE
+    out = np.full((n, 34), config.PLACEHOLDER_HI, dtype=float)
+    for k, i in enumerate(ACTIVE_OD_INDICES):
+        out[:, i] = (
+            1.0 + 0.01 * k
+            + 0.02 * np.sin(2 * np.pi * 1.2 * t + k)
+            + 0.05 * np.sin(2 * np.pi * 0.05 * t)
+            + rng.normal(0, 0.002, n)
+        )
+    out[:, 32] = 7.0
+    out[:, 33] = 0.0
+    return out
+
+
+def with_gaps(samples: np.ndarray) -> np.ndarray:
+    # Leading placeholder warm-up, plus a NaN row and a placeholder row mid-stream.
+    samples = samples.copy()
+    samples[:5, :32] = config.PLACEHOLDER_HI
+    samples[40, 3] = np.nan
+    samples[77, :32] = config.PLACEHOLDER_HI
+    return samples
+
+
+def cfg_snapshot() -> dict:
+    # Recorder config snapshot with the stock OctaMon constants.
+    return {
+        "DPF": 6.56,
+        "INTEROPTODE_DISTANCE": 3.5,
+        "WAVELENGTH_ORDER": ("850nm", "760nm"),
+        "EXTINCTION_COEFFICIENTS": {
+            "760nm": {"O2Hb": 0.586, "HHb": 1.548},
+            "850nm": {"O2Hb": 1.058, "HHb": 0.781},
+        },
+        "CHANNEL_NAMES": ["L1", "L2", "L3", "L4", "R1", "R2", "R3", "R4"],
+    }
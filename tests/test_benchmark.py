@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import config
+from logic.benchmark import chunk_size, compare, run_benchmarks
+from logic.synthetic import ACTIVE_OD_INDICES, SyntheticOctaMon, synthetic_od
+
+
+def test_synthetic_stream_is_deterministic_and_chunking_independent():
+    whole = synthetic_od(500, 50.0, seed=4, warmup_samples=20, nan_rate=0.01)
+    gen = SyntheticOctaMon(50.0, seed=4, warmup_samples=20, nan_rate=0.01)
+    pieces = np.vstack([gen.read(n) for n in (7, 13, 100, 380)])
+    np.testing.assert_array_equal(np.isnan(whole), np.isnan(pieces))
+    np.testing.assert_allclose(np.nan_to_num(whole), np.nan_to_num(pieces), rtol=0, atol=1e-12)
+
+    assert np.all(whole[:20, :32] == config.PLACEHOLDER_HI)
+    inactive = [i for i in range(32) if i not in ACTIVE_OD_INDICES]
+    assert np.all(whole[:, inactive] == config.PLACEHOLDER_HI)
+    assert np.isnan(whole[20:]).any() and not np.isnan(whole[:20]).any()
+
+
+def test_synthetic_channel_counts():
+    assert synthetic_od(10, 10.0, channels=32).shape == (10, 32)
+    assert synthetic_od(10, 10.0, channels=33)[:, 32].tolist() == [7.0] * 10
+    with pytest.raises(ValueError):
+        synthetic_od(10, 10.0, channels=16)
+
+
+def test_chunk_size_follows_the_pull_timeout():
+    assert chunk_size(10) == 1
+    assert chunk_size(1000) == min(config.LSL_PULL_MAX_SAMPLES, round(1000 * config.LSL_PULL_TIMEOUT_S))
+
+
+def test_report_and_baseline_comparison():
+    report = run_benchmarks(["data_processor", "load_detector"], rates_hz=(50,), seconds=4)
+    assert [r["case"] for r in report["results"]] == ["data_processor", "load_detector"]
+    for entry in report["results"]:
+        assert "error" not in entry
+        assert entry["samples_per_s"] > 0 and entry["p99_us_per_call"] >= entry["p50_us_per_call"]
+
+    assert compare(report, report) == []
+    faster = {"results": [dict(r, samples_per_s=r["samples_per_s"] * 2) for r in report["results"]]}
+    regressions = compare(report, faster, tolerance=0.2)
+    assert [r["case"] for r in regressions] == ["data_processor", "load_detector"]
+    assert regressions[0]["change"] == pytest.approx(-0.5)
@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+import config
+from logic.data_processor import (
+    DataProcessor,
+    SAMPLE_INVALID,
+    SAMPLE_OK,
+    SAMPLE_PLACEHOLDER,
+    SAMPLE_WARMING_UP,
+)
+from logic.signal_quality import quality_names
+from utils.enums import CognitiveState
+from tests.helpers import SAMPLE_RATE, od_stream, with_gaps
+
+
+RULES = {"threshold": 1e9, "duration": 1}
+
+
+def _per_sample(dp: DataProcessor, samples: np.ndarray):
+    return [dp.process_sample_od(row.tolist(), RULES) for row in samples]
+
+
+def _chunked(dp: DataProcessor, samples: np.ndarray, chunk: int):
+    outs = []
+    for start in range(0, samples.shape[0], chunk):
+        outs.append(dp.process_chunk_od(samples[start:start + chunk]))
+    return {
+        key: np.concatenate([o[key] for o in outs])
+        for key in ("status", "O2Hb", "HHb", "O2Hb_raw", "HHb_raw", "quality", "alert_state")
+    }
+
+
+def _make_processor(mode: str) -> DataProcessor:
+    dp = DataProcessor()
+    dp.set_sample_rate(SAMPLE_RATE)
+    dp.set_baseline_mode(mode)
+    if mode == "window":
+        dp.baseline_window_samples = 20
+    return dp
+
+
+@pytest.mark.parametrize("mode", ["single_sample", "window"])
+@pytest.mark.parametrize("chunk", [1, 7, 64])
+def test_chunk_output_is_bit_identical_to_per_sample(mode, chunk):
+    samples = with_gaps(od_stream(400))
+
+    ref = _per_sample(_make_processor(mode), samples)
+    got = _chunked(_make_processor(mode), samples, chunk)
+
+    for i, r in enumerate(ref):
+        status = got["status"][i]
+        if r is None:
+            assert status in (SAMPLE_PLACEHOLDER, SAMPLE_INVALID), i
+            continue
+        if r["alert_state"] == CognitiveState.WARMING_UP:
+            assert status == SAMPLE_WARMING_UP, i
+            assert r["O2Hb_raw"] is None
+            continue
+        assert status == SAMPLE_OK, i
+        assert np.array_equal(got["O2Hb"][i], r["O2Hb"]), i
+        assert np.array_equal(got["HHb"][i], r["HHb"]), i
+        assert np.array_equal(got["O2Hb_raw"][i], r["O2Hb_raw"]), i
+        assert np.array_equal(got["HHb_raw"][i], r["HHb_raw"]), i
+        assert quality_names(got["quality"][i]) == r["quality"], i
+        assert got["alert_state"][i] == r["alert_state"], i
+
+
+def test_status_codes_mark_skipped_rows():
+    dp = _make_processor("single_sample")
+    samples = with_gaps(od_stream(100))
+    out = dp.process_chunk_od(samples, timestamps=np.arange(100) / SAMPLE_RATE)
+
+    assert (out["status"][:5] == SAMPLE_PLACEHOLDER).all()
+    assert out["status"][40] == SAMPLE_INVALID
+    assert out["status"][77] == SAMPLE_PLACEHOLDER
+    assert out["status"][5] == SAMPLE_OK
+    # Skipped rows carry no concentrations; the first valid row is the baseline.
+    assert np.isnan(out["O2Hb_raw"][40]).all()
+    assert np.allclose(out["O2Hb_raw"][5], 0.0)
+    assert out["timestamps"].shape == (100,)
+
+
+def test_nan_row_does_not_disturb_processing_state():
+    samples = od_stream(60)
+    clean = _make_processor("single_sample").process_chunk_od(np.delete(samples, 30, axis=0))
+
+    dirty = samples.copy()
+    dirty[30, 0] = np.inf
+    got = _make_processor("single_sample").process_chunk_od(dirty)
+
+    assert np.array_equal(np.delete(got["O2Hb"], 30, axis=0), clean["O2Hb"])
+
+
+def test_rejects_short_rows():
+    dp = _make_processor("single_sample")
+    with pytest.raises(ValueError):
+        dp.process_chunk_od(np.ones((4, 31)))
+
+
+def test_mbll_projection_matches_per_channel_formula():
+    dp = _make_processor("single_sample")
+    rng = np.random.default_rng(11)
+    delta16 = rng.normal(0, 0.01, (5, 16))
+
+    got = dp.calculate_hemoglobin(delta16)
+
+    inv = dp.inverse_extinction_matrix
+    path = config.DPF * config.INTEROPTODE_DISTANCE
+    for ch in range(8):
+        d850, d760 = delta16[:, 2 * ch], delta16[:, 2 * ch + 1]
+        assert np.allclose(got["O2Hb"][:, ch], (inv[0, 0] * d760 + inv[0, 1] * d850) / path * 1000.0)
+        assert np.allclose(got["HHb"][:, ch], (inv[1, 0] * d760 + inv[1, 1] * d850) / path * 1000.0)
+
+
+def test_mbll_projection_follows_settings(monkeypatch):
+    dp = _make_processor("single_sample")
+    delta16 = np.full(16, 0.01)
+    before = dp.calculate_hemoglobin(delta16)["O2Hb"]
+
+    monkeypatch.setattr(config, "DPF", config.DPF * 2)
+    # Cached until the constants are rebuilt (as reload_settings does).
+    assert np.array_equal(dp.calculate_hemoglobin(delta16)["O2Hb"], before)
+    dp._init_mbll_constants()
+    assert np.allclose(dp.calculate_hemoglobin(delta16)["O2Hb"], before / 2)
+
+
+def test_chunk_stages_are_profiled():
+    processor = _make_processor("single_sample")
+    processor.process_chunk_od(od_stream(50))
+
+    summary = processor.profiler.summary()
+    assert list(summary) == ["mapping", "baseline", "mbll", "filter", "quality", "detector"]
+    assert summary["mapping"]["samples"] == 50
+    assert all(row["max_ms"] >= row["mean_ms"] >= 0.0 for row in summary.values())
+
+    processor.profiler.enabled = False
+    processor.process_chunk_od(od_stream(50))
+    assert processor.profiler.summary()["mapping"]["calls"] == 1
@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+import pytest
+
+from config.schema import SettingsValidationError
+from logic.data_processor import SAMPLE_OK
+from logic.detector_sweep import parameter_grid, prepare_sessions, run_detector, sweep
+from logic.replay import replay
+from tests.helpers import SAMPLE_RATE, od_stream
+
+
+SHORT = {"LOAD_DETECTOR_REST_WINDOW_S": 10.0, "LOAD_DETECTOR_ACTIVE_WINDOW_S": 2.0}
+
+
+def _session_file(tmp_path, n, seed):
+    # An OxySoft-style text export of a synthetic OD stream.
+    od = od_stream(n, seed=seed)[:, :32]
+    path = tmp_path / f"session_{seed}.txt"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Data rate (Hz):\t50\n\n")
+        f.write("\t".join(str(i) for i in range(1, 34)) + "\n")
+        for i, row in enumerate(od):
+            f.write(f"{i}\t" + "\t".join(f"{v:.6f}" for v in row) + "\n")
+    return str(path)
+
+
+def test_detector_run_matches_the_live_pipeline():
+    od = od_stream(2000)[:, :32]
+    live = replay(od, SAMPLE_RATE, calibrate_at_s=1.0, settings=SHORT)
+    ok = live["status"] == SAMPLE_OK
+
+    detector_only = replay(od, SAMPLE_RATE, calibrate_at_s=None)
+    states = run_detector(
+        SHORT, detector_only["o2hb"][ok], detector_only["hhb"][ok], detector_only["quality"][ok],
+        SAMPLE_RATE, calibrate_row=int(np.count_nonzero(ok[:50])),
+    )
+    assert np.array_equal(states, live["alert"][ok])
+
+
+def test_sweep_is_the_same_in_parallel(tmp_path):
+    paths = [_session_file(tmp_path, 1500, seed) for seed in (1, 2)]
+    data = prepare_sessions(paths, calibrate_at_s=0.0)
+    assert [s["sample_rate"] for s in data["sessions"]] == [50.0, 50.0]
+    assert data["o2hb"].shape == (3000, 8)
+
+    grid = [{**SHORT, **cfg} for cfg in parameter_grid({
+        "LOAD_DETECTOR_K_SD": [0.2, 5.0],
+        "LOAD_DETECTOR_MIN_ELEVATED_CHANNELS": [1, 4],
+    })]
+    serial = sweep(data, grid, jobs=1)
+    parallel = sweep(data, grid, jobs=2)
+    assert len(serial) == 4
+    for a, b in zip(serial, parallel):
+        assert a.keys() == b.keys()
+        for key in a:
+            assert a[key] == b[key] or (math.isnan(a[key]) and math.isnan(b[key]))
+
+    assert serial[0]["monitored_s"] == pytest.approx(2 * (30.0 - 10.0))
+    assert serial[0]["alerts_per_min"] > serial[3]["alerts_per_min"]
+
+
+def test_grid_is_validated():
+    assert len(parameter_grid({"LOAD_DETECTOR_K_SD": [1.0, 2.0], "LOAD_DETECTOR_HHB_TOL_UM": [0.1, 0.5, 1.0]})) == 6
+    with pytest.raises(ValueError):
+        parameter_grid({"FILTER_ORDER": [2]})
+    with pytest.raises(SettingsValidationError):
+        parameter_grid({"LOAD_DETECTOR_K_SD": [-1.0]})
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from logic.latency import LatencyHistogram, LatencyTracker
+
+
+def test_histogram_percentiles_within_one_bin():
+    hist = LatencyHistogram()
+    values = np.linspace(0.001, 0.100, 1000)
+    for value in values:
+        hist.record(value)
+
+    assert hist.n == 1000
+    for q in (50, 95, 99):
+        # Upper bin edge: never below the true percentile, at most one bin
+        # (10**(1/20) ~ 12%) above it.
+        exact = np.percentile(values, q)
+        assert exact <= hist.percentile(q) <= exact * 10 ** (1 / 20) + 1e-12
+    assert hist.max_s == pytest.approx(0.100)
+
+
+def test_histogram_overflow_and_negative_values():
+    hist = LatencyHistogram()
+    hist.record(-0.002)
+    hist.record(500.0)
+
+    assert hist.percentile(0) == pytest.approx(LatencyHistogram.EDGES_S[0])
+    assert hist.percentile(100) == 500.0
+
+
+def test_tracker_summary_skips_unknown_latencies():
+    tracker = LatencyTracker()
+    tracker.record("pull", None)
+    tracker.record("processed", 0.010)
+
+    summary = tracker.summary()
+    assert summary["pull"] == {
+        "n": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None,
+    }
+    assert summary["processed"]["n"] == 1
+    assert summary["processed"]["p50_ms"] == pytest.approx(10.0)
+
+    tracker.reset()
+    assert tracker.summary()["processed"]["n"] == 0
@@ -191,3 +191,88 @@ class TestSampleRateChange:
         # active_window_s=1.0 at fs=100 -> 100 samples maxlen
         assert det._active_o2.maxlen == 100
         assert det._active_hhb.maxlen == 100
+
+    def test_resize_keeps_most_recent_samples(self):
+        det = _make_detector()
+        _calibrate_quiet(det)
+        for i in range(50):
+            det.update(np.full(8, float(i)), np.zeros(8), _green_quality())
+        det.set_sample_rate(20.0)  # active window shrinks to 20 samples
+        assert np.allclose(det._active_o2.mean(), np.mean(np.arange(30, 50)))
+
+
+class TestRunningWindow:
+    def test_running_mean_matches_full_mean(self):
+        from logic.load_detector import _RunningWindow
+
+        rng = np.random.default_rng(5)
+        data = rng.normal(1e3, 1.0, size=(1000, 8))
+        win = _RunningWindow(64, 8)
+        for k, vec in enumerate(data):
+            win.push(vec)
+            expected = data[max(0, k - 63): k + 1].mean(axis=0)
+            assert np.allclose(win.mean(), expected, rtol=0, atol=1e-9)
+        assert np.array_equal(win.values(), data[-64:])
+
+
+class TestCalibrationStats:
+    def test_streaming_baseline_matches_batch_statistics(self):
+        det = _make_detector()
+        rng = np.random.default_rng(9)
+        n = int(REST_S * SAMPLE_RATE)
+        o2 = rng.normal(0.3, 0.2, size=(n, 8))
+        hhb = rng.normal(-0.1, 0.05, size=(n, 8))
+
+        det.start_calibration()
+        for k in range(n):
+            det.update(o2[k], hhb[k], _green_quality())
+
+        summary = det.baseline_summary
+        asym = o2[:, list(RIGHT_INDICES)].mean(axis=1) - o2[:, list(LEFT_INDICES)].mean(axis=1)
+        assert np.allclose(summary["mean_o2hb"], o2.mean(axis=0))
+        assert np.allclose(summary["std_o2hb"], o2.std(axis=0, ddof=1))
+        assert np.allclose(summary["mean_hhb"], hhb.mean(axis=0))
+        assert np.isclose(summary["asymmetry_mean"], asym.mean())
+        assert np.isclose(summary["asymmetry_std"], asym.std(ddof=1))
+
+
+class TestOfflineEvaluation:
+    def _stream(self, det, o2, hhb, quality, calibrate_at):
+        states = []
+        for k in range(o2.shape[0]):
+            if k == calibrate_at:
+                det.start_calibration()
+            states.append(det.update(o2[k], hhb[k], quality[k]))
+        return states
+
+    @pytest.mark.parametrize("overrides, calibrate_at", [
+        ({}, 0),
+        ({"k_sd": 0.5, "min_elevated_channels": 1}, 37),
+        ({"active_window_s": 0.02, "hhb_tol_um": 0.1}, 5),
+        ({"rest_window_s": 0.02}, 0),  # one-sample calibration
+    ])
+    def test_matches_streaming_updates(self, overrides, calibrate_at):
+        rng = np.random.default_rng(11)
+        n = 1200
+        t = np.arange(n) / SAMPLE_RATE
+        o2 = rng.normal(0.0, 0.1, size=(n, 8))
+        # Right-PFC elevation in alternate 3 s blocks after calibration.
+        o2[:, list(RIGHT_INDICES)] += 0.4 * ((t // 3.0) % 2 == 1)[:, None]
+        hhb = rng.normal(0.0, 0.05, size=(n, 8))
+        hhb[600:700] += 1.0  # motion artifact: HHb gate
+        quality = rng.choice([0, 1, 2], size=(n, 8), p=[0.1, 0.1, 0.8]).astype(np.uint8)
+
+        streamed = self._stream(_make_detector(**overrides), o2, hhb, quality, calibrate_at)
+        offline = _make_detector(**overrides).evaluate_offline(o2, hhb, quality, calibrate_at)
+        assert list(offline) == streamed
+        assert CognitiveState.LOAD in streamed
+
+    def test_uncalibrated_and_short_sessions(self):
+        det = _make_detector()
+        o2 = np.ones((150, 8))
+        assert set(det.evaluate_offline(o2, o2, None, calibrate_at=None)) == {CognitiveState.NOMINAL}
+        # Calibration never completes: everything from its start is CALIBRATING.
+        states = det.evaluate_offline(o2[:80], o2[:80], None, calibrate_at=10)
+        assert list(states) == [CognitiveState.NOMINAL] * 10 + [CognitiveState.CALIBRATING] * 70
+        # The detector's own streaming state is untouched.
+        assert not det.is_calibrating and not det.is_calibrated
@@ -0,0 +1,132 @@
+"""
+Unit tests for LSLClient's blocking acquisition loop. A scripted fake inlet
+stands in for pylsl.StreamInlet; the loop runs synchronously on the test
+thread, so its signals are delivered directly.
+"""
+
+import numpy as np
+import pylsl
+
+from logic.lsl_client import LSLClient
+
+
+class _FakeInfo:
+    def __init__(self, channel_count, channel_format):
+        self._channel_count = channel_count
+        self._channel_format = channel_format
+
+    def channel_count(self):
+        return self._channel_count
+
+    def channel_format(self):
+        return self._channel_format
+
+
+class _ScriptedInlet:
+    # Serves the given chunks in order, then returns nothing. Mirrors the
+    # pylsl 1.17 pull_chunk contract for dest_obj: rows are written into the
+    # caller's buffer and samples comes back as None.
+    def __init__(self, chunks, channel_count=34, channel_format=pylsl.cf_double64):
+        self._chunks = list(chunks)
+        self._info = _FakeInfo(channel_count, channel_format)
+        self._t = 0.0
+        self.dest_objs = set()
+
+    def info(self):
+        return self._info
+
+    def time_correction(self, timeout=None):
+        return 0.0
+
+    def pull_chunk(self, timeout=0.0, max_samples=1024, dest_obj=None):
+        if not self._chunks:
+            return ([] if dest_obj is None else None), []
+        rows = self._chunks.pop(0)
+        if len(rows) > max_samples:
+            # Whatever does not fit stays queued, as in liblsl.
+            self._chunks.insert(0, rows[max_samples:])
+            rows = rows[:max_samples]
+        timestamps = [self._t + i * 0.02 for i in range(len(rows))]
+        self._t += 0.02 * len(rows)
+        if dest_obj is None:
+            return rows.tolist(), timestamps
+        self.dest_objs.add(dest_obj.__array_interface__["data"][0])
+        dest_obj[: len(rows)] = rows
+        return None, timestamps
+
+    def close_stream(self):
+        pass
+
+
+def _run(client, inlet, monkeypatch, watchdog_ms=50):
+    monkeypatch.setattr("config.LSL_PULL_TIMEOUT_S", 0.005)
+    monkeypatch.setattr("config.LSL_PULL_MAX_SAMPLES", 16)
+    monkeypatch.setattr(LSLClient, "WATCHDOG_MS", watchdog_ms)
+    chunks, disconnects = [], []
+    client.new_data_ready.connect(chunks.append)
+    client.disconnected.connect(lambda: disconnects.append(True))
+    client.inlet = inlet
+    client._acquisition_loop(inlet, client._acq_stop, client._acq_generation)
+    return chunks, disconnects
+
+
+def test_chunks_land_in_a_preallocated_buffer(monkeypatch):
+    rows = np.arange(20 * 34, dtype=float).reshape(20, 34)
+    inlet = _ScriptedInlet([rows[:2], rows[2:]])
+    chunks, _ = _run(LSLClient(), inlet, monkeypatch)
+
+    # max_samples=16 splits the second chunk; nothing is lost or reordered.
+    assert [len(c) for c in chunks] == [2, 16, 2]
+    assert np.array_equal(np.concatenate([c.samples for c in chunks]), rows)
+    # Unreleased chunks each occupy their own ring slot.
+    assert len(inlet.dest_objs) == 3
+    assert not np.shares_memory(chunks[0].samples, chunks[1].samples)
+    # Latency is reported once a time correction is known.
+    assert chunks[-1].latency_s is not None
+
+
+def test_released_slots_are_reused(monkeypatch):
+    rows = np.arange(6 * 34, dtype=float).reshape(6, 34)
+    inlet = _ScriptedInlet([rows[:2], rows[2:4], rows[4:]])
+    client = LSLClient()
+    client.new_data_ready.connect(lambda chunk: chunk.release())
+    chunks, _ = _run(client, inlet, monkeypatch)
+
+    assert len(chunks) == 3
+    assert len(inlet.dest_objs) == 1
+
+
+def test_string_streams_fall_back_to_list_pulls(monkeypatch):
+    rows = np.ones((3, 34))
+    inlet = _ScriptedInlet([rows], channel_format=pylsl.cf_string)
+    chunks, _ = _run(LSLClient(), inlet, monkeypatch)
+
+    assert len(chunks) == 1
+    assert np.array_equal(chunks[0].samples, rows)
+    assert inlet.dest_objs == set()
+
+
+def test_watchdog_fires_when_samples_stop(monkeypatch):
+    inlet = _ScriptedInlet([np.ones((2, 34))])
+    client = LSLClient()
+    chunks, disconnects = _run(client, inlet, monkeypatch)
+
+    assert len(chunks) == 1
+    assert disconnects == [True]
+    assert client.inlet is None
+
+
+def test_stale_stall_does_not_drop_a_newer_connection():
+    client = LSLClient()
+    disconnects = []
+    client.disconnected.connect(lambda: disconnects.append(True))
+    # A reconnect started generation 2 while generation 1's stall was queued.
+    client.inlet = _ScriptedInlet([])
+    client._acq_generation = 2
+    client._on_acquisition_stalled(1)
+    assert client.inlet is not None
+    assert disconnects == []
+
+    client._on_acquisition_stalled(2)
+    assert client.inlet is None
+    assert disconnects == [True]
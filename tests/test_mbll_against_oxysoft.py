@@ -19,6 +19,7 @@ import numpy as np
 import pytest
 
 from logic.data_processor import DataProcessor
+from utils.session_loader import read_oxysoft_table
 
 
 DEFAULT_REFERENCE_DIR = Path(r"C:\Users\BARBIC\Desktop\Work\fNIRS\oxysoft 3.2.72")
@@ -53,40 +54,10 @@ def _skip_if_missing() -> Path:
 
 
 def _parse_oxysoft_table(path: Path, n_data_cols_expected: int) -> np.ndarray:
-    # OxySoft export format: a free-form text header, then a single
-    # column-index row (1\t2\t3...), then data rows.
-    # We detect the start of data by finding the column-index row.
-    rows = []
-    with open(path, "r", encoding="utf-8") as f:
-        seen_col_idx = False
-        for raw_line in f:
-            line = raw_line.rstrip("\n")
-            stripped = line.strip()
-            if not stripped:
-                continue
-            cells = stripped.split()
-            # Column-index row: all integers in strictly increasing order from 1.
-            if not seen_col_idx:
-                try:
-                    nums = [int(c) for c in cells]
-                except ValueError:
-                    continue
-                if nums and nums == list(range(1, len(nums) + 1)):
-                    seen_col_idx = True
-                continue
-            try:
-                values = [float(c) for c in cells]
-            except ValueError:
-                continue
-            rows.append(values)
-            if len(rows) >= N_SAMPLES + 1:  # +1 for OxySoft's sample-0 row
-                break
-
-    if not rows:
-        raise RuntimeError(f"Could not parse data rows from {path}")
-    arr = np.array(rows, dtype=float)
+    # +1 row for OxySoft's sample-0 row.
+    values, _ = read_oxysoft_table(str(path), max_rows=N_SAMPLES + 1)
     # First column is OxySoft's sample number; trim it.
-    arr = arr[:, 1:]
+    arr = values[:, 1:]
     # Expected width = data columns we care about + optional ADC + Event.
     if arr.shape[1] < n_data_cols_expected:
         raise RuntimeError(
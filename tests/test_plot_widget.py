@@ -0,0 +1,128 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pytest
+from PySide6.QtWidgets import QApplication
+
+import config
+from views.widgets.plot_widget import POINTS_PER_PIXEL, MinMaxDecimator, PlotWidget
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+def _reference_bins(ordered, bin_size):
+    # Min/max of each bin_size block, aligned to the newest sample.
+    n_bins = ordered.shape[1] // bin_size
+    tail = ordered[:, ordered.shape[1] - n_bins * bin_size:]
+    blocks = tail.reshape(ordered.shape[0], n_bins, bin_size)
+    return np.stack((blocks.min(axis=2), blocks.max(axis=2)), axis=2).reshape(ordered.shape[0], -1)
+
+
+@pytest.mark.parametrize("pushed", [0, 1, 6, 7, 50, 123])
+@pytest.mark.parametrize("block", [1, 3, 7, 40, 200])
+def test_incremental_bins_match_a_rebuild(pushed, block):
+    rng = np.random.default_rng(pushed)
+    history = rng.normal(size=(3, 100 + pushed))
+    bin_size = 7
+    decimator = MinMaxDecimator(3)
+    decimator.rebuild(history[:, :100], bin_size)
+    for start in range(100, 100 + pushed, block):
+        decimator.push_block(history[:, start:min(start + block, 100 + pushed)])
+
+    points = decimator.points()
+    fill = pushed % bin_size
+    window = history[:, :history.shape[1] - fill]
+    expected = _reference_bins(window, bin_size)[:, -2 * decimator.n_bins:]
+    if fill:
+        partial = history[:, -fill:]
+        expected = np.concatenate((
+            expected[:, 2:], partial.min(axis=1, keepdims=True), partial.max(axis=1, keepdims=True),
+        ), axis=1)
+    np.testing.assert_array_equal(points, expected)
+
+
+def test_long_window_draws_about_two_points_per_pixel_and_keeps_spikes(qapp):
+    widget = PlotWidget()
+    widget.set_time_window(600, 50)
+    n_channels = len(config.CHANNEL_NAMES)
+    for i in range(widget.buffer_size + 321):
+        value = 100.0 if i == 20000 else np.sin(i / 50.0)
+        widget.push_sample({"O2Hb": np.full(n_channels, value), "HHb": np.full(n_channels, -value)})
+    widget.repaint_curves()
+
+    width_px = widget.first_plot.getViewBox().size().width()
+    x, y = widget.plot_curves[config.CHANNEL_NAMES[0]]['O2Hb'].getData()
+    assert len(x) == len(y) <= POINTS_PER_PIXEL * width_px + 2
+    assert y.max() == 100.0
+    assert widget.plot_curves[config.CHANNEL_NAMES[0]]['HHb'].getData()[1].min() == -100.0
+    assert -600.0 <= x[0] and x[-1] < 0.0
+
+
+def test_short_window_draws_the_raw_buffer(qapp):
+    widget = PlotWidget()
+    widget.set_time_window(2, 50)
+    n_channels = len(config.CHANNEL_NAMES)
+    for i in range(30):
+        widget.push_sample({"O2Hb": np.full(n_channels, float(i)), "HHb": np.zeros(n_channels)})
+    widget.repaint_curves()
+
+    x, y = widget.plot_curves[config.CHANNEL_NAMES[0]]['O2Hb'].getData()
+    assert len(y) == 100
+    np.testing.assert_array_equal(y[-30:], np.arange(30.0))
+
+
+def test_ring_view_is_contiguous_and_in_time_order(qapp):
+    widget = PlotWidget()
+    widget.set_time_window(1, 20)
+    n_channels = len(config.CHANNEL_NAMES)
+    for i in range(47):
+        widget.push_sample({"O2Hb": np.full(n_channels, float(i)), "HHb": np.zeros(n_channels)})
+
+    view = widget._ordered('O2Hb')
+    assert np.shares_memory(view, widget.data['O2Hb'])
+    np.testing.assert_array_equal(view[0], np.arange(27.0, 47.0))
+
+
+def test_repaint_is_skipped_without_new_samples(qapp):
+    widget = PlotWidget()
+    n_channels = len(config.CHANNEL_NAMES)
+    widget.repaint_curves()
+    assert not widget.repaint_curves()
+
+    widget.push_sample({"O2Hb": np.ones(n_channels), "HHb": np.ones(n_channels)})
+    assert widget.repaint_curves()
+    assert not widget.repaint_curves()
+
+    widget.reset()
+    assert not widget.repaint_curves()
+
+
+@pytest.mark.parametrize("window_s", [2, 600])
+def test_block_pushes_match_sample_pushes(qapp, window_s):
+    rng = np.random.default_rng(window_s)
+    n_channels = len(config.CHANNEL_NAMES)
+    o2hb = rng.normal(size=(700, n_channels))
+    hhb = rng.normal(size=(700, n_channels))
+    by_sample, by_block = PlotWidget(), PlotWidget()
+    for widget in (by_sample, by_block):
+        widget.set_time_window(window_s, 50)
+        widget.repaint_curves()  # sizes the min/max bins
+    for i in range(700):
+        by_sample.push_sample({"O2Hb": o2hb[i], "HHb": hhb[i]})
+    for start in range(0, 700, 130):
+        by_block.push_block(o2hb[start:start + 130], hhb[start:start + 130])
+    by_sample.repaint_curves()
+    by_block.repaint_curves()
+
+    for name in config.CHANNEL_NAMES:
+        for kind in ('O2Hb', 'HHb'):
+            np.testing.assert_array_equal(
+                by_sample.plot_curves[name][kind].getData()[1],
+                by_block.plot_curves[name][kind].getData()[1],
+            )
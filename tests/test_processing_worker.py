@@ -0,0 +1,197 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from pylsl import local_clock
+from PySide6.QtWidgets import QApplication
+
+from logic.processing_worker import ProcessingWorker
+from logic.sample_chunk import ChunkRing
+from tests.helpers import SAMPLE_RATE, od_stream, with_gaps
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+def _chunk(samples, start=0, ring=None):
+    ring = ring or ChunkRing(1, samples.shape[0], samples.shape[1])
+    slot, samples_buf, ts_buf = ring.acquire()
+    n = samples.shape[0]
+    samples_buf[:n] = samples
+    ts_buf[:n] = (start + np.arange(n)) / SAMPLE_RATE
+    return ring.publish(slot, samples_buf, ts_buf, n)
+
+
+def _worker(tmp_path) -> ProcessingWorker:
+    worker = ProcessingWorker(recordings_root=str(tmp_path))
+    worker.data_processor.set_sample_rate(SAMPLE_RATE)
+    return worker
+
+
+def test_chunk_is_batched_for_display(qapp, tmp_path):
+    worker = _worker(tmp_path)
+    batches = []
+    worker.display_snapshot.connect(batches.append)
+
+    samples = with_gaps(od_stream(100))
+    worker.process_chunk(_chunk(samples))
+    worker._flush_display()
+
+    # One coalesced block; placeholder and NaN rows are recorded but never
+    # displayed.
+    assert len(batches) == 1
+    block = batches[0]
+    assert block["O2Hb"].shape == block["HHb"].shape == (100 - 5 - 2, 8)
+    assert block["timestamp"][0] == pytest.approx(5 / SAMPLE_RATE)
+    assert block["quality"].shape == (8,)
+
+
+def test_chunks_between_flushes_are_coalesced(qapp, tmp_path):
+    worker = _worker(tmp_path)
+    batches = []
+    worker.display_snapshot.connect(batches.append)
+    samples = od_stream(60)
+
+    for start in range(0, 60, 10):
+        worker._process_chunk(samples[start:start + 10], (start + np.arange(10)) / SAMPLE_RATE)
+    worker._flush_display()
+
+    assert len(batches) == 1
+    np.testing.assert_allclose(batches[0]["timestamp"], np.arange(60) / SAMPLE_RATE)
+
+
+def test_chunks_are_held_until_release(qapp, tmp_path):
+    worker = _worker(tmp_path)
+    batches = []
+    worker.display_snapshot.connect(batches.append)
+    samples = od_stream(20)
+
+    def shown():
+        worker._flush_display()
+        return sum(len(block["timestamp"]) for block in batches)
+
+    worker.on_stream_connected("sim")
+    worker.process_chunk(_chunk(samples))
+    assert shown() == 0
+
+    worker.release()
+    assert shown() == 20
+    # Not holding any more: the next chunk goes straight through.
+    worker.process_chunk(_chunk(samples, start=20))
+    assert shown() == 40
+
+
+def test_recording_rows_stay_aligned(qapp, tmp_path):
+    worker = _worker(tmp_path)
+    worker.recorder.start("Worker_01", {"name": "sim"}, SAMPLE_RATE, {})
+    try:
+        samples = with_gaps(od_stream(100))
+        worker.process_chunk(_chunk(samples))
+        # Every input row reaches the recorder, including skipped ones.
+        assert worker.recorder.sample_index == 100
+    finally:
+        worker.recorder.stop()
+
+    with open(worker.recorder.calc_path, encoding="utf-8") as f:
+        rows = [line.rstrip("\n").split("\t") for line in f if line[:1].isdigit()][1:]
+    assert [int(row[0]) for row in rows] == list(range(100))
+    # NaN row 40 is a sentinel; placeholder rows keep their event but no Hb.
+    assert rows[40][-1] == "NAN"
+    assert rows[77][1:] == ["0.0000"] * 16 + ["0"]
+    assert rows[50][1] != "0.0000"
+
+
+def test_ring_slots_are_released_after_processing(qapp, tmp_path):
+    worker = _worker(tmp_path)
+    ring = ChunkRing(2, 10, 34)
+    samples = od_stream(10)
+
+    worker.on_stream_connected("sim")
+    worker.process_chunk(_chunk(samples, ring=ring))
+    worker.process_chunk(_chunk(samples, start=10, ring=ring))
+    # Both slots are held while the worker waits for release().
+    assert ring.acquire()[0] is None
+
+    worker.release()
+    assert ring.acquire()[0] is not None
+    assert ring.acquire()[0] is not None
+
+
+def test_chunk_latencies_are_recorded(qapp, tmp_path):
+    worker = _worker(tmp_path)
+    batches = []
+    worker.display_snapshot.connect(batches.append)
+    samples = od_stream(20)
+
+    ring = ChunkRing(1, 20, samples.shape[1])
+    slot, samples_buf, ts_buf = ring.acquire()
+    samples_buf[:] = samples
+    ts_buf[:] = np.arange(20) / SAMPLE_RATE
+    # Newest sample taken 5 ms before the pull; outlet clock 100 s behind.
+    pull_time = local_clock()
+    ts_buf += pull_time - 100.0 - ts_buf[-1] - 0.005
+    chunk = ring.publish(slot, samples_buf, ts_buf, 20, pull_time=pull_time, latency_s=0.005)
+    assert chunk.clock_offset == pytest.approx(100.0)
+
+    worker.process_chunk(chunk)
+    worker._flush_display()
+
+    summary = worker.latency.summary()
+    assert summary["pull"]["n"] == summary["processed"]["n"] == 1
+    assert summary["processed"]["p50_ms"] >= 5.0
+    assert chunk.processed_time >= pull_time
+    assert batches[0]["sample_time"] == pytest.approx(ts_buf[-1] + 100.0)
+
+
+def test_chunks_without_clock_offset_are_not_timed(qapp, tmp_path):
+    worker = _worker(tmp_path)
+    worker.process_chunk(_chunk(od_stream(20)))
+    assert all(row["n"] == 0 for row in worker.latency.summary().values())
+
+
+def test_recorder_writes_are_profiled(qapp, tmp_path):
+    worker = _worker(tmp_path)
+    worker.recorder.start("Profiled_01", {"name": "sim"}, SAMPLE_RATE, {})
+    try:
+        worker.process_chunk(_chunk(od_stream(30)))
+    finally:
+        worker.recorder.stop()
+
+    summary = json.loads(worker.profiler.to_json(str(tmp_path / "profile.json")))
+    assert summary["recorder"]["samples"] == 30
+    assert json.loads((tmp_path / "profile.json").read_text()) == summary
+
+
+def test_writer_hand_off_happens_outside_the_lock(qapp, tmp_path):
+    # A "block" policy waiting on a full writer queue must not hold the lock
+    # GUI polls and control actions take.
+    worker = _worker(tmp_path)
+    worker.recorder.start("Handoff_01", {"name": "sim"}, SAMPLE_RATE, {})
+    lock_free = []
+
+    def try_lock():
+        acquired = worker.lock.acquire(blocking=False)
+        if acquired:
+            worker.lock.release()
+        lock_free.append(acquired)
+
+    def enqueue(records):
+        probe = threading.Thread(target=try_lock)
+        probe.start()
+        probe.join()
+        return True
+
+    real_enqueue = worker.recorder._writer.enqueue_records
+    worker.recorder._writer.enqueue_records = enqueue
+    try:
+        worker.process_chunk(_chunk(od_stream(worker.recorder.BLOCK_ROWS + 10)))
+        assert lock_free == [True]
+        assert len(worker.recorder._outbox) == 0
+    finally:
+        worker.recorder._writer.enqueue_records = real_enqueue
+        worker.recorder.stop()
@@ -1,11 +1,15 @@
 import shutil
 import tempfile
+import time
+import uuid
 
 import pytest
 
 from PySide6.QtWidgets import QApplication
 
 from logic.app_controller import AppController
+from logic.lsl_client import LSLClient
+from logic.synthetic_outlet import SyntheticOutlet
 
 
 @pytest.fixture(scope="module")
@@ -104,3 +108,45 @@ def test_user_disconnect_stops_recording(qapp):
     finally:
         ctrl.close()
         shutil.rmtree(root, ignore_errors=True)
+
+
+def _wait(qapp, predicate, timeout=5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        qapp.processEvents()
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_outlet_restart_pauses_then_resumes_live_recording(qapp, monkeypatch):
+    # End to end over a real localhost outlet at 10x the OctaMon rate: the
+    # outlet going away trips the watchdog and pauses the recording, the
+    # auto-reconnect finds the same source_id again and the same recording
+    # resumes.
+    monkeypatch.setattr(LSLClient, "WATCHDOG_MS", 300)
+    root = tempfile.mkdtemp(prefix="fnirs_sm_")
+    source_id = f"fnirs-sm-{uuid.uuid4().hex[:8]}"
+    with SyntheticOutlet(500.0, source_id=source_id) as outlet:
+        ctrl = AppController()
+        ctrl.recorder.recordings_root = root
+        events = []
+        ctrl.recording_state_changed.connect(events.append)
+        try:
+            ctrl.connect_to_stream(source_id)
+            assert _wait(qapp, lambda: ctrl.is_connected)
+            ctrl.start_recording("Soak_01")
+            assert _wait(qapp, lambda: ctrl.recorder.sample_index > 500)
+
+            outlet.restart(downtime_s=1.0)
+            assert _wait(qapp, lambda: events[-1:] == ["resumed"], timeout=8.0)
+            assert ctrl.recorder.is_recording
+            resumed_at = ctrl.recorder.sample_index
+            assert _wait(qapp, lambda: ctrl.recorder.sample_index > resumed_at + 500)
+
+            ctrl.stop_recording()
+            assert events == ["started", "paused", "resumed", "stopped"]
+        finally:
+            ctrl.close()
+            shutil.rmtree(root, ignore_errors=True)
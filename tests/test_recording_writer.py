@@ -0,0 +1,108 @@
+import io
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils.recording_writer import POLICY_BLOCK, RecordingWriter
+from utils.session_store import RECORD_DTYPE, fill_records
+
+
+class _CountingFile(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writelines_calls = 0
+
+    def writelines(self, lines):
+        self.writelines_calls += 1
+        super().writelines(lines)
+
+
+def test_queued_rows_are_written_in_one_batch():
+    raw, calc = _CountingFile(), _CountingFile()
+    writer = RecordingWriter()
+    for i in range(50):
+        writer.enqueue(f"r{i}\n", f"c{i}\n")
+    # Everything is already queued when the thread starts: one wakeup.
+    writer.start(raw, calc)
+    writer.stop()
+
+    assert raw.getvalue() == "".join(f"r{i}\n" for i in range(50))
+    assert calc.getvalue() == "".join(f"c{i}\n" for i in range(50))
+    assert raw.writelines_calls == 1
+    stats = writer.stats()
+    assert stats["rows_written"] == 50
+    assert stats["max_batch_items"] == 50
+    assert stats["bytes_written"] == len(raw.getvalue()) + len(calc.getvalue())
+
+
+def test_drop_policy_counts_rows_lost_to_a_full_queue():
+    writer = RecordingWriter(max_queue=2)
+    assert writer.enqueue("a\n", "a\n")
+    assert writer.enqueue("b\n", "b\n")
+    assert not writer.enqueue("c\n", "c\n")
+    assert not writer.enqueue_records(np.zeros(4, dtype=RECORD_DTYPE))
+
+    stats = writer.stats()
+    assert writer.dropped_count == 5
+    assert stats["queue_high_water"] == 2
+    assert stats["blocked_puts"] == 0
+
+
+def test_block_policy_waits_for_the_writer():
+    # A raw file whose first write stalls, like a disk hiccup.
+    release = threading.Event()
+
+    class _StallingFile(io.StringIO):
+        def writelines(self, lines):
+            release.wait(5.0)
+            super().writelines(lines)
+
+    raw, calc = _StallingFile(), io.StringIO()
+    writer = RecordingWriter(max_queue=1, policy=POLICY_BLOCK, block_timeout_s=5.0)
+    writer.start(raw, calc)
+    writer.enqueue("0\n", "0\n")
+    while writer.stats()["queue_depth"]:
+        time.sleep(0.001)  # until the writer thread takes row 0 and stalls
+    writer.enqueue("1\n", "1\n")  # fills the queue
+
+    unstall = threading.Timer(0.05, release.set)
+    unstall.start()
+    assert writer.enqueue("2\n", "2\n")
+    unstall.join()
+    writer.stop()
+
+    assert raw.getvalue() == "0\n1\n2\n"
+    assert writer.dropped_count == 0
+    assert writer.stats()["blocked_puts"] == 1
+
+
+def test_block_policy_drops_after_timeout():
+    writer = RecordingWriter(max_queue=1, policy=POLICY_BLOCK, block_timeout_s=0.01)
+    writer.enqueue("0\n", "0\n")
+    assert not writer.enqueue("1\n", "1\n")
+    assert writer.dropped_count == 1
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        RecordingWriter(policy="spill")
+
+
+def test_record_blocks_are_formatted_on_the_writer_thread():
+    raw, calc = io.StringIO(), io.StringIO()
+    writer = RecordingWriter()
+    for start in (0, 3):
+        records = np.zeros(3, dtype=RECORD_DTYPE)
+        fill_records(records, start, np.full((3, 32), 0.5), np.ones((3, 8)), -np.ones((3, 8)),
+                     event=[0, 1, 0], dropped=[False, False, start == 3])
+        writer.enqueue_records(records)
+    writer.start(raw, calc)
+    writer.stop()
+
+    rows = raw.getvalue().splitlines()
+    assert len(rows) == 6
+    assert rows[1] == "1\t" + "0.50000\t" * 32 + "0\t1"
+    assert calc.getvalue().splitlines()[5] == "5\t" + "0.0000\t" * 16 + "NAN"
+    assert writer.stats()["rows_written"] == 6
@@ -0,0 +1,64 @@
+import numpy as np
+
+import config
+from logic.data_processor import SAMPLE_INVALID, DataProcessor
+from logic.replay import ALERT_STATES, load_replay_input, replay, save_replay
+from utils.enums import CognitiveState
+from utils.session_recorder import SessionRecorder
+from tests.helpers import SAMPLE_RATE, cfg_snapshot, od_stream, with_gaps
+
+
+def test_replay_matches_the_live_pipeline():
+    od = with_gaps(od_stream(3000))[:, :32]
+    result = replay(od, SAMPLE_RATE, calibrate_at_s=None)
+
+    dp = DataProcessor()
+    dp.set_sample_rate(SAMPLE_RATE)
+    out = dp.process_chunk_od(od)
+    assert np.array_equal(result["status"], out["status"])
+    assert np.array_equal(result["o2hb"], out["O2Hb"])
+    np.testing.assert_array_equal(result["hhb_raw"], out["HHb_raw"])
+    assert np.array_equal(result["quality"], out["quality"])
+    assert result["quality_changes"].size > 0
+
+
+def test_settings_apply_to_one_replay_only():
+    od = od_stream(1000)[:, :32]
+    before = config.LOAD_DETECTOR_REST_WINDOW_S
+    result = replay(od, SAMPLE_RATE, calibrate_at_s=2.0,
+                    settings={"LOAD_DETECTOR_REST_WINDOW_S": 4.0})
+    assert config.LOAD_DETECTOR_REST_WINDOW_S == before
+
+    calibrating = ALERT_STATES.index(CognitiveState.CALIBRATING)
+    rows = np.flatnonzero(result["alert"] == calibrating)
+    assert rows[0] == 100 and rows.size == 200
+    assert result["alert_changes"].tolist() == [100, 300]
+    assert result["baseline_summary"]["rest_window_s"] == 4.0
+
+
+def test_session_folder_input(tmp_path):
+    rec = SessionRecorder(recordings_root=str(tmp_path))
+    rec.start("Replay_01", {"name": "sim", "source_id": "S"}, SAMPLE_RATE, cfg_snapshot())
+    od = od_stream(200)[:, :32]
+    dropped = np.zeros(200, dtype=bool)
+    dropped[50] = True
+    rec.write_chunk(od[:100], None, None, dropped=dropped[:100])
+    rec.pause()
+    rec.resume(100)
+    rec.write_chunk(od[100:], None, None, dropped=dropped[100:])
+    rec.stop()
+
+    replay_od, timestamps, rate = load_replay_input(rec.session_folder)
+    # The resume marker is not a sample; the dropped row replays as NaN.
+    assert replay_od.shape == (200, 32) and rate == SAMPLE_RATE
+    assert np.isnan(replay_od[50]).all()
+    np.testing.assert_allclose(replay_od[120], od[120], atol=5e-6)
+    assert timestamps[10] == 10 / SAMPLE_RATE
+
+    result = replay(replay_od, rate, timestamps)
+    assert result["status"][50] == SAMPLE_INVALID
+    path = tmp_path / "out.npz"
+    save_replay(str(path), result)
+    with np.load(path) as saved:
+        assert np.array_equal(saved["alert"], result["alert"])
+        assert saved["alert_states"].tolist() == [state.value for state in ALERT_STATES]
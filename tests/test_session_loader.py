@@ -0,0 +1,117 @@
+import json
+import os
+
+import numpy as np
+
+from utils.session_loader import CACHE_FILENAME, load_session, read_oxysoft_table
+from utils.session_recorder import SessionRecorder
+from utils.tsv_format import format_records
+from tests.helpers import cfg_snapshot
+
+
+def _record(root, monkeypatch, recording_format):
+    monkeypatch.setattr("config.RECORDING_FORMAT", recording_format)
+    rec = SessionRecorder(recordings_root=str(root))
+    rec.start(
+        "LoadTest_01",
+        stream_info={"name": "Test", "type": "NIRS", "source_id": "TEST-001"},
+        sample_rate=50.0,
+        config_snapshot=cfg_snapshot(),
+    )
+    rng = np.random.default_rng(3)
+    od = rng.normal(1.0, 0.1, (300, 32))
+    o2hb = rng.normal(0.0, 1.0, (300, 8))
+    hhb = rng.normal(0.0, 1.0, (300, 8))
+    dropped = np.zeros(300, dtype=bool)
+    dropped[[7, 150]] = True
+    rec.write_chunk(od[:200], o2hb[:200], hhb[:200], adc=5, event=np.arange(200) % 4,
+                    dropped=dropped[:200], timestamps=np.arange(200) / 50.0)
+    rec.pause()
+    rec.resume(250)
+    rec.write_chunk(od[200:], o2hb[200:], hhb[200:], adc=5, event=0,
+                    dropped=dropped[200:], timestamps=np.arange(200, 300) / 50.0)
+    rec.stop()
+    return rec, od, o2hb, hhb, dropped
+
+
+def test_tsv_session_loads_and_caches(tmp_path, monkeypatch):
+    rec, od, o2hb, hhb, dropped = _record(tmp_path, monkeypatch, "tsv")
+
+    session = load_session(rec.session_folder)
+    assert session["metadata"]["sample_rate_hz"] == 50.0
+    assert np.array_equal(session["index"], np.arange(301))
+    real = np.delete(np.arange(301), 200)  # row 200 is the resume marker
+    assert session["markers"] == {200: "RESUMED-after-250ms"}
+    assert np.array_equal(session["dropped"][real], dropped)
+    keep = real[~dropped]
+    np.testing.assert_allclose(session["od"][keep], od[~dropped], atol=5e-6)
+    np.testing.assert_allclose(session["o2hb"][keep], o2hb[~dropped], atol=5e-5)
+    np.testing.assert_allclose(session["hhb"][keep], hhb[~dropped], atol=5e-5)
+    assert np.array_equal(session["event"][:4], [0, 1, 2, 3])
+
+    # The parsed records reproduce the TSV text exactly.
+    raw_text, _ = format_records(session["records"])
+    with open(rec.raw_path, encoding="utf-8") as f:
+        assert f.read().endswith(raw_text)
+
+    # Second load maps the cache instead of parsing.
+    assert os.path.exists(os.path.join(rec.session_folder, CACHE_FILENAME))
+
+    def _no_parse(*_):
+        raise AssertionError("TSV parsed despite a fresh cache")
+
+    monkeypatch.setattr("utils.session_loader._parse_tsv_pair", _no_parse)
+    again = load_session(rec.session_folder)
+    assert isinstance(again["records"], np.memmap)
+    assert again["records"].tobytes() == session["records"].tobytes()
+
+
+def test_stale_cache_is_rebuilt(tmp_path, monkeypatch):
+    rec, *_ = _record(tmp_path, monkeypatch, "tsv")
+    load_session(rec.session_folder)
+    cache_path = os.path.join(rec.session_folder, CACHE_FILENAME)
+    stat = os.stat(cache_path)
+    os.utime(rec.calc_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    load_session(rec.session_folder)
+    assert os.stat(cache_path).st_mtime_ns != stat.st_mtime_ns
+
+
+def test_binary_session_reads_the_store(tmp_path, monkeypatch):
+    rec, od, *_ = _record(tmp_path, monkeypatch, "binary")
+
+    session = load_session(rec.session_folder)
+    assert not os.path.exists(os.path.join(rec.session_folder, CACHE_FILENAME))
+    assert session["od"][0].tolist() == od[0].tolist()
+    assert session["timestamp"][1] == 1 / 50.0
+
+
+def test_binary_session_without_files_entry_reads_the_store(tmp_path, monkeypatch):
+    rec, od, *_ = _record(tmp_path, monkeypatch, "binary")
+    with open(rec.metadata_path, encoding="utf-8") as f:
+        metadata = json.load(f)
+    del metadata["files"]
+    with open(rec.metadata_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f)
+
+    session = load_session(rec.session_folder)
+    assert session["od"][0].tolist() == od[0].tolist()
+
+
+def test_oxysoft_export_table(tmp_path):
+    path = tmp_path / "export.txt"
+    path.write_text(
+        "OxySoft export of:\tsubject 12\n"
+        "Sample rate:\t50\n"
+        "\n"
+        "1\t2\t3\t4\n"
+        "0\t4.81625\t0.5\t\n"
+        "1\t1.25\t-0.5\tStart\n"
+        "2\t1.5\t0.25\t\n",
+        encoding="utf-8",
+    )
+    values, labels = read_oxysoft_table(str(path), max_rows=2)
+    assert values.shape == (2, 4)
+    assert values[1, :3].tolist() == [1.0, 1.25, -0.5]
+    assert np.isnan(values[0, 3])
+    assert labels == {(1, 3): "Start"}
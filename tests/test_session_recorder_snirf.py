@@ -6,19 +6,7 @@ import h5py
 import numpy as np
 
 from utils.session_recorder import SessionRecorder
-
-
-def _cfg_snapshot() -> dict:
-    return {
-        "DPF": 6.56,
-        "INTEROPTODE_DISTANCE": 3.5,
-        "WAVELENGTH_ORDER": ("850nm", "760nm"),
-        "EXTINCTION_COEFFICIENTS": {
-            "760nm": {"O2Hb": 0.586, "HHb": 1.548},
-            "850nm": {"O2Hb": 1.058, "HHb": 0.781},
-        },
-        "CHANNEL_NAMES": ["L1", "L2", "L3", "L4", "R1", "R2", "R3", "R4"],
-    }
+from tests.helpers import cfg_snapshot
 
 
 def test_stop_emits_snirf_with_real_samples_only():
@@ -29,7 +17,7 @@ def test_stop_emits_snirf_with_real_samples_only():
             "SnirfTest_01",
             stream_info={"name": "Test", "type": "NIRS", "source_id": "TEST-001"},
             sample_rate=50.0,
-            config_snapshot=_cfg_snapshot(),
+            config_snapshot=cfg_snapshot(),
         )
 
         n_real = 80
@@ -83,7 +71,7 @@ def test_stop_without_samples_does_not_create_snirf():
             "EmptySession_01",
             stream_info={"name": "Test", "type": "NIRS", "source_id": "TEST-001"},
             sample_rate=50.0,
-            config_snapshot=_cfg_snapshot(),
+            config_snapshot=cfg_snapshot(),
         )
         rec.stop()
         snirf_path = os.path.join(rec.session_folder, "session.snirf")
@@ -92,3 +80,29 @@ def test_stop_without_samples_does_not_create_snirf():
         if rec.is_recording:
             rec.stop()
         shutil.rmtree(root)
+
+
+def test_snirf_is_streamed_in_blocks(tmp_path):
+    rec = SessionRecorder(recordings_root=str(tmp_path))
+    rec.start(
+        "SnirfStream_01",
+        stream_info={"name": "Test", "type": "NIRS", "source_id": "TEST-001"},
+        sample_rate=50.0,
+        config_snapshot=cfg_snapshot(),
+    )
+    n = 3 * SessionRecorder.BLOCK_ROWS + 17
+    for i in range(n):
+        o2 = [0.1 * i + 0.01 * j for j in range(8)]
+        hh = [-0.05 * i for _ in range(8)]
+        rec.write([1.0] * 32, o2, hh, timestamp=i / 50.0)
+    # Only the partial last block is held in memory.
+    assert rec._fill == 17
+    rec.stop()
+
+    with h5py.File(os.path.join(rec.session_folder, "session.snirf"), "r") as f:
+        ds = f["nirs/data1/dataTimeSeries"][...]
+        times = f["nirs/data1/time"][...]
+    assert ds.shape == (n, 16)
+    np.testing.assert_allclose(ds[:, 0], [0.1 * i for i in range(n)], atol=1e-12)
+    np.testing.assert_allclose(ds[:, 1], [-0.05 * i for i in range(n)], atol=1e-12)
+    np.testing.assert_allclose(times, np.arange(n) / 50.0, atol=1e-12)
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+
+from utils.session_recorder import SessionRecorder, export_tsv
+from utils.session_store import (
+    FLAG_DROPPED,
+    FLAG_MARKER,
+    FLAG_NO_HB,
+    RECORD_DTYPE,
+    SessionStore,
+    fill_records,
+    read_session_store,
+)
+from tests.helpers import cfg_snapshot
+
+
+def _record_session(root, monkeypatch, recording_format):
+    monkeypatch.setattr("config.RECORDING_FORMAT", recording_format)
+    rec = SessionRecorder(recordings_root=str(root))
+    rec.start(
+        "StoreTest_01",
+        stream_info={"name": "Test", "type": "NIRS", "source_id": "TEST-001"},
+        sample_rate=50.0,
+        config_snapshot=cfg_snapshot(),
+    )
+    rng = np.random.default_rng(0)
+    # More than one store block, with every kind of row in between.
+    for i in range(600):
+        t = i / 50.0
+        od = list(rng.normal(1.0, 0.1, 32))
+        if i % 97 == 5:
+            rec.write([float("nan")] * 32, None, None, adc=3, event=0, dropped=True, timestamp=t)
+        elif i < 4:
+            rec.write(od, None, None, adc=3, event=0, timestamp=t)
+        else:
+            rec.write(od, list(rng.normal(0, 1, 8)), list(rng.normal(0, 1, 8)),
+                      adc=3, event=i % 3, timestamp=t)
+        if i == 300:
+            rec.pause()
+            rec.resume(1234)
+    rec.stop()
+    return rec
+
+
+def test_store_regenerates_identical_tsv(tmp_path, monkeypatch):
+    rec = _record_session(tmp_path / "rec", monkeypatch, "both")
+
+    out = tmp_path / "export"
+    raw_path, calc_path = export_tsv(rec.session_folder, str(out))
+    for original, regenerated in ((rec.raw_path, raw_path), (rec.calc_path, calc_path)):
+        with open(original, "rb") as a, open(regenerated, "rb") as b:
+            assert a.read() == b.read()
+
+
+def test_binary_only_session_has_no_tsv(tmp_path, monkeypatch):
+    rec = _record_session(tmp_path, monkeypatch, "binary")
+
+    assert rec.raw_path is None
+    assert not os.path.exists(os.path.join(rec.session_folder, "raw_od.tsv"))
+
+    records = np.load(rec.store_path, mmap_mode="r")
+    assert records.dtype == RECORD_DTYPE
+    assert records.shape == (601,)
+    assert np.array_equal(records["index"], np.arange(601))
+    assert records["flags"][5] & FLAG_DROPPED
+    assert records["flags"][0] & FLAG_NO_HB
+    marker = records[301]
+    assert marker["flags"] & FLAG_MARKER
+    assert marker["marker"] == b"RESUMED-after-1234ms"
+    # Timestamps survive at full precision (the TSV never had them).
+    assert records["timestamp"][302] == 301 / 50.0
+
+
+def test_unfinalized_store_is_recovered(tmp_path):
+    path = str(tmp_path / "session.npy")
+    store = SessionStore(path)
+    for start in (0, 4):
+        records = np.zeros(4, dtype=RECORD_DTYPE)
+        fill_records(records, start, np.arange(start, start + 4.0)[:, None].repeat(32, axis=1),
+                     np.zeros((4, 8)), np.zeros((4, 8)))
+        store.write(records)
+    store.file.close()  # crash: header still says 0 rows
+
+    records = read_session_store(path)
+    assert np.array_equal(records["index"], np.arange(8))
+    assert records["od"][7, 0] == 7.0
@@ -104,3 +104,19 @@ def test_degenerate_band_becomes_passthrough():
 def test_input_shape_validation(filt):
     with pytest.raises(ValueError):
         filt.process(np.array([1.0]))  # wrong shape, expected 2-channel
+
+
+def test_block_matches_per_sample_and_scipy_reference():
+    from scipy.signal import sosfilt
+
+    rng = np.random.default_rng(1)
+    signal = rng.normal(size=(500, 16))
+    per_sample = _drive(BandpassFilter(16, 50.0, 0.01, 0.5), signal)
+
+    blocked = BandpassFilter(16, 50.0, 0.01, 0.5)
+    chunks = [blocked.process_block(signal[i:i + 37]) for i in range(0, 500, 37)]
+    assert np.array_equal(np.concatenate(chunks), per_sample)
+
+    # Independent channels: same as filtering each column on its own.
+    reference = np.column_stack([sosfilt(blocked._sos, signal[:, c]) for c in range(16)])
+    assert np.allclose(per_sample, reference, rtol=0, atol=1e-12)
@@ -1,7 +1,7 @@
 import numpy as np
 import pytest
 
-from logic.signal_quality import SignalQualityEvaluator
+from logic.signal_quality import SignalQualityEvaluator, quality_names
 
 
 SAMPLE_RATE = 50.0
@@ -135,3 +135,102 @@ class TestInputValidation:
         ev = _make_evaluator()
         with pytest.raises(ValueError):
             ev.update(np.ones(3))  # need 4 channels
+
+
+
+class TestIncrementalStats:
+    def test_running_std_matches_full_window(self):
+        # Running sums must track np.std over the window, including across
+        # the once-per-window exact recompute.
+        rng = np.random.default_rng(4)
+        fs = 20.0
+        n_win = int(2.0 * fs)
+        ev = _make_evaluator(num_channels=4, sample_rate=fs, window_s=2.0)
+        scale = np.array([0.001, 0.01, 0.05, 0.2])
+        signal = 1.5 + rng.normal(0.0, 1.0, size=(400, 4)) * scale
+        for i in range(400):
+            ev.update_codes(signal[i])
+            if i + 1 < n_win:
+                continue
+            window = signal[i + 1 - n_win: i + 1]
+            mean = ev._sum / n_win
+            running_std = np.sqrt(ev._sum_sq / n_win - mean * mean)
+            assert np.allclose(running_std, window.std(axis=0), rtol=1e-9, atol=1e-12)
+            assert np.allclose(ev._shift + mean, window.mean(axis=0), rtol=0, atol=1e-12)
+
+    def test_codes_and_strings_agree(self):
+        fs = 50.0
+        t = np.arange(int(10 * fs)) / fs
+        signal = np.column_stack([
+            1.0 + 0.02 * np.sin(2 * np.pi * 1.2 * t),   # heartbeat -> green
+            np.full_like(t, 1.0),                        # flat -> red
+        ])
+        by_code = _make_evaluator(num_channels=2, sample_rate=fs)
+        by_name = _make_evaluator(num_channels=2, sample_rate=fs)
+        for row in signal:
+            codes = by_code.update_codes(row)
+            assert codes.dtype == np.uint8
+            assert quality_names(codes) == by_name.update(row)
+        assert quality_names(codes) == ["green", "red"]
+
+
+class TestSlidingDft:
+    def test_tracked_bins_match_rfft_of_window(self):
+        fs = 50.0
+        ev = _make_evaluator(num_channels=2, sample_rate=fs, hr_recompute_s=10.0)
+        rng = np.random.default_rng(8)
+        signal = 1.0 + rng.normal(0, 0.01, size=(700, 2))
+        n = ev._window_samples
+        for i in range(700):
+            ev.update_codes(signal[i])
+            if i + 1 >= n:
+                window = signal[i + 1 - n: i + 1].T
+                ref = np.fft.rfft(window, axis=1)[:, ev._bins]
+                assert np.allclose(ev._dft, ref, rtol=0, atol=1e-9)
+
+    def test_heartbeat_is_refreshed_every_sample(self):
+        fs = 50.0
+        ev = _make_evaluator(num_channels=1, sample_rate=fs)
+        beat = _heartbeat_signal(int(10 * fs), fs, hr_hz=1.2, amp=0.02)
+        for v in beat:
+            ev.update_codes(np.array([v]))
+        assert ev._heartbeat_good[0]
+
+        # Pulsation lost: the flag follows the sliding spectrum with no wait
+        # for a periodic FFT.
+        rng = np.random.default_rng(0)
+        flips = []
+        for k in range(int(WINDOW_S * fs)):
+            ev.update_codes(np.array([1.0 + rng.normal(0, 0.02)]))
+            flips.append(bool(ev._heartbeat_good[0]))
+        assert not flips[-1]
+
+    def test_noise_floor_only_at_resync(self, monkeypatch):
+        # The per-sample path is one HR-band max against the cached floor;
+        # the median over the noise band runs once per hr_recompute_s.
+        fs = 50.0
+        ev = _make_evaluator(num_channels=2, sample_rate=fs, hr_recompute_s=1.0)
+        calls = []
+        median = np.median
+        monkeypatch.setattr(np, "median", lambda *a, **k: calls.append(1) or median(*a, **k))
+        rng = np.random.default_rng(5)
+        for row in 1.0 + rng.normal(0, 0.01, size=(int(10 * fs), 2)):
+            ev.update_codes(row)
+        # First full window at 5 s, then once a second.
+        assert len(calls) == 6
+
+    def test_cached_floor_matches_rfft_at_resync(self):
+        fs = 50.0
+        ev = _make_evaluator(num_channels=1, sample_rate=fs)
+        beat = _heartbeat_signal(int(7 * fs), fs, hr_hz=1.2, amp=0.004, noise_std=0.002)
+        for v in beat:
+            ev.update_codes(np.array([v]))
+        assert ev._samples_since_hr == 0  # just resynced
+
+        window = beat[-ev._window_samples:]
+        spec = np.abs(np.fft.rfft(window))
+        freqs = np.fft.rfftfreq(window.size, d=1.0 / fs)
+        peak = spec[(freqs >= 0.8) & (freqs <= 2.0)].max()
+        floor = np.median(spec[(freqs >= 2.5) & (freqs <= 5.0)])
+        assert ev._heartbeat_good[0] == (peak / floor > ev.hr_snr_threshold)
+        assert np.sqrt(ev._hr_power_limit[0]) == pytest.approx(ev.hr_snr_threshold * floor)
@@ -7,7 +7,7 @@ import h5py
 import numpy as np
 import pytest
 
-from utils.snirf_writer import write_snirf
+from utils.snirf_writer import SnirfStreamWriter, write_snirf
 
 
 def _basic_metadata() -> dict:
@@ -209,3 +209,30 @@ class TestValidation:
                 sample_rate_hz=50.0,
                 metadata=_basic_metadata(),
             )
+        assert not path.exists()
+
+
+class TestStreaming:
+    def test_block_appends_match_one_shot(self):
+        n = 700
+        rng = np.random.default_rng(1)
+        o2 = rng.normal(size=(n, 8))
+        hh = rng.normal(size=(n, 8))
+        ts = 100.0 + np.arange(n) / 50.0
+
+        one_shot = _tmp_snirf_path()
+        write_snirf(one_shot, o2, hh, ts, 50.0, _basic_metadata())
+
+        streamed = _tmp_snirf_path()
+        writer = SnirfStreamWriter(streamed, _basic_metadata())
+        for start in range(0, n, 256):
+            writer.append(o2[start:start + 256], hh[start:start + 256], ts[start:start + 256])
+        writer.close()
+
+        with h5py.File(one_shot, "r") as a, h5py.File(streamed, "r") as b:
+            for name in ("nirs/data1/dataTimeSeries", "nirs/data1/time"):
+                np.testing.assert_array_equal(a[name][...], b[name][...])
+            # Time is rebased on the first sample of the first block.
+            assert b["nirs/data1/time"][0] == 0.0
+        one_shot.unlink()
+        streamed.unlink()
@@ -0,0 +1,205 @@
+"""
+Load tests for the real acquisition path: a SyntheticOutlet publishes on
+localhost and LSLClient connects to it through liblsl, at rates far above
+the OctaMon's. Chunks are taken off the acquisition thread directly and
+processed on the test thread.
+"""
+
+import queue
+import time
+import uuid
+
+import numpy as np
+import pylsl
+import pytest
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication
+
+from logic.lsl_client import LSLClient
+from logic.processing_worker import ProcessingWorker
+from logic.synthetic_outlet import SyntheticOutlet
+
+
+RATE = 1000.0
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+@pytest.fixture
+def source_id():
+    # Unique per test so a lingering outlet never answers the next resolve.
+    return f"fnirs-test-{uuid.uuid4().hex[:8]}"
+
+
+def _wait(qapp, predicate, timeout=5.0) -> bool:
+    # Watchdog disconnects are queued onto the client's (this) thread.
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        qapp.processEvents()
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class _Capture:
+    # Takes chunks off the acquisition thread, copies and releases them.
+    def __init__(self, client: LSLClient):
+        self.chunks = queue.Queue()
+        self.disconnects = 0
+        client.new_data_ready.connect(self._on_chunk, Qt.DirectConnection)
+        client.disconnected.connect(self._on_disconnected, Qt.DirectConnection)
+
+    def _on_chunk(self, chunk):
+        self.chunks.put((chunk.samples.copy(), chunk.timestamps.copy()))
+        chunk.release()
+
+    def _on_disconnected(self):
+        self.disconnects += 1
+
+    def drain(self):
+        rows, stamps = [], []
+        while not self.chunks.empty():
+            samples, timestamps = self.chunks.get()
+            rows.append(samples)
+            stamps.append(timestamps)
+        if not rows:
+            return np.empty((0, 0)), np.empty(0)
+        return np.concatenate(rows), np.concatenate(stamps)
+
+
+def _connect(qapp, source_id, monkeypatch, watchdog_ms=5000):
+    monkeypatch.setattr("config.LSL_ACQUISITION_MODE", "blocking")
+    monkeypatch.setattr(LSLClient, "WATCHDOG_MS", watchdog_ms)
+    client = LSLClient()
+    capture = _Capture(client)
+    client.connect_to_stream(source_id)
+    assert client.inlet is not None
+    return client, capture
+
+
+@pytest.mark.parametrize("channels", [32, 33, 34])
+def test_outlet_passes_the_metadata_contract(source_id, channels):
+    with SyntheticOutlet(RATE, channels=channels, source_id=source_id):
+        streams = pylsl.resolve_byprop("source_id", source_id, timeout=2)
+        assert len(streams) == 1
+        client = LSLClient()
+        client.inlet = pylsl.StreamInlet(streams[0])
+        try:
+            assert client._validate_inlet_metadata() is None
+            assert client._get_nominal_sample_rate() == RATE
+            info = client.inlet.info()
+            first = info.desc().child("channels").child("channel")
+            assert first.child_value("label") == "Rx1-L1"
+            assert first.child_value("wavelength") == "850"
+        finally:
+            client._close_inlet_safely()
+
+
+def test_blocking_acquisition_is_lossless_at_1khz(qapp, source_id, monkeypatch):
+    with SyntheticOutlet(RATE, source_id=source_id, burst_s=0.1) as outlet:
+        client, capture = _connect(qapp, source_id, monkeypatch)
+        try:
+            assert outlet.wait_sent(outlet.sent + 2000)
+            time.sleep(0.3)
+        finally:
+            client.disconnect()
+
+    samples, timestamps = capture.drain()
+    # Bursts of ~100 samples arrive as several pulls; every sample is there,
+    # in order, with its own timestamp.
+    assert len(timestamps) >= 1900
+    assert np.allclose(np.diff(timestamps), 1.0 / RATE)
+    assert samples.shape[1] == 34
+    assert (samples[:, 32] == 7.0).all()
+    assert capture.disconnects == 1  # the explicit disconnect only
+
+
+def test_gap_shows_up_as_a_timestamp_jump(qapp, source_id, monkeypatch):
+    with SyntheticOutlet(RATE, source_id=source_id) as outlet:
+        client, capture = _connect(qapp, source_id, monkeypatch)
+        try:
+            assert outlet.wait_sent(outlet.sent + 200)
+            outlet.gap(0.5)
+            sent = outlet.sent
+            assert outlet.wait_sent(sent + 200)
+            time.sleep(0.2)
+            assert capture.disconnects == 0
+        finally:
+            client.disconnect()
+
+    _, timestamps = capture.drain()
+    steps = np.diff(timestamps)
+    jumps = steps[~np.isclose(steps, 1.0 / RATE)]
+    assert len(jumps) == 1
+    assert jumps[0] == pytest.approx(0.5, abs=0.05)
+
+
+def test_restart_trips_the_watchdog_and_reconnects(qapp, source_id, monkeypatch):
+    with SyntheticOutlet(RATE, source_id=source_id) as outlet:
+        client, capture = _connect(qapp, source_id, monkeypatch, watchdog_ms=300)
+        try:
+            assert outlet.wait_sent(outlet.sent + 200)
+            outlet.restart(downtime_s=1.0)
+            assert _wait(qapp, lambda: capture.disconnects == 1)
+            assert client.inlet is None
+
+            # Same source_id: a fresh connect picks the new outlet up.
+            assert _wait(qapp, lambda: outlet.restarts == 1)
+            capture.drain()
+            client.connect_to_stream(source_id)
+            assert client.inlet is not None
+            assert outlet.wait_sent(outlet.sent + 200)
+            assert _wait(qapp, lambda: capture.chunks.qsize() > 0)
+        finally:
+            client.disconnect()
+
+
+def test_restart_under_a_new_source_id_is_not_found(qapp, source_id, monkeypatch):
+    with SyntheticOutlet(RATE, source_id=source_id) as outlet:
+        outlet.restart(source_id=source_id + "-b")
+        assert _wait(qapp, lambda: outlet.restarts == 1)
+        monkeypatch.setattr(LSLClient, "WATCHDOG_MS", 300)
+        client = LSLClient()
+        capture = _Capture(client)
+        client.connect_to_stream(source_id)
+        assert client.inlet is None
+        assert capture.disconnects == 1
+
+
+def test_recorder_keeps_up_at_1khz(qapp, source_id, monkeypatch, tmp_path):
+    worker = ProcessingWorker(recordings_root=str(tmp_path))
+    worker.data_processor.set_sample_rate(RATE)
+    worker.recorder.start("Soak_01", {"name": "synthetic", "source_id": source_id}, RATE, {})
+    processed = 0
+
+    def process(capture):
+        samples, timestamps = capture.drain()
+        if len(timestamps):
+            worker._process_chunk(samples, timestamps)
+        return len(timestamps)
+
+    try:
+        with SyntheticOutlet(RATE, source_id=source_id, warmup_s=0.2, nan_rate=0.01) as outlet:
+            client, capture = _connect(qapp, source_id, monkeypatch)
+            try:
+                target = outlet.sent + 3000
+                while outlet.sent < target:
+                    processed += process(capture)
+                    time.sleep(0.01)
+            finally:
+                client.disconnect()
+        processed += process(capture)
+        assert worker.recorder.sample_index == processed
+    finally:
+        worker.recorder.stop()
+
+    # Warm-up placeholders and NaN rows included, one row per sample.
+    assert processed >= 2900
+    with open(worker.recorder.calc_path, encoding="utf-8") as f:
+        rows = [line.split("\t", 1) for line in f if line[:1].isdigit()][1:]
+    assert [int(row[0]) for row in rows] == list(range(processed))
@@ -0,0 +1,75 @@
+import numpy as np
+
+from utils.session_store import RECORD_DTYPE, fill_records
+from utils.tsv_format import format_records
+
+
+# Reference per-row formatting: what the recorder wrote row by row before
+# the block formatter, and what the TSV files must keep matching.
+def _raw_row(idx, od32, adc, event, dropped):
+    row = [str(idx)]
+    if dropped or od32 is None:
+        row.extend("0.00000" for _ in range(32))
+    else:
+        row.extend(f"{v:.5f}" for v in od32)
+    row.append(str(int(adc)))
+    row.append("NAN" if dropped else str(int(event)))
+    return "\t".join(row) + "\n"
+
+
+def _calc_row(idx, o2hb, hhb, event, dropped):
+    row = [str(idx)]
+    if dropped or o2hb is None:
+        row.extend("0.0000" for _ in range(16))
+    else:
+        for i in range(8):
+            row.append(f"{o2hb[i]:.4f}")
+            row.append(f"{hhb[i]:.4f}")
+    row.append("NAN" if dropped else str(int(event)))
+    return "\t".join(row) + "\n"
+
+
+def _tricky_values(rng, n):
+    values = rng.normal(0.0, 2.0, n)
+    edge = np.array([
+        0.0, -0.0, -1e-9, 1e-9, -0.000004, 0.000005, 0.125, -2.5e-5, 0.00015,
+        1.000005, 99999.99999, -99999.99996, 12345.678905, 1e6, -3e8, 1e12,
+        np.nan, np.inf, -np.inf, 5e-324,
+    ])
+    values[: edge.size] = edge
+    return rng.permutation(values)
+
+
+def test_block_matches_per_row_formatting():
+    rng = np.random.default_rng(1)
+    n = 300
+    od = _tricky_values(rng, n * 32).reshape(n, 32)
+    o2hb = _tricky_values(rng, n * 8).reshape(n, 8)
+    hhb = _tricky_values(rng, n * 8).reshape(n, 8)
+    dropped = rng.random(n) < 0.05
+    has_hb = rng.random(n) < 0.9
+    adc = rng.integers(-10**12, 10**12, n)
+    event = rng.integers(-3, 200000, n)
+
+    for first in (0, 99990, 123456789):
+        records = np.zeros(n + 1, dtype=RECORD_DTYPE)
+        fill_records(records[:n], first, od, o2hb, hhb, adc, event, dropped, has_hb)
+        fill_records(records[n:], first + n, marker="RESUMED-after-1500ms")
+        raw, calc = format_records(records)
+
+        expected_raw = [
+            _raw_row(first + i, od[i], adc[i], event[i], dropped[i]) for i in range(n)
+        ]
+        expected_calc = [
+            _calc_row(first + i, o2hb[i] if has_hb[i] else None, hhb[i], event[i], dropped[i])
+            for i in range(n)
+        ]
+        idx = first + n
+        expected_raw.append(f"{idx}\t" + "0.00000\t" * 32 + "0\tRESUMED-after-1500ms\n")
+        expected_calc.append(f"{idx}\t" + "0.0000\t" * 16 + "RESUMED-after-1500ms\n")
+        assert raw == "".join(expected_raw)
+        assert calc == "".join(expected_calc)
+
+
+def test_empty_block():
+    assert format_records(np.zeros(0, dtype=RECORD_DTYPE)) == ("", "")
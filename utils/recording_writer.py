@@ -1,48 +1,130 @@
+import logging
 import queue
 import threading
 import time
-from typing import IO, Optional
+from typing import IO, Any, Optional
+
+import numpy as np
+
+from utils.session_store import FLAG_DROPPED, FLAG_NO_HB
+from utils.tsv_format import format_records
+
+
+logger = logging.getLogger(__name__)
+
+# Queue items are (kind, payload, rows):
+#   (_TSV, (raw_text, calc_text), rows)  preformatted TSV rows
+#   (_RECORDS, records, rows)  RECORD_DTYPE block; the writer thread renders
+#     it to whichever of TSV / store / SNIRF are open
+_TSV = 0
+_RECORDS = 1
+
+# What enqueue does when the queue is full.
+#   "drop": return at once, the rows are lost and counted in dropped_count.
+#   "block": wait up to block_timeout_s for room (backpressure on the
+#     producer), and only drop if the writer is still behind after that.
+POLICY_DROP = "drop"
+POLICY_BLOCK = "block"
+
+# How often the writer thread refreshes rows/s and bytes/s.
+_RATE_INTERVAL_S = 1.0
 
 
 class RecordingWriter:
-    # Background-thread writer for two parallel TSV files (raw OD + calculated Hb).
-    # SessionRecorder owns the files and headers; this class only owns the I/O loop.
-    # Enqueues are non-blocking; if the queue is full, the row is dropped and
-    # dropped_count is incremented. Caller is expected to surface that.
+    # Background-thread writer for two parallel TSV files (raw OD + calculated Hb),
+    # the binary session store and the streamed SNIRF file. SessionRecorder
+    # owns the files and headers; this class only owns the I/O loop. Any sink
+    # may be None (e.g. no TSV files when recording to the store only).
+    #
+    # Each wakeup drains everything queued into one batch: record blocks are
+    # concatenated and formatted in one vectorized pass (tsv_format), then
+    # written with a single writelines() per TSV file, one store write and
+    # one SNIRF append. Formatting here keeps it off the processing thread,
+    # whose per-row cost is a copy into a record block. stats() reports queue
+    # depth and high-water mark, throughput and flush latency; rows lost to
+    # a full queue are counted in dropped_count and logged.
 
-    def __init__(self, max_queue: int = 10000, flush_interval_s: float = 1.0):
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        flush_interval_s: float = 1.0,
+        policy: str = POLICY_DROP,
+        block_timeout_s: float = 0.5,
+    ):
+        if policy not in (POLICY_DROP, POLICY_BLOCK):
+            raise ValueError(f"policy must be {POLICY_DROP!r} or {POLICY_BLOCK!r}, got {policy!r}")
         self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
         self._stop_event = threading.Event()
         self._thread: Optional[threading.Thread] = None
         self._raw_file: Optional[IO[str]] = None
         self._calc_file: Optional[IO[str]] = None
+        self._store: Any = None  # SessionStore
+        # SnirfStreamWriter; dropped (with snirf_error set) on the first
+        # failure so a broken SNIRF never costs the TSV / store rows.
+        self._snirf: Any = None
+        self.snirf_error: Optional[Exception] = None
         self._dropped_count = 0
         self._flush_interval_s = flush_interval_s
+        self.policy = policy
+        self.block_timeout_s = float(block_timeout_s)
+        self._reset_stats()
 
-    def start(self, raw_file: IO[str], calc_file: IO[str]) -> None:
+    def start(
+        self,
+        raw_file: Optional[IO[str]],
+        calc_file: Optional[IO[str]],
+        store: Any = None,
+        snirf: Any = None,
+    ) -> None:
         # Files must already be open with headers written.
         self._raw_file = raw_file
         self._calc_file = calc_file
+        self._store = store
+        self._snirf = snirf
+        self.snirf_error = None
         self._dropped_count = 0
+        self._reset_stats()
         self._stop_event.clear()
         self._thread = threading.Thread(
             target=self._run, daemon=True, name="RecordingWriter"
         )
         self._thread.start()
 
-    def enqueue(self, raw_row: str, calc_row: str) -> bool:
-        # Non-blocking; returns False if dropped due to queue full.
-        try:
-            self._queue.put_nowait((raw_row, calc_row))
-            return True
-        except queue.Full:
-            self._dropped_count += 1
-            return False
+    def enqueue(self, raw_row: str, calc_row: str, rows: int = 1) -> bool:
+        # raw_row / calc_row may hold several consecutive rows (rows of them).
+        # Returns False if they were dropped because the queue was full.
+        return self._put((_TSV, (raw_row, calc_row), rows), rows)
+
+    def enqueue_records(self, records: np.ndarray) -> bool:
+        # Queues a block of session-store records, which the caller must not
+        # reuse. A dropped block counts all of its rows as dropped.
+        rows = records.shape[0]
+        return self._put((_RECORDS, records, rows), rows)
 
     @property
     def dropped_count(self) -> int:
         return self._dropped_count
 
+    def stats(self) -> dict:
+        # Snapshot of the writer's telemetry. Rates are refreshed by the
+        # writer thread about once a second.
+        return {
+            "policy": self.policy,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "queue_high_water": self._high_water,
+            "rows_written": self._rows_written,
+            "bytes_written": self._bytes_written,
+            "rows_per_s": self._rows_per_s,
+            "bytes_per_s": self._bytes_per_s,
+            "batches": self._batches,
+            "max_batch_items": self._max_batch,
+            "flush_ms_last": self._flush_ms_last,
+            "flush_ms_max": self._flush_ms_max,
+            "blocked_puts": self._blocked_puts,
+            "dropped": self._dropped_count,
+        }
+
     def stop(self, timeout: float = 5.0) -> None:
         self._stop_event.set()
         if self._thread is not None:
@@ -50,40 +132,157 @@ class RecordingWriter:
             self._thread = None
 
         # Drain anything the worker did not get to before join timed out.
-        while not self._queue.empty():
+        batch = []
+        while True:
             try:
-                raw_row, calc_row = self._queue.get_nowait()
+                batch.append(self._queue.get_nowait())
             except queue.Empty:
                 break
-            self._write_pair(raw_row, calc_row)
+        if batch:
+            self._write_batch(batch)
+
+        self._flush_files()
 
-        if self._raw_file is not None:
-            self._raw_file.flush()
-        if self._calc_file is not None:
-            self._calc_file.flush()
+    # ---------- Internal ----------
+
+    def _reset_stats(self) -> None:
+        self._high_water = 0
+        self._rows_written = 0
+        self._bytes_written = 0
+        self._rows_per_s = 0.0
+        self._bytes_per_s = 0.0
+        self._batches = 0
+        self._max_batch = 0
+        self._flush_ms_last = 0.0
+        self._flush_ms_max = 0.0
+        self._blocked_puts = 0
+        self._drop_events = 0
+
+    def _put(self, item: tuple, rows: int) -> bool:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if self.policy != POLICY_BLOCK:
+                self._dropped(item, rows)
+                return False
+            self._blocked_puts += 1
+            try:
+                self._queue.put(item, timeout=self.block_timeout_s)
+            except queue.Full:
+                self._dropped(item, rows)
+                return False
+        depth = self._queue.qsize()
+        if depth > self._high_water:
+            self._high_water = depth
+        return True
+
+    def _dropped(self, item: tuple, rows: int) -> None:
+        self._dropped_count += rows
+        self._drop_events += 1
+        if self._drop_events == 1 or self._drop_events % 100 == 0:
+            logger.warning(
+                "Recording queue full (%d items); %d rows dropped so far.",
+                self._queue.maxsize, self._dropped_count,
+            )
+
+    def _write_batch(self, batch: list) -> None:
+        raw_rows, calc_rows, blocks = [], [], []
+        for kind, payload, _ in batch:
+            if kind == _TSV:
+                raw_rows.append(payload[0])
+                calc_rows.append(payload[1])
+            else:
+                blocks.append(payload)
+        records = None
+        if blocks:
+            records = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+            if self._raw_file is not None or self._calc_file is not None:
+                raw_text, calc_text = format_records(records)
+                raw_rows.append(raw_text)
+                calc_rows.append(calc_text)
+
+        n_bytes = 0
+        if raw_rows and self._raw_file is not None:
+            self._raw_file.writelines(raw_rows)
+            n_bytes += sum(map(len, raw_rows))
+        if calc_rows and self._calc_file is not None:
+            self._calc_file.writelines(calc_rows)
+            n_bytes += sum(map(len, calc_rows))
+        if records is not None:
+            if self._store is not None:
+                n_bytes += self._store.write(records)
+            if self._snirf is not None:
+                self._append_snirf(records)
+
+        self._rows_written += sum(rows for _, _, rows in batch)
+        self._bytes_written += n_bytes
+        self._batches += 1
+        if len(batch) > self._max_batch:
+            self._max_batch = len(batch)
+
+    def _append_snirf(self, records: np.ndarray) -> None:
+        # SNIRF carries only real per-channel concentrations. Sentinel rows
+        # (NaN guard, placeholder samples, warmup, markers) carry no
+        # meaningful signal and would distort the resampled time series.
+        real = (records["flags"] & (FLAG_DROPPED | FLAG_NO_HB)) == 0
+        if not real.any():
+            return
+        rows = records[real]
+        timestamps = rows["timestamp"]
+        timestamps = np.where(np.isnan(timestamps), rows["index"], timestamps)
+        try:
+            self._snirf.append(rows["o2hb"], rows["hhb"], timestamps)
+        except Exception as ex:
+            self._snirf_failed(ex)
+
+    def _flush_files(self) -> None:
+        t0 = time.perf_counter()
+        for f in (self._raw_file, self._calc_file):
+            if f is not None:
+                f.flush()
+        if self._store is not None:
+            self._store.file.flush()
+        if self._snirf is not None:
+            try:
+                self._snirf.flush()
+            except Exception as ex:
+                self._snirf_failed(ex)
+        self._flush_ms_last = (time.perf_counter() - t0) * 1000.0
+        if self._flush_ms_last > self._flush_ms_max:
+            self._flush_ms_max = self._flush_ms_last
 
-    def _write_pair(self, raw_row: str, calc_row: str) -> None:
-        if self._raw_file is not None:
-            self._raw_file.write(raw_row)
-        if self._calc_file is not None:
-            self._calc_file.write(calc_row)
+    def _snirf_failed(self, ex: Exception) -> None:
+        logger.exception("SNIRF write failed (%s); continuing without it.", ex)
+        self._snirf = None
+        self.snirf_error = ex
 
     def _run(self) -> None:
-        last_flush = time.monotonic()
+        last_flush = last_rate = time.monotonic()
+        rate_rows, rate_bytes = self._rows_written, self._bytes_written
         while True:
             try:
-                raw_row, calc_row = self._queue.get(timeout=0.1)
+                batch = [self._queue.get(timeout=0.1)]
             except queue.Empty:
                 if self._stop_event.is_set():
                     return
-                continue
+                batch = None
 
-            self._write_pair(raw_row, calc_row)
+            if batch is not None:
+                # Take everything else already queued in the same wakeup.
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                self._write_batch(batch)
 
             now = time.monotonic()
             if now - last_flush >= self._flush_interval_s:
-                if self._raw_file is not None:
-                    self._raw_file.flush()
-                if self._calc_file is not None:
-                    self._calc_file.flush()
+                self._flush_files()
                 last_flush = now
+            if now - last_rate >= _RATE_INTERVAL_S:
+                dt = now - last_rate
+                self._rows_per_s = (self._rows_written - rate_rows) / dt
+                self._bytes_per_s = (self._bytes_written - rate_bytes) / dt
+                rate_rows, rate_bytes = self._rows_written, self._bytes_written
+                last_rate = now
@@ -0,0 +1,208 @@
+import itertools
+import json
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+
+from utils.session_store import (
+    FLAG_DROPPED,
+    FLAG_MARKER,
+    MARKER_BYTES,
+    RECORD_DTYPE,
+    STORE_FILENAME,
+    SessionStore,
+    read_session_store,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Loads a recording folder back into numpy arrays.
+#
+# Sessions recorded with a binary store (RECORDING_FORMAT "binary"/"both")
+# are read straight from session.npy. TSV-only sessions are parsed once from
+# raw_od.tsv + calculated.tsv and the result is cached next to them as
+# CACHE_FILENAME, a file in the same format as session.npy; later loads
+# memory-map the cache, so reopening a long session costs almost nothing
+# and only the pages that are touched get read. A cache older than either
+# TSV file is rebuilt.
+
+CACHE_FILENAME = ".session_cache.npy"
+
+
+def load_session(folder: str, use_cache: bool = True) -> dict:
+    # Returns a dict of arrays, all views of one RECORD_DTYPE record array
+    # ("records"), plus the parsed metadata.json ({} if missing):
+    #   index (N,), timestamp (N,) (NaN for TSV sessions, which never had
+    #   them), od (N, 32), o2hb / hhb (N, 8), adc (N,), event (N,),
+    #   dropped (N,) bool, markers {row: text} for event-marker rows.
+    metadata = {}
+    metadata_path = os.path.join(folder, "metadata.json")
+    if os.path.exists(metadata_path):
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+
+    # Older / hand-edited metadata may not list the store; fall back to its
+    # standard name, as export_tsv does.
+    store_name = (metadata.get("files") or {}).get("store", STORE_FILENAME)
+    if store_name and os.path.exists(os.path.join(folder, store_name)):
+        records = read_session_store(os.path.join(folder, store_name))
+    else:
+        records = _load_tsv_records(folder, use_cache)
+
+    flags = records["flags"]
+    marker_rows = np.flatnonzero(flags & FLAG_MARKER)
+    return {
+        "metadata": metadata,
+        "records": records,
+        "index": records["index"],
+        "timestamp": records["timestamp"],
+        "od": records["od"],
+        "o2hb": records["o2hb"],
+        "hhb": records["hhb"],
+        "adc": records["adc"],
+        "event": records["event"],
+        "dropped": (flags & FLAG_DROPPED) != 0,
+        "markers": {int(i): records["marker"][i].decode("utf-8") for i in marker_rows},
+    }
+
+
+def read_oxysoft_table(path: str, max_rows: Optional[int] = None) -> tuple:
+    # Parses an OxySoft-style text export (ours or OxySoft's own): a
+    # free-form header, a column-index row "1 2 3 ...", then whitespace-
+    # separated data rows. Returns (values, labels): values (N, C) float64
+    # including the sample-number column, NaN where a cell is not a number;
+    # labels {(row, col): text} for those non-numeric cells other than NAN
+    # (e.g. event markers).
+    # With max_rows, reading stops there; otherwise the body is read in one go.
+    with open(path, "rb") as f:
+        _skip_header(f, path)
+        if max_rows is None:
+            lines = [line for line in f.read().splitlines() if line.strip()]
+        else:
+            lines = list(itertools.islice((line for line in f if line.strip()), max_rows))
+    if not lines:
+        raise ValueError(f"{path}: no data rows")
+
+    width = len(lines[0].split())
+    tokens = b" ".join(lines).split()
+    if len(tokens) == width * len(lines):
+        cells = np.array(tokens).reshape(len(lines), width)
+    else:
+        # Ragged rows: pad short ones with empty (NaN) cells.
+        rows = [line.split() for line in lines]
+        width = max(map(len, rows))
+        cells = np.array([row + [b""] * (width - len(row)) for row in rows])
+
+    values = np.empty(cells.shape, dtype=np.float64)
+    labels = {}
+    for col in range(width):
+        try:
+            values[:, col] = cells[:, col].astype(np.float64)
+        except ValueError:
+            # A column with text in it (event markers): convert each
+            # distinct cell once.
+            uniq, inverse = np.unique(cells[:, col], return_inverse=True)
+            parsed = np.array([_to_float(cell) for cell in uniq])
+            values[:, col] = parsed[inverse]
+            for u in np.flatnonzero(np.isnan(parsed)):
+                text = uniq[u].decode("utf-8")
+                if text and text.upper() != "NAN":
+                    for row in np.flatnonzero(inverse == u):
+                        labels[(int(row), col)] = text
+    return values, labels
+
+
+# ---------- TSV sessions ----------
+
+
+def _load_tsv_records(folder: str, use_cache: bool) -> np.ndarray:
+    raw_path = os.path.join(folder, "raw_od.tsv")
+    calc_path = os.path.join(folder, "calculated.tsv")
+    cache_path = os.path.join(folder, CACHE_FILENAME)
+    if use_cache and _cache_is_fresh(cache_path, (raw_path, calc_path)):
+        return read_session_store(cache_path)
+
+    records = _parse_tsv_pair(raw_path, calc_path)
+    if use_cache:
+        try:
+            _write_cache(cache_path, records)
+        except OSError as ex:
+            logger.warning("Could not write session cache %s (%s).", cache_path, ex)
+            return records
+        return read_session_store(cache_path)
+    return records
+
+
+def _parse_tsv_pair(raw_path: str, calc_path: str) -> np.ndarray:
+    # raw_od.tsv: index, OD1..OD32, ADC, Event.
+    # calculated.tsv: index, (O2Hb, HHb) x 8, Event.
+    # Which rows had no OD / Hb is not recoverable from the text (they are
+    # written as zeros), so only the dropped and marker flags are set.
+    raw, raw_labels = read_oxysoft_table(raw_path)
+    calc, _ = read_oxysoft_table(calc_path)
+    if raw.shape[1] != 35 or calc.shape[1] != 18:
+        raise ValueError(f"unexpected column counts {raw.shape[1]} / {calc.shape[1]} in session TSV")
+    n = min(raw.shape[0], calc.shape[0])
+    if raw.shape[0] != calc.shape[0]:
+        logger.warning("Session TSVs differ in length (%d vs %d rows); using %d.",
+                       raw.shape[0], calc.shape[0], n)
+    raw, calc = raw[:n], calc[:n]
+
+    records = np.zeros(n, dtype=RECORD_DTYPE)
+    records["index"] = raw[:, 0]
+    records["timestamp"] = np.nan
+    records["od"] = raw[:, 1:33]
+    records["o2hb"] = calc[:, 1:17:2]
+    records["hhb"] = calc[:, 2:17:2]
+    records["adc"] = raw[:, 33]
+    event = raw[:, 34]
+    no_event = np.isnan(event)
+    records["event"] = np.where(no_event, 0, event)
+    flags = np.where(no_event, FLAG_DROPPED, 0).astype(np.uint8)
+    for (row, col), text in raw_labels.items():
+        if col == 34 and row < n:
+            flags[row] = FLAG_MARKER
+            records["marker"][row] = text.encode("utf-8")[:MARKER_BYTES]
+    records["flags"] = flags
+    return records
+
+
+def _cache_is_fresh(cache_path: str, sources: tuple) -> bool:
+    try:
+        cached = os.stat(cache_path).st_mtime_ns
+        return all(os.stat(path).st_mtime_ns <= cached for path in sources)
+    except OSError:
+        return False
+
+
+def _write_cache(cache_path: str, records: np.ndarray) -> None:
+    # Written under a temporary name and renamed, so a concurrent reader
+    # never maps a half-written cache.
+    tmp_path = cache_path + ".tmp"
+    store = SessionStore(tmp_path)
+    try:
+        store.write(records)
+    finally:
+        store.close()
+    os.replace(tmp_path, cache_path)
+
+
+def _skip_header(f, path: str) -> None:
+    # Consumes lines up to and including the column-index row.
+    for line in f:
+        cells = line.split()
+        if cells and all(c.isdigit() for c in cells) and \
+                [int(c) for c in cells] == list(range(1, len(cells) + 1)):
+            return
+    raise ValueError(f"{path}: column-index row not found")
+
+
+def _to_float(cell: bytes) -> float:
+    try:
+        return float(cell)
+    except ValueError:
+        return float("nan")
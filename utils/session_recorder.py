@@ -2,28 +2,56 @@ import logging
 import os
 import json
 import datetime
+import threading
+import time
+from collections import deque
 from typing import Optional, List
 
 import numpy as np
 
 import config
 from utils.recording_writer import RecordingWriter
-from utils.snirf_writer import write_snirf
+from utils.session_store import (
+    RECORD_DTYPE,
+    STORE_FILENAME,
+    SessionStore,
+    fill_records,
+    read_session_store,
+)
+from utils.snirf_writer import SnirfStreamWriter
 from utils.session_naming import sanitize_session_name
+from utils.tsv_format import format_records
 
 
 logger = logging.getLogger(__name__)
 
 
 # Event marker text used in TSV "Event" column and metadata when special things happen.
-EVENT_NAN_DROP = "NAN"
 EVENT_RESUMED_PREFIX = "RESUMED-after-"
 
+# Rows per export_tsv formatting pass.
+_EXPORT_BLOCK_ROWS = 8192
+
 
 class SessionRecorder:
+    # Rows collect in a RECORD_DTYPE block that is handed to the writer
+    # thread when it holds BLOCK_ROWS rows or its oldest row is
+    # BLOCK_MAX_AGE_S old, whichever comes first (and on pause / stop).
+    #
+    # With defer_hand_off set, finished blocks wait in an outbox until
+    # flush_pending() is called. ProcessingWorker fills blocks under its
+    # lock and flushes after releasing it, so a "block" queue policy waiting
+    # on a stalled disk holds up the processing thread only, never a GUI
+    # call that needs the same lock.
+    BLOCK_ROWS = 256
+    BLOCK_MAX_AGE_S = 1.0
+
     # Orchestrates a recording session: folder layout, headers, metadata,
     # pause/resume, notes. Actual disk I/O happens on a background thread
-    # owned by RecordingWriter.
+    # owned by RecordingWriter. config.RECORDING_FORMAT picks the per-sample
+    # outputs: the TSV pair, the binary SessionStore, or both. Every output
+    # (and session.snirf) is rendered from the same record blocks, so the
+    # processing thread never formats text.
 
     def __init__(self, recordings_root: str = "./Recordings"):
         self.recordings_root = recordings_root
@@ -33,10 +61,12 @@ class SessionRecorder:
         self.file_base: Optional[str] = None
         self.raw_path: Optional[str] = None
         self.calc_path: Optional[str] = None
+        self.store_path: Optional[str] = None
         self.metadata_path: Optional[str] = None
 
         self._raw_file = None
         self._calc_file = None
+        self._store: Optional[SessionStore] = None
         self._writer = RecordingWriter()
 
         self.is_recording = False
@@ -48,14 +78,21 @@ class SessionRecorder:
         # to refuse resuming into a different source.
         self._stream_source_id: Optional[str] = None
 
-        # In-memory buffer of (timestamp, o2hb_raw, hhb_raw) tuples, populated
-        # alongside the on-disk writes. Written out as SNIRF at stop().
-        # Skipped for sentinel rows (NaN, warming-up) because they carry no
-        # real concentration data.
-        self._snirf_timestamps: List[float] = []
-        self._snirf_o2hb: List[List[float]] = []
-        self._snirf_hhb: List[List[float]] = []
-        self._snirf_metadata: dict = {}
+        self._block = np.zeros(self.BLOCK_ROWS, dtype=RECORD_DTYPE)
+        self._fill = 0
+        self._block_started = 0.0
+
+        self.defer_hand_off = False
+        self._outbox: deque = deque()
+        # Serializes enqueues so blocks reach the writer in order, whichever
+        # thread flushes.
+        self._hand_off_lock = threading.Lock()
+
+        # session.snirf is streamed: the writer thread appends each record
+        # block's real concentration rows to the open file, so memory and
+        # the cost of stop() stay flat however long the session runs.
+        self.snirf_path: Optional[str] = None
+        self._snirf: Optional[SnirfStreamWriter] = None
 
     # ---------- Public lifecycle ----------
 
@@ -87,31 +124,38 @@ class SessionRecorder:
 
         self.session_folder = session_folder
         self.file_base = os.path.basename(session_folder)
-        self.raw_path = os.path.join(session_folder, "raw_od.tsv")
-        self.calc_path = os.path.join(session_folder, "calculated.tsv")
         self.metadata_path = os.path.join(session_folder, "metadata.json")
 
-        self._raw_file = open(self.raw_path, "w", encoding="utf-8")
-        self._calc_file = open(self.calc_path, "w", encoding="utf-8")
-
-        self._write_raw_header(self._raw_file, stream_info, sample_rate, config_snapshot)
-        self._write_calc_header(self._calc_file, stream_info, sample_rate, config_snapshot)
+        self.raw_path = self.calc_path = self.store_path = None
+        recording_format = config.RECORDING_FORMAT
+        buffering = config.RECORDING_FILE_BUFFER_BYTES
+        if recording_format in ("tsv", "both"):
+            self.raw_path = os.path.join(session_folder, "raw_od.tsv")
+            self.calc_path = os.path.join(session_folder, "calculated.tsv")
+            self._raw_file = open(self.raw_path, "w", encoding="utf-8", buffering=buffering)
+            self._calc_file = open(self.calc_path, "w", encoding="utf-8", buffering=buffering)
+            _write_raw_header(self._raw_file, self.start_time, stream_info, sample_rate, config_snapshot)
+            _write_calc_header(self._calc_file, self.start_time, stream_info, sample_rate, config_snapshot)
+        if recording_format in ("binary", "both"):
+            self.store_path = os.path.join(session_folder, STORE_FILENAME)
+            self._store = SessionStore(self.store_path, buffering=buffering)
         self._write_metadata(stream_info, sample_rate, config_snapshot)
 
-        self._writer.start(self._raw_file, self._calc_file)
-
-        # Snapshot of what the SNIRF writer will need at stop().
-        self._snirf_timestamps = []
-        self._snirf_o2hb = []
-        self._snirf_hhb = []
-        self._snirf_metadata = {
+        self._open_snirf({
             "start_time_iso": self.start_time.isoformat(),
             "sample_rate_hz": float(sample_rate) if sample_rate else None,
             "stream": dict(stream_info),
             "dpf": config_snapshot.get("DPF"),
             "interoptode_distance_cm": config_snapshot.get("INTEROPTODE_DISTANCE"),
-        }
+        })
 
+        self._writer = RecordingWriter(
+            policy=config.RECORDING_QUEUE_POLICY,
+            block_timeout_s=config.RECORDING_BLOCK_TIMEOUT_S,
+        )
+        self._writer.start(self._raw_file, self._calc_file, self._store, self._snirf)
+
+        self._fill = 0
         self.sample_index = 0
         self.is_recording = True
         self.is_paused = False
@@ -133,22 +177,58 @@ class SessionRecorder:
         # calc row is sentinel-zero with the normal event value; raw row is real.
         if not self.is_recording or self.is_paused:
             return
-
-        idx = self.sample_index
-        raw_row = self._format_raw_row(idx, od32, adc, event, dropped)
-        calc_row = self._format_calc_row(idx, o2hb, hhb, event, dropped)
-        self._writer.enqueue(raw_row, calc_row)
-
-        # SNIRF buffer collects only real per-channel concentrations. Sentinel
-        # rows (NaN guard, placeholder samples, warmup) carry no meaningful
-        # signal and would distort the resampled SNIRF time series.
-        if not dropped and o2hb is not None and hhb is not None and len(o2hb) == 8 and len(hhb) == 8:
-            ts = float(timestamp) if timestamp is not None else float(idx)
-            self._snirf_timestamps.append(ts)
-            self._snirf_o2hb.append(list(o2hb))
-            self._snirf_hhb.append(list(hhb))
-
-        self.sample_index += 1
+        has_od = od32 is not None and len(od32) == 32
+        has_hb = o2hb is not None and hhb is not None and len(o2hb) == 8 and len(hhb) == 8
+        self.write_chunk(
+            np.asarray(od32, dtype=np.float64).reshape(1, 32) if has_od else None,
+            np.asarray(o2hb, dtype=np.float64).reshape(1, 8) if has_hb else None,
+            np.asarray(hhb, dtype=np.float64).reshape(1, 8) if has_hb else None,
+            adc=adc,
+            event=event,
+            dropped=dropped,
+            timestamps=None if timestamp is None else [timestamp],
+        )
+
+    def write_chunk(
+        self,
+        od: Optional[np.ndarray],
+        o2hb: Optional[np.ndarray],
+        hhb: Optional[np.ndarray],
+        adc=0,
+        event=0,
+        dropped=False,
+        has_hb=True,
+        timestamps=None,
+    ) -> None:
+        # Vectorized write() for n consecutive samples: od (n, 32) and
+        # o2hb / hhb (n, 8) arrays (None = not available for any row);
+        # adc, event, dropped, has_hb and timestamps per-row arrays or
+        # scalars (n comes from the array arguments). has_hb False marks rows
+        # whose o2hb / hhb are not real (placeholder, warmup); they are
+        # written as sentinel zeros.
+        if not self.is_recording or self.is_paused:
+            return
+        columns = [od, o2hb, hhb, adc, event, dropped, has_hb, timestamps]
+        n = max((len(c) for c in columns if c is not None and np.ndim(c)), default=0)
+        done = 0
+        while done < n:
+            if self._fill == 0:
+                self._block_started = time.monotonic()
+            take = min(n - done, self.BLOCK_ROWS - self._fill)
+            part = [_rows(c, done, done + take) for c in columns]
+            fill_records(
+                self._block[self._fill:self._fill + take],
+                self.sample_index,
+                part[0], part[1], part[2],
+                adc=part[3], event=part[4], dropped=part[5], has_hb=part[6], timestamps=part[7],
+            )
+            self._fill += take
+            self.sample_index += take
+            done += take
+            if self._fill == self.BLOCK_ROWS:
+                self._hand_off()
+        if self._fill and time.monotonic() - self._block_started >= self.BLOCK_MAX_AGE_S:
+            self._hand_off()
 
     def pause(self) -> None:
         # Marks the recording paused. Files stay open; writer thread keeps
@@ -156,6 +236,7 @@ class SessionRecorder:
         if not self.is_recording:
             return
         self.is_paused = True
+        self._hand_off()
 
     def resume(self, gap_ms: int) -> None:
         # Resumes a paused recording and writes an event-marker row so the
@@ -177,49 +258,97 @@ class SessionRecorder:
     def stop(self) -> None:
         if not self.is_recording:
             return
-        snirf_path = self._write_snirf_safely()
         try:
-            self._writer.stop(timeout=5.0)
+            self._fill_to_outbox()
+            with self._hand_off_lock:
+                self._enqueue_outbox()
+                self._writer.stop(timeout=5.0)
             if self._raw_file is not None:
                 self._raw_file.close()
             if self._calc_file is not None:
                 self._calc_file.close()
+            if self._store is not None:
+                self._store.close()
+            snirf_path = self._close_snirf()
+            stats = self._writer.stats()
+            logger.info(
+                "Recording writer: %d rows, %d bytes in %d batches; queue high-water "
+                "%d/%d; max flush %.1f ms; %d blocked puts; %d rows dropped.",
+                stats["rows_written"], stats["bytes_written"], stats["batches"],
+                stats["queue_high_water"], stats["queue_capacity"],
+                stats["flush_ms_max"], stats["blocked_puts"], stats["dropped"],
+            )
         finally:
             self._raw_file = None
             self._calc_file = None
+            self._store = None
             self.is_recording = False
             self.is_paused = False
             self.sample_index = 0
             self.start_time = None
             self._stream_source_id = None
-            self._snirf_timestamps = []
-            self._snirf_o2hb = []
-            self._snirf_hhb = []
-            self._snirf_metadata = {}
+            self._snirf = None
+            self._fill = 0
+            self._outbox.clear()
         if snirf_path is not None:
             logger.info("SNIRF written to %s", snirf_path)
 
-    def _write_snirf_safely(self) -> Optional[str]:
-        # Best-effort SNIRF emission. Never blocks stop() on failure; logs and
-        # moves on. The TSV files and metadata.json are the canonical record.
-        if not self.session_folder or not self._snirf_timestamps:
+    def flush_pending(self) -> None:
+        # Hands every finished block to the writer thread. May wait on a
+        # full queue under the "block" policy, so call it without holding
+        # locks other threads need.
+        if not self._outbox:
+            return
+        with self._hand_off_lock:
+            self._enqueue_outbox()
+
+    def _hand_off(self) -> None:
+        # Passes a copy of the rows collected so far to the writer thread
+        # (via the outbox when deferring).
+        self._fill_to_outbox()
+        if not self.defer_hand_off:
+            self.flush_pending()
+
+    def _fill_to_outbox(self) -> None:
+        if self._fill == 0:
+            return
+        self._outbox.append(self._block[:self._fill].copy())
+        self._fill = 0
+
+    def _enqueue_outbox(self) -> None:
+        # Caller holds _hand_off_lock.
+        while self._outbox:
+            self._writer.enqueue_records(self._outbox.popleft())
+
+    def _open_snirf(self, metadata: dict) -> None:
+        # Best-effort SNIRF emission. A failure here or on the writer thread
+        # only loses session.snirf; the TSV files / store and metadata.json
+        # are the canonical record.
+        self.snirf_path = os.path.join(self.session_folder, "session.snirf")
+        try:
+            self._snirf = SnirfStreamWriter(self.snirf_path, metadata)
+        except Exception as ex:
+            logger.exception("SNIRF open failed (%s); recording without it.", ex)
+            self._snirf = None
+
+    def _close_snirf(self) -> Optional[str]:
+        # Runs after the writer thread has stopped. Never raises. Returns
+        # the path if a SNIRF file with samples was written.
+        snirf = self._snirf
+        if snirf is None:
             return None
         try:
-            snirf_path = os.path.join(self.session_folder, "session.snirf")
-            o2 = np.asarray(self._snirf_o2hb, dtype=float)
-            hh = np.asarray(self._snirf_hhb, dtype=float)
-            write_snirf(
-                snirf_path,
-                o2hb=o2,
-                hhb=hh,
-                timestamps=self._snirf_timestamps,
-                sample_rate_hz=self._snirf_metadata.get("sample_rate_hz") or 0.0,
-                metadata=self._snirf_metadata,
-            )
-            return snirf_path
+            snirf.close()
         except Exception as ex:
             logger.exception("SNIRF write failed (%s); TSV files intact.", ex)
             return None
+        if self._writer.snirf_error is not None:
+            return None
+        if snirf.samples == 0:
+            # Nothing real was recorded; don't leave an empty SNIRF behind.
+            os.remove(self.snirf_path)
+            return None
+        return self.snirf_path
 
     def write_notes(self, notes_text: str) -> None:
         # Writes the operator's notes alongside the recording.
@@ -233,44 +362,12 @@ class SessionRecorder:
     def dropped_count(self) -> int:
         return self._writer.dropped_count
 
-    # ---------- Row formatting ----------
+    def writer_stats(self) -> dict:
+        # Telemetry of the current (or last) session's writer thread; see
+        # RecordingWriter.stats().
+        return self._writer.stats()
 
-    def _format_raw_row(
-        self,
-        idx: int,
-        od32: Optional[List[float]],
-        adc: int,
-        event: int,
-        dropped: bool,
-    ) -> str:
-        row = [str(idx)]
-        if dropped or od32 is None or len(od32) != 32:
-            row.extend("0.00000" for _ in range(32))
-        else:
-            row.extend(f"{v:.5f}" for v in od32)
-        row.append(str(int(adc)))
-        row.append(EVENT_NAN_DROP if dropped else str(int(event)))
-        return "\t".join(row) + "\n"
-
-    def _format_calc_row(
-        self,
-        idx: int,
-        o2hb: Optional[List[float]],
-        hhb: Optional[List[float]],
-        event: int,
-        dropped: bool,
-    ) -> str:
-        row = [str(idx)]
-        if dropped or o2hb is None or hhb is None or len(o2hb) != 8 or len(hhb) != 8:
-            for _ in range(8):
-                row.append("0.0000")
-                row.append("0.0000")
-        else:
-            for i in range(8):
-                row.append(f"{o2hb[i]:.4f}")
-                row.append(f"{hhb[i]:.4f}")
-        row.append(EVENT_NAN_DROP if dropped else str(int(event)))
-        return "\t".join(row) + "\n"
+    # ---------- Event markers ----------
 
     def _write_event_marker(self, marker: str) -> None:
         # Event-marker rows look like a normal row but the OD/Hb columns are zeros
@@ -278,97 +375,27 @@ class SessionRecorder:
         # cadence so the two files remain row-aligned.
         if not self.is_recording or not self._writer:
             return
-        idx = self.sample_index
-        raw_zeros = "\t".join("0.00000" for _ in range(32))
-        calc_zeros = "\t".join("0.0000" for _ in range(16))
-        raw_row = f"{idx}\t{raw_zeros}\t0\t{marker}\n"
-        calc_row = f"{idx}\t{calc_zeros}\t{marker}\n"
-        self._writer.enqueue(raw_row, calc_row)
+        if self._fill == 0:
+            self._block_started = time.monotonic()
+        fill_records(self._block[self._fill:self._fill + 1], self.sample_index, marker=marker)
+        self._fill += 1
         self.sample_index += 1
-
-    # ---------- Headers ----------
-
-    def _write_raw_header(self, f, stream_info, sample_rate, cfg):
-        self._write_common_header(f, stream_info, sample_rate, cfg, export_kind="Raw OD")
-        f.write("Legend:\n")
-        f.write("Column 1: (Sample number)\n")
-        for i in range(32):
-            f.write(f"Column {i + 2}: OD{i + 1}\n")
-        f.write("Column 34: ADC\n")
-        f.write("Column 35: (Event)\n")
-        self._write_column_index_row(f, 35)
-
-    def _write_calc_header(self, f, stream_info, sample_rate, cfg):
-        self._write_common_header(f, stream_info, sample_rate, cfg, export_kind="Calculated")
-        f.write("Legend:\n")
-        f.write("Column 1: (Sample number)\n")
-        mapping = [
-            ("Rx1 Tx1", 2),
-            ("Rx1 Tx2", 4),
-            ("Rx1 Tx3", 6),
-            ("Rx1 Tx4", 8),
-            ("Rx2 Tx5", 10),
-            ("Rx2 Tx6", 12),
-            ("Rx2 Tx7", 14),
-            ("Rx2 Tx8", 16),
-        ]
-        for label, col in mapping:
-            f.write(f"Column {col}: {label} O2Hb\n")
-            f.write(f"Column {col + 1}: {label} HHb\n")
-        f.write("Column 18: (Event)\n")
-        self._write_column_index_row(f, 18)
-
-    def _write_common_header(self, f, stream_info, sample_rate, cfg, export_kind: str):
-        export_dt = self.start_time
-        f.write(f"Export date:\t{export_dt.strftime('%d-%m-%Y')}\n")
-        f.write(f"Export time:\t{export_dt.strftime('%H:%M:%S')}\n")
-        f.write(f"Export kind:\t{export_kind}\n")
-
-        name = stream_info.get("name", "")
-        s_type = stream_info.get("type", "")
-        source_id = stream_info.get("source_id", "")
-        if name:
-            f.write(f"Stream name:\t{name}\n")
-        if s_type:
-            f.write(f"Stream type:\t{s_type}\n")
-        if source_id:
-            f.write(f"Source ID:\t{source_id}\n")
-        if sample_rate:
-            f.write(f"Data rate (Hz):\t{sample_rate}\n")
-
-        dpf = cfg.get("DPF", None)
-        dist = cfg.get("INTEROPTODE_DISTANCE", None)
-        if dpf is not None:
-            f.write(f"DPF:\t{dpf}\n")
-        if dist is not None:
-            f.write(f"Interoptode distance (cm):\t{dist}\n")
-
-        wl_order = cfg.get("WAVELENGTH_ORDER", None)
-        if wl_order:
-            f.write(f"Wavelength order:\t{wl_order}\n")
-
-        ext = cfg.get("EXTINCTION_COEFFICIENTS", None)
-        if ext:
-            f.write("Extinction coefficients:\n")
-            for wl, vals in ext.items():
-                o2 = vals.get("O2Hb", "")
-                hh = vals.get("HHb", "")
-                f.write(f"\t{wl}:\tO2Hb={o2}\tHHb={hh}\n")
-
-        ch_names = cfg.get("CHANNEL_NAMES", None)
-        if ch_names:
-            f.write("Channel names:\t" + ", ".join(ch_names) + "\n")
-
-        f.write("\n")
-
-    def _write_column_index_row(self, f, count: int):
-        f.write("\t".join(str(i) for i in range(1, count + 1)) + "\n")
+        if self._fill == self.BLOCK_ROWS:
+            self._hand_off()
 
     # ---------- Metadata ----------
 
     def _write_metadata(self, stream_info, sample_rate, cfg) -> None:
         # Machine-readable companion to the TSV files. Whatever changes in cfg
         # over time, the recording stays self-describing.
+        files = {}
+        if self.raw_path is not None:
+            files["raw_od"] = "raw_od.tsv"
+            files["calculated"] = "calculated.tsv"
+        if self.store_path is not None:
+            files["store"] = STORE_FILENAME
+        files["snirf"] = "session.snirf"
+        files["notes"] = "notes.txt"
         metadata = {
             "app_name": config.APP_NAME,
             "app_version": config.APP_VERSION,
@@ -386,12 +413,7 @@ class SessionRecorder:
                 "extinction_coefficients": cfg.get("EXTINCTION_COEFFICIENTS"),
             },
             "channels": cfg.get("CHANNEL_NAMES"),
-            "files": {
-                "raw_od": "raw_od.tsv",
-                "calculated": "calculated.tsv",
-                "snirf": "session.snirf",
-                "notes": "notes.txt",
-            },
+            "files": files,
         }
         with open(self.metadata_path, "w", encoding="utf-8") as f:
             json.dump(metadata, f, indent=2)
@@ -408,3 +430,137 @@ class SessionRecorder:
             if not os.path.exists(candidate):
                 return candidate
             idx += 1
+
+
+def export_tsv(session_folder: str, out_folder: Optional[str] = None, overwrite: bool = False) -> tuple:
+    # Regenerates raw_od.tsv and calculated.tsv from a session's binary store
+    # and metadata.json, byte-identical to what a "tsv" recording writes.
+    # Returns (raw_path, calc_path).
+    with open(os.path.join(session_folder, "metadata.json"), "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    store_name = metadata.get("files", {}).get("store", STORE_FILENAME)
+    records = read_session_store(os.path.join(session_folder, store_name))
+
+    out_folder = out_folder or session_folder
+    os.makedirs(out_folder, exist_ok=True)
+    raw_path = os.path.join(out_folder, "raw_od.tsv")
+    calc_path = os.path.join(out_folder, "calculated.tsv")
+    if not overwrite:
+        for path in (raw_path, calc_path):
+            if os.path.exists(path):
+                raise FileExistsError(path)
+
+    mbll = metadata.get("mbll") or {}
+    cfg = {
+        "DPF": mbll.get("DPF"),
+        "INTEROPTODE_DISTANCE": mbll.get("interoptode_distance_cm"),
+        "WAVELENGTH_ORDER": tuple(mbll.get("wavelength_order") or ()),
+        "EXTINCTION_COEFFICIENTS": mbll.get("extinction_coefficients"),
+        "CHANNEL_NAMES": metadata.get("channels"),
+    }
+    stream_info = metadata.get("stream") or {}
+    sample_rate = metadata.get("sample_rate_hz")
+
+    # Same headers as the recorder, dated by the recording's start time. Rows
+    # go through the same block formatter the writer thread uses.
+    export_dt = datetime.datetime.fromisoformat(metadata["start_time_iso"])
+    with open(raw_path, "w", encoding="utf-8") as raw_f, \
+            open(calc_path, "w", encoding="utf-8") as calc_f:
+        _write_raw_header(raw_f, export_dt, stream_info, sample_rate, cfg)
+        _write_calc_header(calc_f, export_dt, stream_info, sample_rate, cfg)
+        for start in range(0, records.shape[0], _EXPORT_BLOCK_ROWS):
+            raw_text, calc_text = format_records(records[start:start + _EXPORT_BLOCK_ROWS])
+            raw_f.write(raw_text)
+            calc_f.write(calc_text)
+    return raw_path, calc_path
+
+
+# ---------- TSV headers ----------
+# Shared by the recorder and export_tsv.
+
+
+def _write_raw_header(f, export_dt, stream_info, sample_rate, cfg):
+    _write_common_header(f, export_dt, stream_info, sample_rate, cfg, export_kind="Raw OD")
+    f.write("Legend:\n")
+    f.write("Column 1: (Sample number)\n")
+    for i in range(32):
+        f.write(f"Column {i + 2}: OD{i + 1}\n")
+    f.write("Column 34: ADC\n")
+    f.write("Column 35: (Event)\n")
+    _write_column_index_row(f, 35)
+
+
+def _write_calc_header(f, export_dt, stream_info, sample_rate, cfg):
+    _write_common_header(f, export_dt, stream_info, sample_rate, cfg, export_kind="Calculated")
+    f.write("Legend:\n")
+    f.write("Column 1: (Sample number)\n")
+    mapping = [
+        ("Rx1 Tx1", 2),
+        ("Rx1 Tx2", 4),
+        ("Rx1 Tx3", 6),
+        ("Rx1 Tx4", 8),
+        ("Rx2 Tx5", 10),
+        ("Rx2 Tx6", 12),
+        ("Rx2 Tx7", 14),
+        ("Rx2 Tx8", 16),
+    ]
+    for label, col in mapping:
+        f.write(f"Column {col}: {label} O2Hb\n")
+        f.write(f"Column {col + 1}: {label} HHb\n")
+    f.write("Column 18: (Event)\n")
+    _write_column_index_row(f, 18)
+
+
+def _write_common_header(f, export_dt, stream_info, sample_rate, cfg, export_kind: str):
+    # export_dt: the recording's start time, shown as the export date.
+    f.write(f"Export date:\t{export_dt.strftime('%d-%m-%Y')}\n")
+    f.write(f"Export time:\t{export_dt.strftime('%H:%M:%S')}\n")
+    f.write(f"Export kind:\t{export_kind}\n")
+
+    name = stream_info.get("name", "")
+    s_type = stream_info.get("type", "")
+    source_id = stream_info.get("source_id", "")
+    if name:
+        f.write(f"Stream name:\t{name}\n")
+    if s_type:
+        f.write(f"Stream type:\t{s_type}\n")
+    if source_id:
+        f.write(f"Source ID:\t{source_id}\n")
+    if sample_rate:
+        f.write(f"Data rate (Hz):\t{sample_rate}\n")
+
+    dpf = cfg.get("DPF", None)
+    dist = cfg.get("INTEROPTODE_DISTANCE", None)
+    if dpf is not None:
+        f.write(f"DPF:\t{dpf}\n")
+    if dist is not None:
+        f.write(f"Interoptode distance (cm):\t{dist}\n")
+
+    wl_order = cfg.get("WAVELENGTH_ORDER", None)
+    if wl_order:
+        f.write(f"Wavelength order:\t{wl_order}\n")
+
+    ext = cfg.get("EXTINCTION_COEFFICIENTS", None)
+    if ext:
+        f.write("Extinction coefficients:\n")
+        for wl, vals in ext.items():
+            o2 = vals.get("O2Hb", "")
+            hh = vals.get("HHb", "")
+            f.write(f"\t{wl}:\tO2Hb={o2}\tHHb={hh}\n")
+
+    ch_names = cfg.get("CHANNEL_NAMES", None)
+    if ch_names:
+        f.write("Channel names:\t" + ", ".join(ch_names) + "\n")
+
+    f.write("\n")
+
+
+def _write_column_index_row(f, count: int):
+    f.write("\t".join(str(i) for i in range(1, count + 1)) + "\n")
+
+
+def _rows(column, start: int, stop: int):
+    # Rows [start, stop) of a write_chunk column; None and scalars pass through.
+    if column is None or np.ndim(column) == 0:
+        return column
+    return column[start:stop]
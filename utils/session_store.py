@@ -0,0 +1,153 @@
+import os
+from typing import Optional
+
+import numpy as np
+
+
+# Columnar binary session store: one fixed-width record per recorded row,
+# appended in blocks to a NumPy .npy file. Carries everything raw_od.tsv and
+# calculated.tsv do (plus the LSL timestamp, at full precision), so either
+# TSV can be regenerated from it on demand (session_recorder.export_tsv).
+#
+# The file is a plain .npy (np.load(path, mmap_mode="r") works). Its header
+# is padded to HEADER_BYTES so the row count can be rewritten in place when
+# the recording closes; a file left behind by a crash still loads through
+# read_session_store(), which derives the row count from the file size.
+
+STORE_FILENAME = "session.npy"
+HEADER_BYTES = 1024
+
+# Bits of the "flags" field.
+FLAG_DROPPED = 1  # NaN guard tripped; TSV writes zeros and Event=NAN
+FLAG_NO_OD = 2  # no 32-channel OD for this row; TSV writes zeros
+FLAG_NO_HB = 4  # no concentrations (placeholder/warmup); TSV writes zeros
+FLAG_MARKER = 8  # event-marker row; Event column is the marker text
+
+MARKER_BYTES = 32
+
+RECORD_DTYPE = np.dtype([
+    ("index", "<i8"),
+    ("timestamp", "<f8"),  # LSL timestamp, NaN when not known
+    ("od", "<f8", (32,)),
+    ("o2hb", "<f8", (8,)),
+    ("hhb", "<f8", (8,)),
+    ("adc", "<i8"),
+    ("event", "<i8"),
+    ("flags", "u1"),
+    ("marker", f"S{MARKER_BYTES}"),
+])
+
+
+def _header(rows: int) -> bytes:
+    # .npy v1.0 header, space-padded to a fixed HEADER_BYTES.
+    text = repr({
+        "descr": np.lib.format.dtype_to_descr(RECORD_DTYPE),
+        "fortran_order": False,
+        "shape": (int(rows),),
+    })
+    prefix = np.lib.format.MAGIC_PREFIX + bytes([1, 0])
+    body_len = HEADER_BYTES - len(prefix) - 2
+    padding = body_len - len(text) - 1
+    if padding < 0:
+        raise ValueError("record dtype does not fit in the reserved header")
+    body = (text + " " * padding + "\n").encode("latin1")
+    return prefix + body_len.to_bytes(2, "little") + body
+
+
+def fill_records(
+    out: np.ndarray,
+    first_index: int,
+    od: Optional[np.ndarray] = None,
+    o2hb: Optional[np.ndarray] = None,
+    hhb: Optional[np.ndarray] = None,
+    adc=0,
+    event=0,
+    dropped=False,
+    has_hb=True,
+    timestamps=None,
+    marker: str = "",
+) -> None:
+    # Fills the RECORD_DTYPE rows of `out` with consecutive samples starting
+    # at sample index first_index. od (n, 32) and o2hb / hhb (n, 8) may be
+    # None for "not available"; adc, event, dropped, has_hb and timestamps
+    # are per-row arrays or scalars. Rows with has_hb False get FLAG_NO_HB
+    # and zero concentrations, like a sample whose Hb was never computed.
+    n = out.shape[0]
+    flags = np.where(dropped, FLAG_DROPPED, 0).astype(np.uint8)
+    flags = np.broadcast_to(flags, (n,)).copy()
+    out["index"] = np.arange(first_index, first_index + n)
+    out["timestamp"] = np.nan if timestamps is None else timestamps
+    if od is None:
+        out["od"] = 0.0
+        flags |= FLAG_NO_OD
+    else:
+        out["od"] = od
+    has_hb = np.broadcast_to(has_hb, (n,))
+    if o2hb is None or hhb is None:
+        has_hb = np.zeros(n, dtype=bool)
+    if has_hb.all():
+        out["o2hb"] = o2hb
+        out["hhb"] = hhb
+    else:
+        keep = has_hb[:, np.newaxis]
+        out["o2hb"] = np.where(keep, o2hb, 0.0) if o2hb is not None else 0.0
+        out["hhb"] = np.where(keep, hhb, 0.0) if hhb is not None else 0.0
+        flags[~has_hb] |= FLAG_NO_HB
+    out["adc"] = adc
+    out["event"] = event
+    if marker:
+        flags |= FLAG_MARKER
+    out["marker"] = marker.encode("utf-8")[:MARKER_BYTES]
+    out["flags"] = flags
+
+
+class SessionStore:
+    # The store file. Blocks of records (built with fill_records) are
+    # appended with write(), normally from the recording writer thread; the
+    # header is written at open and again with the final row count in
+    # close(), which must run after the last write().
+
+    def __init__(self, path: str, buffering: int = -1):
+        self.path = path
+        self.rows = 0
+        self.file = open(path, "wb", buffering=buffering)
+        self.file.write(_header(0))
+
+    def write(self, records: np.ndarray) -> int:
+        # Appends a RECORD_DTYPE array; returns the bytes written.
+        data = np.ascontiguousarray(records, dtype=RECORD_DTYPE).data
+        self.file.write(data)
+        self.rows += records.shape[0]
+        return data.nbytes
+
+    def close(self) -> None:
+        # Rewrites the header with the final row count and closes the file.
+        if self.file.closed:
+            return
+        try:
+            self.file.flush()
+            self.file.seek(0)
+            self.file.write(_header(self.rows))
+        finally:
+            self.file.close()
+
+
+def read_session_store(path: str, mmap: bool = True) -> np.ndarray:
+    # Returns the store as a RECORD_DTYPE array (memory-mapped by default).
+    # The row count comes from the file size, so a store whose header was
+    # never finalized (crash mid-session) loads everything that reached disk.
+    with open(path, "rb") as f:
+        version = np.lib.format.read_magic(f)
+        if version != (1, 0):
+            raise ValueError(f"{path}: unsupported store version {version}")
+        _, _, dtype = np.lib.format.read_array_header_1_0(f)
+        offset = f.tell()
+    if dtype != RECORD_DTYPE:
+        raise ValueError(f"{path}: not a session store (dtype {dtype})")
+
+    rows = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+    if rows == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    if mmap:
+        return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=offset, shape=(rows,))
+    return np.fromfile(path, dtype=RECORD_DTYPE, count=rows, offset=offset)
@@ -28,6 +28,10 @@ SNIRF_FORMAT_VERSION = "1.1"
 LENGTH_UNIT = "cm"
 
 
+# Rows per HDF5 chunk of the streamed datasets.
+CHUNK_ROWS = 256
+
+
 def write_snirf(
     path: str | Path,
     o2hb: np.ndarray,
@@ -39,44 +43,90 @@ def write_snirf(
     # o2hb, hhb: shape (n_samples, 8) - raw post-MBLL concentrations in uM.
     # timestamps: length n_samples, monotonic seconds (LSL clock).
     # metadata: the metadata.json dict (DPF, distance, channel names, etc).
-
-    o2hb = np.asarray(o2hb, dtype=np.float64)
-    hhb = np.asarray(hhb, dtype=np.float64)
-    if o2hb.shape != hhb.shape:
-        raise ValueError(f"o2hb/hhb shape mismatch: {o2hb.shape} vs {hhb.shape}")
-    if o2hb.shape[1] != 8:
-        raise ValueError(f"expected 8 channels, got {o2hb.shape[1]}")
-
-    n_samples = o2hb.shape[0]
-    if len(timestamps) != n_samples:
-        raise ValueError(
-            f"timestamps length {len(timestamps)} != samples {n_samples}"
-        )
-
-    times = np.asarray(timestamps, dtype=np.float64)
-    # SNIRF time vector is relative to start-of-data; subtracting t0 keeps
-    # absolute clock offsets out of the file.
-    if times.size > 0:
-        times = times - times[0]
-
-    # Interleaved column order: [Ch0_HbO, Ch0_HbR, Ch1_HbO, Ch1_HbR, ...].
-    n_channels = o2hb.shape[1]
-    data_time_series = np.empty((n_samples, n_channels * 2), dtype=np.float64)
-    for ch in range(n_channels):
-        data_time_series[:, 2 * ch] = o2hb[:, ch]
-        data_time_series[:, 2 * ch + 1] = hhb[:, ch]
-
-    path = Path(path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    if path.exists():
-        path.unlink()
-
-    with h5py.File(path, "w") as f:
-        _write_string(f, "formatVersion", SNIRF_FORMAT_VERSION)
-        nirs = f.create_group("nirs")
-        _write_meta_data_tags(nirs, metadata)
-        _write_probe(nirs, metadata)
-        _write_data(nirs, data_time_series, times, sample_rate_hz)
+    # sample_rate_hz: unused, kept for call compatibility; SNIRF's time
+    # vector carries the timing (SnirfStreamWriter takes no rate).
+    # One-shot form of SnirfStreamWriter.
+    writer = SnirfStreamWriter(path, metadata)
+    try:
+        writer.append(o2hb, hhb, timestamps)
+    except Exception:
+        writer.close()
+        writer.path.unlink()
+        raise
+    writer.close()
+
+
+class SnirfStreamWriter:
+    # Incremental SNIRF: the file and every fixed group are created up front,
+    # dataTimeSeries and time are resizable chunked datasets that append()
+    # extends block by block, and close() only has to close the file. Memory
+    # and close() cost do not grow with the recording length.
+    #
+    # Not thread-safe; the caller serialises append/flush/close (the
+    # recorder hands the writer to RecordingWriter's thread after creation).
+
+    N_CHANNELS = 8
+
+    def __init__(self, path: str | Path, metadata: dict):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            path.unlink()
+
+        self.path = path
+        self.samples = 0
+        self._t0 = None
+        self._file = h5py.File(path, "w")
+        try:
+            _write_string(self._file, "formatVersion", SNIRF_FORMAT_VERSION)
+            nirs = self._file.create_group("nirs")
+            _write_meta_data_tags(nirs, metadata)
+            _write_probe(nirs, metadata)
+            self._data, self._time = _create_data(nirs, self.N_CHANNELS)
+        except Exception:
+            self._file.close()
+            raise
+
+    def append(self, o2hb: np.ndarray, hhb: np.ndarray, timestamps: Sequence[float]) -> None:
+        # o2hb, hhb: (n, 8); timestamps: (n,) LSL seconds. Times are stored
+        # relative to the first sample ever appended.
+        o2hb = np.asarray(o2hb, dtype=np.float64)
+        hhb = np.asarray(hhb, dtype=np.float64)
+        if o2hb.shape != hhb.shape:
+            raise ValueError(f"o2hb/hhb shape mismatch: {o2hb.shape} vs {hhb.shape}")
+        if o2hb.ndim != 2 or o2hb.shape[1] != self.N_CHANNELS:
+            raise ValueError(f"expected {self.N_CHANNELS} channels, got shape {o2hb.shape}")
+
+        n = o2hb.shape[0]
+        if len(timestamps) != n:
+            raise ValueError(
+                f"timestamps length {len(timestamps)} != samples {n}"
+            )
+        if n == 0:
+            return
+
+        times = np.asarray(timestamps, dtype=np.float64)
+        if self._t0 is None:
+            self._t0 = times[0]
+
+        # Interleaved column order: [Ch0_HbO, Ch0_HbR, Ch1_HbO, Ch1_HbR, ...].
+        block = np.empty((n, 2 * self.N_CHANNELS), dtype=np.float64)
+        block[:, 0::2] = o2hb
+        block[:, 1::2] = hhb
+
+        end = self.samples + n
+        self._data.resize(end, axis=0)
+        self._data[self.samples:end] = block
+        self._time.resize(end, axis=0)
+        self._time[self.samples:end] = times - self._t0
+        self.samples = end
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file.id.valid:
+            self._file.close()
 
 
 # ---------- HDF5 helpers ----------
@@ -138,14 +188,23 @@ def _write_probe(nirs, metadata: dict) -> None:
     _write_string_array(probe, "detectorLabels", ["D1", "D2"])
 
 
-def _write_data(nirs, data_time_series: np.ndarray, times: np.ndarray, sample_rate_hz: float) -> None:
+def _create_data(nirs, n_channels: int) -> tuple:
+    # Empty, resizable dataTimeSeries (n x 2*n_channels) and time datasets,
+    # plus the fixed measurementList entries. Returns (dataTimeSeries, time).
     data1 = nirs.create_group("data1")
-    data1.create_dataset("dataTimeSeries", data=data_time_series.astype(np.float64))
-    data1.create_dataset("time", data=times.astype(np.float64))
+    data = data1.create_dataset(
+        "dataTimeSeries",
+        shape=(0, 2 * n_channels),
+        maxshape=(None, 2 * n_channels),
+        chunks=(CHUNK_ROWS, 2 * n_channels),
+        dtype=np.float64,
+    )
+    time = data1.create_dataset(
+        "time", shape=(0,), maxshape=(None,), chunks=(CHUNK_ROWS,), dtype=np.float64
+    )
 
     # Each column of dataTimeSeries gets a measurementList entry. SNIRF stores
     # these as numbered subgroups: measurementList1, measurementList2, ...
-    n_channels = data_time_series.shape[1] // 2
     col = 1
     for ch in range(n_channels):
         # Channel ch maps to source (ch + 1) and detector ((ch // 4) + 1)
@@ -161,3 +220,5 @@ def _write_data(nirs, data_time_series: np.ndarray, times: np.ndarray, sample_ra
             grp.create_dataset("dataTypeIndex", data=np.int32(1))
             _write_string(grp, "dataTypeLabel", species)
             col += 1
+
+    return data, time
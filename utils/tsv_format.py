@@ -0,0 +1,195 @@
+import numpy as np
+
+from utils.session_store import FLAG_DROPPED, FLAG_MARKER, FLAG_NO_HB, FLAG_NO_OD
+
+
+# Block formatter for the OxySoft-style TSV rows, working from SessionStore
+# records. Output is byte-identical to SessionRecorder's per-row
+# f"{v:.5f}" / f"{v:.4f}" / str(int(v)) formatting.
+#
+# Text is built from 8-byte cells looked up in precomputed tables (digits
+# right-aligned, NUL padded, tab and sign folded in), so a whole block is one
+# (rows x cells) uint64 matrix; its bytes with the NULs deleted are the TSV
+# text. Values the fast path cannot reproduce exactly (non-finite, too large
+# for exact scaling, or within rounding error of a half-way tie) and
+# event-marker rows make their whole row fall back to %-formatting, which
+# matches f-string rounding exactly.
+
+EVENT_NAN_DROP = "NAN"
+
+_RAW_ROW = "%d\t" + "%.5f\t" * 32 + "%d\t%s\n"
+_CALC_ROW = "%d\t" + "%.4f\t%.4f\t" * 8 + "%s\n"
+
+# Scaled magnitudes at or above this go to the fallback: below it, the one
+# rounding in |v| * 10**decimals is under 1e-7, far inside _TIE_EPS.
+_MAX_SCALED = 1e9
+_TIE_EPS = 1e-6
+
+# Digits per table lookup.
+_GROUP = 5
+
+
+def _cell(text: bytes) -> np.uint64:
+    # One right-aligned, NUL-padded 8-byte cell.
+    return np.frombuffer(text.rjust(8, b"\0"), dtype=np.uint64)[0]
+
+
+def _table(prefix: bytes, sign: bytes, digits: int, zero_pad: bool) -> np.ndarray:
+    # Cells for every k < 10**digits: prefix + sign + k, with k zero-padded
+    # to `digits` digits or not.
+    size = 10 ** digits
+    table = np.zeros((size, 8), dtype=np.uint8)
+    rest = np.arange(size)
+    for col in range(7, 7 - digits, -1):
+        rest, digit = np.divmod(rest, 10)
+        table[:, col] = ord("0") + digit
+    n_digits = np.full(size, digits) if zero_pad else _digit_count(size)
+    rows = np.arange(size)
+    keep = np.arange(8) >= (8 - n_digits)[:, np.newaxis]
+    table[~keep] = 0
+    start = 8 - n_digits
+    for byte in reversed(prefix + sign):
+        start = start - 1
+        table[rows, start] = byte
+    return table.view(np.uint64).ravel()
+
+
+def _digit_count(size: int) -> np.ndarray:
+    return np.floor(np.log10(np.maximum(np.arange(size), 1))).astype(np.int64) + 1
+
+
+_PLAIN = _table(b"", b"", _GROUP, False)
+_NEGATIVE = _table(b"", b"-", _GROUP, False)
+_ZERO_PADDED = _table(b"", b"", _GROUP, True)
+# Integer part of a fixed-point cell, with the separating tab in front.
+_TAB_PLAIN = _table(b"\t", b"", _GROUP, False)
+_TAB_NEGATIVE = _table(b"\t", b"-", _GROUP, False)
+# Fractional part with its decimal point, by number of decimals.
+_FRACTION = {d: _table(b".", b"", d, True) for d in (4, 5)}
+
+_TAB_CELL = _cell(b"\t")
+_NEWLINE_CELL = _cell(b"\n")
+_NAN_CELL = _cell(EVENT_NAN_DROP.encode("ascii"))
+
+
+def format_records(records: np.ndarray) -> tuple:
+    # records: RECORD_DTYPE array. Returns (raw_od.tsv text, calculated.tsv text).
+    n = records.shape[0]
+    if n == 0:
+        return "", ""
+    flags = records["flags"]
+    dropped = (flags & FLAG_DROPPED) != 0
+    no_od = dropped | ((flags & FLAG_NO_OD) != 0)
+    no_hb = dropped | ((flags & FLAG_NO_HB) != 0)
+    marker = (flags & FLAG_MARKER) != 0
+
+    index = records["index"]
+    adc = records["adc"]
+    event = records["event"]
+    od = np.where(no_od[:, np.newaxis], 0.0, records["od"])
+    hb = np.empty((n, 16), dtype=np.float64)
+    hb[:, 0::2] = records["o2hb"]
+    hb[:, 1::2] = records["hhb"]
+    hb[no_hb] = 0.0
+
+    index_cells = _render_int(index)
+    tail = [
+        np.full((n, 1), _TAB_CELL),
+        _render_event(event, dropped),
+        np.full((n, 1), _NEWLINE_CELL),
+    ]
+    od_cells, od_bad = _render_fixed(od, 5)
+    hb_cells, hb_bad = _render_fixed(hb, 4)
+
+    raw = _join([index_cells, od_cells, np.full((n, 1), _TAB_CELL), _render_int(adc)] + tail)
+    calc = _join([index_cells, hb_cells] + tail)
+
+    raw_fallback = marker | od_bad
+    calc_fallback = marker | hb_bad
+    if raw_fallback.any() or calc_fallback.any():
+        events = event.astype(object)
+        events[dropped] = EVENT_NAN_DROP
+        for i in np.flatnonzero(marker):
+            events[i] = records["marker"][i].decode("utf-8")
+        raw = _splice(raw, raw_fallback, lambda i: _RAW_ROW % (
+            index[i], *od[i].tolist(), adc[i], events[i]))
+        calc = _splice(calc, calc_fallback, lambda i: _CALC_ROW % (
+            index[i], *hb[i].tolist(), events[i]))
+    return raw, calc
+
+
+# ---------- Rendering ----------
+
+
+def _render_int(values: np.ndarray) -> np.ndarray:
+    # str(int(v)) for an int column -> (M, groups) cells.
+    values = np.asarray(values, dtype=np.int64)
+    negative = values < 0
+    rest = np.abs(values)
+    groups = []  # least significant first
+    while True:
+        rest, low = np.divmod(rest, 10 ** _GROUP)
+        groups.append(low)
+        if not rest.any():
+            break
+
+    # A row's text starts in its highest non-zero group (plain or negative
+    # cell); every group after that is zero-padded, every group before it
+    # is blank.
+    cells = np.empty((values.shape[0], len(groups)), dtype=np.uint64)
+    started = np.zeros(values.shape[0], dtype=bool)
+    for col, low in enumerate(reversed(groups)):
+        starts = ~started & ((low != 0) | (col == len(groups) - 1))
+        lead = np.where(negative, _NEGATIVE[low], _PLAIN[low])
+        cells[:, col] = np.where(started, _ZERO_PADDED[low], np.where(starts, lead, np.uint64(0)))
+        started |= starts
+    return cells
+
+
+def _render_fixed(values: np.ndarray, decimals: int) -> tuple:
+    # "\t%.{decimals}f" for every value of an (n, k) float array. Returns
+    # (cells, bad): cells (n, 2k), two per value; bad (n,) marks rows with
+    # a value the fast path may get wrong (its cells hold placeholder text).
+    n, k = values.shape
+    scaled = np.abs(values) * (10.0 ** decimals)
+    with np.errstate(invalid="ignore"):
+        frac = scaled - np.floor(scaled)
+        bad = ~(scaled < _MAX_SCALED) | (np.abs(frac - 0.5) < _TIE_EPS)
+    ints = np.floor(np.where(bad, 0.0, scaled) + 0.5).astype(np.int64)
+    # Values that round up past the integer table also take the fallback.
+    wide = ints >= 10 ** (_GROUP + decimals)
+    bad |= wide
+    ints[wide] = 0
+    int_part, frac_part = np.divmod(ints, 10 ** decimals)
+
+    cells = np.empty((n, k, 2), dtype=np.uint64)
+    # Sign comes from the sign bit, so -0.0 and tiny negatives that round
+    # to zero keep their "-" as they do in %-formatting.
+    cells[:, :, 0] = np.where(np.signbit(values), _TAB_NEGATIVE[int_part], _TAB_PLAIN[int_part])
+    cells[:, :, 1] = _FRACTION[decimals][frac_part]
+    return cells.reshape(n, 2 * k), bad.any(axis=1)
+
+
+def _render_event(event: np.ndarray, dropped: np.ndarray) -> np.ndarray:
+    # Event column: the integer code, or "NAN" on dropped rows.
+    cells = _render_int(event)
+    if dropped.any():
+        cells[dropped] = 0
+        cells[dropped, -1] = _NAN_CELL
+    return cells
+
+
+def _join(columns: list) -> str:
+    # Concatenates (n, c) cell blocks into rows and drops the NUL padding.
+    cells = np.concatenate(columns, axis=1)
+    return cells.tobytes().translate(None, b"\0").decode("ascii")
+
+
+def _splice(text: str, fallback: np.ndarray, format_row) -> str:
+    # Replaces the rows flagged in fallback with format_row(i).
+    if not fallback.any():
+        return text
+    lines = text.splitlines(keepends=True)
+    for i in np.flatnonzero(fallback):
+        lines[i] = format_row(i)
+    return "".join(lines)
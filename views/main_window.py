@@ -1,6 +1,8 @@
 import logging
 import time
 
+import numpy as np
+
 from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import (
     QApplication,
@@ -19,6 +21,7 @@ from views.widgets.plot_widget import PlotWidget
 from views.dialogs.recording_notes_dialog import *
 from views.dialogs.settings_dialog import SettingsDialog
 from logic.app_controller import AppController
+from logic.signal_quality import quality_names
 from utils.app_paths import default_recordings_dir, settings_file
 from utils.stylesheet import load_stylesheet
 from utils.enums import CognitiveState
@@ -44,6 +47,13 @@ class MainWindow(QMainWindow):
 
         self.record_start_ms = None
 
+        # Quality codes the sidebar currently shows (None = reset to red).
+        self._shown_quality = None
+
+        # local_clock() time of the newest sample pushed to the plot but not
+        # yet repainted (None = nothing new, or clock offset unknown).
+        self._undrawn_sample_time = None
+
         # Guards programmatic record-button state changes (driven by the
         # controller's recording_state_changed signal) from re-entering the
         # user-intent start/stop logic in _on_record_toggled.
@@ -54,6 +64,7 @@ class MainWindow(QMainWindow):
         self._init_record_timer()
         self._init_record_flash_timer()
         self._init_calibration_poll_timer()
+        self._init_latency_poll_timer()
         self._connect_signals()
         self._on_auto_naming_toggled(True)
 
@@ -129,6 +140,13 @@ class MainWindow(QMainWindow):
         self.calibration_poll_timer.timeout.connect(self._refresh_calibration_status)
         self.calibration_poll_timer.start()
 
+    def _init_latency_poll_timer(self):
+        # Refreshes the latency card once a second; percentiles move slowly.
+        self.latency_poll_timer = QTimer(self)
+        self.latency_poll_timer.setInterval(1000)
+        self.latency_poll_timer.timeout.connect(self._refresh_latency_panel)
+        self.latency_poll_timer.start()
+
     def _connect_signals(self):
         # Connects UI actions to the controller and controller signals to UI updates
         self.connection_bar.refresh_button.clicked.connect(self._handle_refresh_clicked)
@@ -145,7 +163,7 @@ class MainWindow(QMainWindow):
         # The view now listens for the final, processed data
         self.controller.streams_found.connect(self._update_stream_dropdown)
         self.controller.connection_status.connect(self._update_connection_status)
-        self.controller.processed_data_ready.connect(self._on_processed_data)
+        self.controller.display_snapshot_ready.connect(self._on_display_snapshot)
         self.controller.alert_state_changed.connect(self.alert_sidebar.update_state_indicator)
         self.controller.sample_rate_info_changed.connect(self._on_sample_rate_info_changed)
         self.controller.recording_state_changed.connect(self._on_recording_state_changed)
@@ -240,21 +258,36 @@ class MainWindow(QMainWindow):
             self.plot_update_timer.stop()
             self.plot_widget.reset()
             self.control_sidebar.reset_signals_quality_indicators()
+            self._shown_quality = None
             self.control_sidebar.set_sample_rate_info(None)
             self.alert_sidebar.update_state_indicator(CognitiveState.NOMINAL)
             self._handle_refresh_clicked()
 
-    def _on_processed_data(self, processed_data):
+    def _on_display_snapshot(self, block):
+        # Block of processed samples from the processing thread, oldest first.
         # 1. Push into ring buffer
-        self.plot_widget.push_sample(processed_data)
+        self.plot_widget.push_block(block['O2Hb'], block['HHb'])
+        self._undrawn_sample_time = block.get('sample_time')
 
-        # 2. Quality UI update
-        if 'quality' in processed_data:
-            self.control_sidebar.update_signals_quality_indicators(processed_data['quality'])
+        # 2. Quality UI update (latest sample only; codes -> strings here),
+        # only when some channel's grade changed.
+        quality = block.get('quality')
+        if quality is not None and not np.array_equal(quality, self._shown_quality):
+            self._shown_quality = quality
+            self.control_sidebar.update_signals_quality_indicators(quality_names(quality))
 
     def _update_plot(self):
         # Called by the timer to update the plot with the latest data.
-        self.plot_widget.repaint_curves()
+        t0 = time.perf_counter()
+        if self.plot_widget.repaint_curves():
+            self.controller.record_repaint_time(time.perf_counter() - t0)
+            self.controller.record_repaint_latency(self._undrawn_sample_time)
+            self._undrawn_sample_time = None
+
+    def _refresh_latency_panel(self):
+        self.control_sidebar.diagnostics_panel.update_latency(
+            self.controller.get_latency_summary()
+        )
 
     def _on_sample_rate_info_changed(self, detected_hz):
         # Updates the UI labels and plot window using detected stream rate.
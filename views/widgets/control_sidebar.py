@@ -3,10 +3,12 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QGroupBox, QGridLayout, QLabel, QHBoxLayout, QPushButton
 from PySide6.QtCore import Qt, Signal
 import config
+from views.widgets.diagnostics_panel import DiagnosticsPanel
 
 class ControlSidebar(QWidget):
     # Left sidebar: plot legend, sample-rate readout, acquisition parameters
-    # (DPF/distance) with an Edit shortcut, and per-channel signal quality dots.
+    # (DPF/distance) with an Edit shortcut, per-channel signal quality dots
+    # and the pipeline latency card.
 
     edit_acquisition_requested = Signal()
 
@@ -140,6 +142,10 @@ class ControlSidebar(QWidget):
         quality_group.setLayout(quality_outer)
         layout.addWidget(quality_group)
 
+        # --- Latency card ---
+        self.diagnostics_panel = DiagnosticsPanel()
+        layout.addWidget(self.diagnostics_panel)
+
         layout.addStretch(1)
 
     def update_signals_quality_indicators(self, signals_quality_states):
@@ -150,6 +156,9 @@ class ControlSidebar(QWidget):
             label = self.quality_indicators[i]
             # Accept green / yellow / red; anything else falls back to red.
             normalized = state if state in ("green", "yellow", "red") else "red"
+            # Re-polishing is the expensive part; only do it on a change.
+            if label.property("state") == normalized:
+                continue
             label.setProperty("state", normalized)
 
             # Re-apply stylesheet so the [state="..."] selector takes effect
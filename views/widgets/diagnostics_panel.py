@@ -0,0 +1,52 @@
+from PySide6.QtWidgets import QGroupBox, QGridLayout, QLabel, QVBoxLayout
+from PySide6.QtCore import Qt
+
+from logic.latency import LATENCY_STAGES
+
+
+class DiagnosticsPanel(QGroupBox):
+    # Sidebar card with the sample -> pull / processed / alert / repaint
+    # latency percentiles (ms). MainWindow feeds it the controller's
+    # get_latency_summary() on a slow poll.
+
+    COLUMNS = ("p50_ms", "p95_ms", "p99_ms")
+
+    def __init__(self, parent=None):
+        super().__init__("Latency (ms)", parent)
+        self.setObjectName("CardGroupBox")
+        self._cells = {}
+        self._init_ui()
+
+    def _init_ui(self):
+        outer = QVBoxLayout()
+        outer.setSpacing(4)
+        outer.addSpacing(10)
+
+        grid = QGridLayout()
+        grid.setHorizontalSpacing(8)
+        grid.setVerticalSpacing(2)
+        for col, title in enumerate(("", "p50", "p95", "p99")):
+            grid.addWidget(QLabel(title), 0, col, alignment=Qt.AlignmentFlag.AlignRight)
+
+        for row, stage in enumerate(LATENCY_STAGES, start=1):
+            grid.addWidget(QLabel(stage), row, 0)
+            cells = []
+            for col in range(len(self.COLUMNS)):
+                cell = QLabel("–")
+                cell.setAlignment(Qt.AlignmentFlag.AlignRight)
+                grid.addWidget(cell, row, col + 1)
+                cells.append(cell)
+            self._cells[stage] = cells
+
+        outer.addLayout(grid)
+        self.setLayout(outer)
+
+    def update_latency(self, summary: dict) -> None:
+        for stage, cells in self._cells.items():
+            row = summary.get(stage) or {}
+            for cell, key in zip(cells, self.COLUMNS):
+                value = row.get(key)
+                cell.setText("–" if value is None else f"{value:.0f}")
+
+    def reset(self) -> None:
+        self.update_latency({})
@@ -1,9 +1,106 @@
+import math
+
 import pyqtgraph as pg
 import numpy as np
 from PySide6.QtWidgets import QWidget, QGridLayout, QFrame, QVBoxLayout, QLabel
 import config
 
 
+# Display decimation target: each min/max bin draws two points, so one bin
+# per horizontal pixel of the plot area.
+POINTS_PER_PIXEL = 2
+
+
+class MinMaxDecimator:
+    # Peak-preserving display decimation for a block of traces: every
+    # bin_size consecutive samples collapse to their min and max, so N
+    # samples draw as 2 * N / bin_size points and no spike is lost.
+    # Completed bins live in their own mirrored ring (see PlotWidget),
+    # updated as samples are pushed (O(rows) per sample); rebuild()
+    # recomputes them from the raw samples when the bin size changes (plot
+    # resized, new time window).
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.bin_size = 1
+        self.n_bins = 1
+        self.lo = np.zeros((rows, 2))
+        self.hi = np.zeros((rows, 2))
+        self.ptr = 0  # next bin to write
+        self._points = np.zeros((rows, 1, 2))
+        # Bin still being filled.
+        self._fill = 0
+        self._lo = np.zeros(rows)
+        self._hi = np.zeros(rows)
+
+    def rebuild(self, ordered: np.ndarray, bin_size: int) -> None:
+        # ordered: (rows, n) raw samples, oldest first. Bins are aligned to
+        # the newest sample; the oldest n % bin_size samples are left out.
+        n = ordered.shape[1]
+        bin_size = max(1, min(int(bin_size), n))
+        n_bins = n // bin_size
+        tail = ordered[:, n - n_bins * bin_size:].reshape(self.rows, n_bins, bin_size)
+        self.lo = np.tile(tail.min(axis=2), 2)
+        self.hi = np.tile(tail.max(axis=2), 2)
+        self._points = np.empty((self.rows, n_bins, 2))
+        self.bin_size = bin_size
+        self.n_bins = n_bins
+        self.ptr = 0
+        self._fill = 0
+
+    def push_block(self, block: np.ndarray) -> None:
+        # Adds (rows, n) samples, oldest first: tops up the open bin, stores
+        # every whole bin in one reduction and opens a bin for the rest.
+        n = block.shape[1]
+        start = 0
+        if self._fill:
+            start = min(n, self.bin_size - self._fill)
+            np.minimum(self._lo, block[:, :start].min(axis=1), out=self._lo)
+            np.maximum(self._hi, block[:, :start].max(axis=1), out=self._hi)
+            self._fill += start
+            if self._fill < self.bin_size:
+                return
+            self._store(self._lo[:, np.newaxis], self._hi[:, np.newaxis])
+            self._fill = 0
+        whole = (n - start) // self.bin_size
+        if whole:
+            stop = start + whole * self.bin_size
+            bins = block[:, start:stop].reshape(self.rows, whole, self.bin_size)
+            self._store(bins.min(axis=2), bins.max(axis=2))
+            start = stop
+        if start < n:
+            self._lo[:] = block[:, start:].min(axis=1)
+            self._hi[:] = block[:, start:].max(axis=1)
+            self._fill = n - start
+
+    def _store(self, lo: np.ndarray, hi: np.ndarray) -> None:
+        # Appends completed bins (rows, k) to the ring and its mirror.
+        if lo.shape[1] > self.n_bins:
+            lo, hi = lo[:, -self.n_bins:], hi[:, -self.n_bins:]
+        k = lo.shape[1]
+        at = (self.ptr + np.arange(k)) % self.n_bins
+        self.lo[:, at] = self.lo[:, at + self.n_bins] = lo
+        self.hi[:, at] = self.hi[:, at + self.n_bins] = hi
+        self.ptr = (self.ptr + k) % self.n_bins
+
+    def points(self) -> np.ndarray:
+        # (rows, 2 * n_bins) min/max pairs, oldest bin first. A partly
+        # filled bin is shown as the newest, in place of the oldest one.
+        # The result is a buffer reused by the next call.
+        lo = self.lo[:, self.ptr:self.ptr + self.n_bins]
+        hi = self.hi[:, self.ptr:self.ptr + self.n_bins]
+        out = self._points
+        if self._fill:
+            out[:, :-1, 0] = lo[:, 1:]
+            out[:, :-1, 1] = hi[:, 1:]
+            out[:, -1, 0] = self._lo
+            out[:, -1, 1] = self._hi
+        else:
+            out[:, :, 0] = lo
+            out[:, :, 1] = hi
+        return out.reshape(self.rows, 2 * self.n_bins)
+
+
 class PlotWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -17,11 +114,27 @@ class PlotWidget(QWidget):
         self.buffer_size = max(1, int(config.SAMPLE_RATE * 10))
         self.ptr = 0  # Pointer to the current write position
 
-        # Pre-allocate fixed arrays (Zero-copy optimization)
+        # Pre-allocate fixed arrays (Zero-copy optimization). The rings are
+        # mirrored: each sample is written at ptr and ptr + buffer_size, so
+        # the last buffer_size samples are always the contiguous view
+        # [:, ptr:ptr + buffer_size], oldest first.
         self.x_axis = np.linspace(-10, 0, self.buffer_size, endpoint=False)
         self.data = {
-            'O2Hb': np.zeros((len(config.CHANNEL_NAMES), self.buffer_size)),
-            'HHb': np.zeros((len(config.CHANNEL_NAMES), self.buffer_size))
+            'O2Hb': np.zeros((len(config.CHANNEL_NAMES), 2 * self.buffer_size)),
+            'HHb': np.zeros((len(config.CHANNEL_NAMES), 2 * self.buffer_size))
+        }
+        # Set when there is something new to draw; repaint_curves is a
+        # no-op otherwise.
+        self._dirty = True
+
+        # Min/max decimation of the ring buffer for drawing, sized to the
+        # plot width in repaint_curves (1 = draw the raw buffer; 0 = the
+        # bins need rebuilding).
+        self._bin_size = 0
+        self._bin_x = self.x_axis
+        self._decimators = {
+            'O2Hb': MinMaxDecimator(len(config.CHANNEL_NAMES)),
+            'HHb': MinMaxDecimator(len(config.CHANNEL_NAMES)),
         }
 
         # Auto-range control
@@ -110,25 +223,82 @@ class PlotWidget(QWidget):
 
         # Re-allocate buffers (Clears history to avoid complex ring-buffer mapping)
         self.x_axis = np.linspace(-seconds, 0, new_len, endpoint=False)
-        self.data['O2Hb'] = np.zeros((len(config.CHANNEL_NAMES), new_len), dtype=float)
-        self.data['HHb'] = np.zeros((len(config.CHANNEL_NAMES), new_len), dtype=float)
+        self.data['O2Hb'] = np.zeros((len(config.CHANNEL_NAMES), 2 * new_len), dtype=float)
+        self.data['HHb'] = np.zeros((len(config.CHANNEL_NAMES), 2 * new_len), dtype=float)
+        self._bin_size = 0
+        self._dirty = True
 
         # X-axes aren't linked, so update every plot's range explicitly.
         for plot_widget in self.plots.values():
             plot_widget.setXRange(self.x_axis[0], self.x_axis[-1])
 
     def push_sample(self, processed_data):
-        # Writes data to the ring buffer at the current pointer.
-        self.data['O2Hb'][:, self.ptr] = processed_data['O2Hb']
-        self.data['HHb'][:, self.ptr] = processed_data['HHb']
+        # One sample (dict with 'O2Hb' / 'HHb' per channel).
+        self.push_block(
+            np.reshape(processed_data['O2Hb'], (1, -1)),
+            np.reshape(processed_data['HHb'], (1, -1)),
+        )
+
+    def push_block(self, o2hb, hhb):
+        # Writes n samples ((n, channels) arrays, oldest first) to the ring
+        # buffers at the current pointer (and their mirrors).
+        n = len(o2hb)
+        if n == 0:
+            return
+        keep = min(n, self.buffer_size)
+        at = (self.ptr + n - keep + np.arange(keep)) % self.buffer_size
+        for kind, values in (('O2Hb', o2hb), ('HHb', hhb)):
+            block = np.asarray(values, dtype=float).T
+            self.data[kind][:, at] = self.data[kind][:, at + self.buffer_size] = block[:, n - keep:]
+            if self._bin_size > 1:
+                self._decimators[kind].push_block(block)
+        self._dirty = True
 
         # Advance pointer and wrap around
-        self.ptr = (self.ptr + 1) % self.buffer_size
+        self.ptr = (self.ptr + n) % self.buffer_size
+
+    def _ordered(self, kind):
+        # View of one ring buffer, oldest sample first.
+        return self.data[kind][:, self.ptr:self.ptr + self.buffer_size]
+
+    def _target_bin_size(self):
+        # Samples per min/max bin for about POINTS_PER_PIXEL points per
+        # pixel of plot width.
+        width_px = int(self.first_plot.getViewBox().size().width())
+        if width_px <= 0:
+            return 1
+        return max(1, math.ceil(2 * self.buffer_size / (POINTS_PER_PIXEL * width_px)))
+
+    def _set_bin_size(self, bin_size):
+        self._bin_size = bin_size
+        if bin_size <= 1:
+            return
+        for kind, decimator in self._decimators.items():
+            decimator.rebuild(self._ordered(kind), bin_size)
+        # Both points of a bin sit at the bin's start time.
+        decimator = self._decimators['O2Hb']
+        dt = -self.x_axis[0] / self.buffer_size
+        starts = -(decimator.n_bins - np.arange(decimator.n_bins)) * decimator.bin_size * dt
+        self._bin_x = np.repeat(starts, 2)
 
     def repaint_curves(self):
-        # Unrolls the ring buffer and updates the plots.
-        o2_ordered = np.concatenate((self.data['O2Hb'][:, self.ptr:], self.data['O2Hb'][:, :self.ptr]), axis=1)
-        hh_ordered = np.concatenate((self.data['HHb'][:, self.ptr:], self.data['HHb'][:, :self.ptr]), axis=1)
+        # Updates the plots from the ring buffer: min/max decimated to the
+        # plot width, or the raw buffer when it already fits. Returns False
+        # (and draws nothing) when nothing changed since the last repaint.
+        bin_size = self._target_bin_size()
+        if bin_size != self._bin_size:
+            self._set_bin_size(bin_size)
+        elif not self._dirty:
+            return False
+        self._dirty = False
+        if self._bin_size > 1:
+            x_axis = self._bin_x
+            o2_ordered = self._decimators['O2Hb'].points()
+            hh_ordered = self._decimators['HHb'].points()
+        else:
+            x_axis = self.x_axis
+            o2_ordered = self._ordered('O2Hb')
+            hh_ordered = self._ordered('HHb')
 
         self._y_autorange_counter += 1
         do_autorange = (self._y_autorange_counter % self._y_autorange_every) == 0
@@ -136,8 +306,8 @@ class PlotWidget(QWidget):
         for i, name in enumerate(config.CHANNEL_NAMES):
             o2_row = o2_ordered[i, :]
             hh_row = hh_ordered[i, :]
-            self.plot_curves[name]['O2Hb'].setData(x=self.x_axis, y=o2_row)
-            self.plot_curves[name]['HHb'].setData(x=self.x_axis, y=hh_row)
+            self.plot_curves[name]['O2Hb'].setData(x=x_axis, y=o2_row)
+            self.plot_curves[name]['HHb'].setData(x=x_axis, y=hh_row)
 
             # Auto-range each plot independently against its own channel data.
             if do_autorange:
@@ -146,10 +316,13 @@ class PlotWidget(QWidget):
                 data_range = (ch_max - ch_min)
                 padding = max(data_range * 0.1, 0.001)
                 self.plots[name].setYRange(ch_min - padding, ch_max + padding)
+        return True
 
     def reset(self):
         # Clear all data and repaint as a flat baseline
         self.data['O2Hb'].fill(0.0)
         self.data['HHb'].fill(0.0)
         self.ptr = 0
+        self._bin_size = 0
+        self._dirty = True
         self.repaint_curves()
\ No newline at end of file